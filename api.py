@@ -3,29 +3,95 @@ FastAPI Backend for Wine Recommendation System
 Connects Next.js frontend with Python recommendation engine
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+import asyncio
+import json
 import sys
 import os
+import time
+import weakref
 from pathlib import Path
 
 # Add backend to path
 backend_path = Path(__file__).parent / "backend"
 sys.path.insert(0, str(backend_path))
 
-# Change to backend directory for CSV loading
-os.chdir(backend_path)
+import metricas
+from listagem_catalogo import LIMITE_MAXIMO, LIMITE_PADRAO
+from perfil_requisicoes import PERFIL_HABILITADO, perfilar
+from sistema_recomendacao_vinho import catalogo_padrao
+from llm import configurar_llm, gerar_justificativa_vinho, gerar_justificativa_vinho_stream
 
-from sistema_recomendacao_vinho import recomendar_vinho, df_pratos, df_vinhos
-from llm import configurar_llm, gerar_justificativa_vinho
+# LLM calls are blocking: run them on a bounded thread pool so the event loop keeps serving
+LLM_MAX_CONCURRENCIA = int(os.getenv("LLM_MAX_CONCURRENCIA", "4"))
+# Counted from when a call gets an LLM slot (time queued behind llm_semaforo is not included)
+LLM_TIMEOUT_SEGUNDOS = float(os.getenv("LLM_TIMEOUT_SEGUNDOS", "30"))
+llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCIA, thread_name_prefix="justificativa")
+# The single LLM concurrency limit: every justification (thread pool or streaming) holds a slot.
+# asyncio primitives belong to one event loop, so each running loop gets its own semaphore
+# (uvicorn runs one loop per worker; tests and the benchmark start a new loop per run)
+_llm_semaforos = weakref.WeakKeyDictionary()
+
+def llm_semaforo() -> asyncio.Semaphore:
+    """The LLM concurrency semaphore of the running event loop (created on first use)"""
+    loop = asyncio.get_running_loop()
+    semaforo = _llm_semaforos.get(loop)
+    if semaforo is None:
+        semaforo = _llm_semaforos.setdefault(loop, asyncio.Semaphore(LLM_MAX_CONCURRENCIA))
+    return semaforo
+
+# Bulk endpoint: maximum items per request, items searched/scored per executor call,
+# and justifications in flight at once (bounds memory regardless of batch size)
+LOTE_MAX_ITENS = int(os.getenv("LOTE_MAX_ITENS", "10000"))
+TAMANHO_BLOCO_LOTE = 256
+LOTE_JUSTIFICATIVAS_PENDENTES = 2 * LLM_MAX_CONCURRENCIA
+
+# Dish/wine catalog (CSV directory from CATALOGO_DIR, default: backend/)
+catalogo = catalogo_padrao()
+
+metricas.registro.gauge("vinhos_catalogo_pratos", "Dishes in the loaded catalog", funcao=lambda: len(catalogo.df_pratos))
+metricas.registro.gauge("vinhos_catalogo_vinhos", "Wines in the loaded catalog", funcao=lambda: len(catalogo.df_vinhos))
+
+# Seconds between checks for CSV changes (0 disables polling; /admin/catalogo/recarregar still works)
+CATALOGO_RECARGA_INTERVALO = float(os.getenv("CATALOGO_RECARGA_INTERVALO", "10"))
+# Optional token required by the admin endpoints (X-Admin-Token header)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+async def vigiar_catalogo():
+    """Reload the catalog in the background whenever pratos.csv/vinhos.csv change"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(CATALOGO_RECARGA_INTERVALO)
+        try:
+            if await loop.run_in_executor(None, catalogo.recarregar_se_alterado):
+                print(f"🔄 Catálogo recarregado: {len(catalogo.df_pratos)} pratos, {len(catalogo.df_vinhos)} vinhos")
+        except Exception as e:
+            print(f"⚠️ Falha ao recarregar catálogo (mantendo a versão atual): {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and index the catalog before serving, so the first request does not pay for it
+    await asyncio.get_running_loop().run_in_executor(None, catalogo.carregar)
+    vigia = asyncio.create_task(vigiar_catalogo()) if CATALOGO_RECARGA_INTERVALO > 0 else None
+    yield
+    if vigia is not None:
+        vigia.cancel()
+    llm_executor.shutdown(wait=False, cancel_futures=True)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Wine Recommendation API",
     description="API for wine recommendation with AI-generated justifications",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS for Next.js frontend
@@ -35,12 +101,59 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Perfil"],
 )
 
+class MedirRequisicoes:
+    """
+    Count requests and observe their latency per route template (not per raw path).
+    Pure ASGI middleware: the duration ends when the app has sent the whole body, so
+    streaming responses (SSE, NDJSON) are measured until their last chunk.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        inicio = time.perf_counter()
+        status = 500
+        
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+        
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            # The router stores the matched route in the (shared) scope
+            rota = getattr(scope.get("route"), "path", "desconhecida")
+            metricas.requisicoes_total.inc(metodo=scope["method"], rota=rota, status=status)
+            metricas.requisicao_duracao.observar(time.perf_counter() - inicio, metodo=scope["method"], rota=rota)
+
+app.add_middleware(MedirRequisicoes)
+
 # Request/Response Models
 class RecomendacaoRequest(BaseModel):
     mensagem: str
 
+class RecomendacaoLoteRequest(BaseModel):
+    itens: list[str]
+    justificativa: bool = False
+    top_n: int = Field(default=1, ge=1, le=10)
+
+class RecomendacaoAtributosRequest(BaseModel):
+    tipo_prato: str
+    acidez: str
+    intensidade_sabor: str
+    temperos: Optional[str] = None
+    top_n: int = Field(default=1, ge=1, le=10)
+
 class VinhoResponse(BaseModel):
     nome: str
     tipo: str
@@ -54,6 +167,10 @@ class RecomendacaoResponse(BaseModel):
     justificativa: str
     mensagem: str
 
+class RecomendacaoAtributosResponse(BaseModel):
+    atributos: dict
+    vinhos: list[VinhoResponse]
+
 # Initialize LLM (try to configure, fallback if no API key)
 try:
     configurar_llm()
@@ -63,26 +180,103 @@ except Exception as e:
     LLM_AVAILABLE = False
     print(f"⚠️ LLM not available: {e}")
 
-def buscar_prato_no_csv(query: str) -> Optional[dict]:
-    """Find dish in CSV by name or similar text"""
-    query_lower = query.lower()
-    
-    # Try exact match first
-    prato = df_pratos[df_pratos['nome_prato'].str.lower() == query_lower]
-    if not prato.empty:
-        return prato.iloc[0].to_dict()
-    
-    # Try partial match
-    prato = df_pratos[df_pratos['nome_prato'].str.lower().str.contains(query_lower, na=False)]
-    if not prato.empty:
-        return prato.iloc[0].to_dict()
-    
-    # Try searching in ingredients
-    prato = df_pratos[df_pratos['ingredientes'].str.lower().str.contains(query_lower, na=False)]
-    if not prato.empty:
-        return prato.iloc[0].to_dict()
-    
-    return None
+def buscar_prato_no_csv(query: str, dados=None) -> Optional[dict]:
+    """Find dish by exact name, partial name or ingredient using the prebuilt search index"""
+    with metricas.medir_etapa("busca"):
+        return (dados or catalogo.dados).buscar_prato(query)
+
+def recomendar_para_prato(dados, nome_prato: str) -> list:
+    """Top wine for a dish as a list of RecomendacaoVinho (empty if none)"""
+    with metricas.medir_etapa("scoring"):
+        return dados.recomendar(nome_prato, top_n=1, como_dataframe=False)
+
+def caracteristicas_do_prato(prato_data: dict) -> dict:
+    """Dish attributes passed to the justification LLM"""
+    return {
+        'tipo_prato': prato_data['tipo_prato'],
+        'temperos': prato_data['temperos'],
+        'acidez': prato_data['acidez'],
+        'intensidade_sabor': prato_data['intensidade_sabor'],
+        'ingredientes': prato_data['ingredientes']
+    }
+
+def info_do_vinho(melhor_vinho) -> dict:
+    """Wine name, type and scores passed to the justification LLM"""
+    return melhor_vinho._asdict()
+
+def vinho_response(melhor_vinho) -> VinhoResponse:
+    """API model for a RecomendacaoVinho"""
+    return VinhoResponse(
+        nome=melhor_vinho.vinho,
+        tipo=melhor_vinho.tipo_vinho,
+        similaridade=melhor_vinho.similaridade_percentual,
+        score_features=melhor_vinho.score_features,
+        score_regras=melhor_vinho.score_regras
+    )
+
+def cabecalho_mensagem(melhor_vinho) -> str:
+    """Chat message header with the wine pick and compatibility, before the justification"""
+    mensagem = f"🍷 **{melhor_vinho.vinho}** ({melhor_vinho.tipo_vinho})\n\n"
+    mensagem += f"📊 **Compatibilidade:** {melhor_vinho.similaridade_percentual:.1f}%\n\n"
+    mensagem += "✨ **Justificativa:**\n"
+    return mensagem
+
+def justificativa_padrao(nome_vinho: str, nome_prato: str) -> str:
+    """Fallback justification used when the LLM is unavailable or fails"""
+    return f"O {nome_vinho} harmoniza perfeitamente com {nome_prato} devido às suas características complementares."
+
+def gerar_justificativa_medida(**argumentos) -> str:
+    """gerar_justificativa_vinho with the in-flight gauge and the justification stage histogram"""
+    with metricas.llm_em_andamento.em_andamento(), metricas.medir_etapa("justificativa"):
+        return gerar_justificativa_vinho(**argumentos)
+
+def liberar_slot_llm(semaforo: asyncio.Semaphore, futuro) -> None:
+    """Done callback of an LLM thread: free its semaphore slot and consume the result (nobody awaits it after a timeout)"""
+    semaforo.release()
+    if not futuro.cancelled():
+        futuro.exception()
+
+async def executar_no_llm(funcao):
+    """
+    Run a blocking LLM call on llm_executor under llm_semaforo, with LLM_TIMEOUT_SEGUNDOS
+    counted from when the slot is acquired. After a timeout the slot stays taken until the
+    thread actually finishes, so running LLM calls never exceed LLM_MAX_CONCURRENCIA.
+    """
+    semaforo = llm_semaforo()
+    await semaforo.acquire()
+    try:
+        futuro = asyncio.get_running_loop().run_in_executor(llm_executor, funcao)
+    except BaseException:
+        semaforo.release()
+        raise
+    futuro.add_done_callback(partial(liberar_slot_llm, semaforo))
+    return await asyncio.wait_for(asyncio.shield(futuro), timeout=LLM_TIMEOUT_SEGUNDOS)
+
+async def gerar_justificativa_async(nome_prato: str, caracteristicas_prato: dict, vinho_info: dict) -> str:
+    """
+    Run gerar_justificativa_vinho on the LLM thread pool without blocking the event loop.
+    Falls back to a default justification on error or after LLM_TIMEOUT_SEGUNDOS.
+    """
+    if not LLM_AVAILABLE:
+        metricas.llm_fallbacks.inc(motivo="indisponivel")
+        return justificativa_padrao(vinho_info['vinho'], nome_prato)
+
+    try:
+        return await executar_no_llm(
+            partial(
+                gerar_justificativa_medida,
+                nome_prato=nome_prato,
+                caracteristicas_prato=caracteristicas_prato,
+                vinho_info=vinho_info
+            )
+        )
+    except asyncio.TimeoutError:
+        metricas.llm_fallbacks.inc(motivo="timeout")
+        print(f"Tempo esgotado ao gerar justificativa ({LLM_TIMEOUT_SEGUNDOS}s)")
+    except Exception as e:
+        metricas.llm_fallbacks.inc(motivo="erro")
+        print(f"Erro ao gerar justificativa: {e}")
+    return justificativa_padrao(vinho_info['vinho'], nome_prato)
 
 @app.get("/")
 def root():
@@ -92,8 +286,8 @@ def root():
         "service": "Wine Recommendation API",
         "version": "1.0.0",
         "llm_available": LLM_AVAILABLE,
-        "dishes_count": len(df_pratos),
-        "wines_count": len(df_vinhos)
+        "dishes_count": len(catalogo.df_pratos),
+        "wines_count": len(catalogo.df_vinhos)
     }
 
 @app.get("/health")
@@ -103,148 +297,474 @@ def health():
         "status": "healthy",
         "llm_configured": LLM_AVAILABLE,
         "database": {
-            "pratos": len(df_pratos),
-            "vinhos": len(df_vinhos)
+            "pratos": len(catalogo.df_pratos),
+            "vinhos": len(catalogo.df_vinhos)
         }
     }
 
+async def montar_recomendacao(mensagem: str, tempos: metricas.RequestTimings) -> RecomendacaoResponse:
+    """Search, scoring and justification for one message (stage durations go to tempos)"""
+    # Same catalog version for the whole request, even if a reload happens meanwhile
+    dados = catalogo.dados
+    
+    # Search for dish in database
+    prato_data = buscar_prato_no_csv(mensagem, dados)
+    
+    if not prato_data:
+        return RecomendacaoResponse(
+            prato="",
+            vinho=VinhoResponse(
+                nome="",
+                tipo="",
+                similaridade=0,
+                score_features=0,
+                score_regras=0
+            ),
+            justificativa="",
+            mensagem=f'Desculpe, não encontrei informações sobre "{mensagem}". Tente mencionar um prato específico como "Sushi", "Salmão grelhado", "Picanha" ou "Risotto".'
+        )
+    
+    nome_prato = prato_data['nome_prato']
+    
+    # Get wine recommendations
+    recomendacoes = recomendar_para_prato(dados, nome_prato)
+    
+    if not recomendacoes:
+        return RecomendacaoResponse(
+            prato=nome_prato,
+            vinho=VinhoResponse(
+                nome="",
+                tipo="",
+                similaridade=0,
+                score_features=0,
+                score_regras=0
+            ),
+            justificativa="",
+            mensagem=f"Não encontrei vinhos compatíveis para {nome_prato}."
+        )
+    
+    # Get top recommendation
+    melhor_vinho = recomendacoes[0]
+    
+    # Generate justification with LLM (off the event loop, with fallback); includes waiting for a free slot
+    with tempos.etapa("llm"):
+        justificativa = await gerar_justificativa_async(
+            nome_prato, caracteristicas_do_prato(prato_data), info_do_vinho(melhor_vinho)
+        )
+    
+    # Build response message
+    mensagem_resposta = cabecalho_mensagem(melhor_vinho) + justificativa
+    
+    return RecomendacaoResponse(
+        prato=nome_prato,
+        vinho=vinho_response(melhor_vinho),
+        justificativa=justificativa,
+        mensagem=mensagem_resposta
+    )
+
+def perfil_solicitado(x_perfil: Optional[str], x_admin_token: Optional[str]) -> bool:
+    """Profiling needs PERFIL_HABILITADO=true, the X-Perfil: 1 header and (if set) the admin token"""
+    if not PERFIL_HABILITADO or x_perfil not in ("1", "true"):
+        return False
+    return not ADMIN_TOKEN or x_admin_token == ADMIN_TOKEN
+
 @app.post("/api/recomendacao", response_model=RecomendacaoResponse)
-async def recomendar(request: RecomendacaoRequest):
+async def recomendar(
+    request: RecomendacaoRequest,
+    x_perfil: Optional[str] = Header(default=None),
+    x_admin_token: Optional[str] = Header(default=None)
+):
     """
     Main recommendation endpoint
-    Receives a dish name and returns the top wine recommendation with AI justification
+    Receives a dish name and returns the top wine recommendation with AI justification.
+    The Server-Timing header breaks the request into busca, scoring, llm and serializacao (ms).
     """
+    mensagem = request.mensagem.strip()
+    
+    if not mensagem:
+        raise HTTPException(status_code=400, detail="Mensagem é obrigatória")
+    
+    tempos = metricas.RequestTimings()
+    cabecalhos = {}
+    captura = None
     try:
-        mensagem = request.mensagem.strip()
-        
-        if not mensagem:
-            raise HTTPException(status_code=400, detail="Mensagem é obrigatória")
-        
-        # Search for dish in database
-        prato_data = buscar_prato_no_csv(mensagem)
-        
-        if not prato_data:
-            return RecomendacaoResponse(
-                prato="",
-                vinho=VinhoResponse(
-                    nome="",
-                    tipo="",
-                    similaridade=0,
-                    score_features=0,
-                    score_regras=0
-                ),
-                justificativa="",
-                mensagem=f'Desculpe, não encontrei informações sobre "{mensagem}". Tente mencionar um prato específico como "Sushi", "Salmão grelhado", "Picanha" ou "Risotto".'
-            )
-        
-        nome_prato = prato_data['nome_prato']
-        
-        # Get wine recommendations
-        recomendacoes = recomendar_vinho(nome_prato, df_pratos, df_vinhos, top_n=1)
-        
-        if recomendacoes.empty:
-            return RecomendacaoResponse(
-                prato=nome_prato,
-                vinho=VinhoResponse(
-                    nome="",
-                    tipo="",
-                    similaridade=0,
-                    score_features=0,
-                    score_regras=0
-                ),
-                justificativa="",
-                mensagem=f"Não encontrei vinhos compatíveis para {nome_prato}."
-            )
-        
-        # Get top recommendation
-        melhor_vinho = recomendacoes.iloc[0]
-        
-        # Prepare wine response
-        vinho_response = VinhoResponse(
-            nome=melhor_vinho['vinho'],
-            tipo=melhor_vinho['tipo_vinho'],
-            similaridade=float(melhor_vinho['similaridade_percentual']),
-            score_features=float(melhor_vinho['score_features']),
-            score_regras=float(melhor_vinho['score_regras'])
-        )
-        
-        # Generate justification with LLM (if available)
-        justificativa = ""
-        if LLM_AVAILABLE:
-            try:
-                caracteristicas_prato = {
-                    'tipo_prato': prato_data['tipo_prato'],
-                    'temperos': prato_data['temperos'],
-                    'acidez': prato_data['acidez'],
-                    'intensidade_sabor': prato_data['intensidade_sabor'],
-                    'ingredientes': prato_data['ingredientes']
-                }
-                
-                vinho_info = {
-                    'vinho': melhor_vinho['vinho'],
-                    'tipo_vinho': melhor_vinho['tipo_vinho'],
-                    'similaridade_percentual': melhor_vinho['similaridade_percentual'],
-                    'score_features': melhor_vinho['score_features'],
-                    'score_regras': melhor_vinho['score_regras']
-                }
-                
-                justificativa = gerar_justificativa_vinho(
-                    nome_prato=nome_prato,
-                    caracteristicas_prato=caracteristicas_prato,
-                    vinho_info=vinho_info
-                )
-            except Exception as e:
-                print(f"Erro ao gerar justificativa: {e}")
-                justificativa = f"O {melhor_vinho['vinho']} harmoniza perfeitamente com {nome_prato} devido às suas características complementares."
-        else:
-            justificativa = f"O {melhor_vinho['vinho']} harmoniza perfeitamente com {nome_prato} devido às suas características complementares."
-        
-        # Build response message
-        mensagem_resposta = f"🍷 **{melhor_vinho['vinho']}** ({melhor_vinho['tipo_vinho']})\n\n"
-        mensagem_resposta += f"📊 **Compatibilidade:** {melhor_vinho['similaridade_percentual']:.1f}%\n\n"
-        mensagem_resposta += f"✨ **Justificativa:**\n{justificativa}"
-        
-        return RecomendacaoResponse(
-            prato=nome_prato,
-            vinho=vinho_response,
-            justificativa=justificativa,
-            mensagem=mensagem_resposta
-        )
-        
-    except HTTPException:
-        raise
+        with tempos.ativar():
+            if perfil_solicitado(x_perfil, x_admin_token):
+                with perfilar("recomendacao") as captura:
+                    resposta = await montar_recomendacao(mensagem, tempos)
+                cabecalhos["X-Perfil"] = Path(captura.arquivo).name if captura.arquivo else "ocupado"
+            else:
+                resposta = await montar_recomendacao(mensagem, tempos)
     except Exception as e:
         print(f"Erro ao processar recomendação: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Erro ao processar recomendação: {str(e)}")
+    
+    # Serialize here (instead of letting FastAPI do it) so the time shows up in Server-Timing
+    with tempos.etapa("serializacao"):
+        corpo = resposta.model_dump_json()
+    cabecalhos["Server-Timing"] = tempos.server_timing()
+    # The profile files are written after the response is sent, on the thread pool
+    gravacao = BackgroundTask(captura.gravar) if captura is not None and captura.arquivo else None
+    return Response(corpo, media_type="application/json", headers=cabecalhos, background=gravacao)
+
+def evento_sse(evento: str, dados: dict) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+# End of the chunks that ler_stream_do_llm puts in its queue
+_FIM_STREAM = object()
+
+async def ler_stream_do_llm(stream, fila: asyncio.Queue) -> None:
+    """
+    Read a justification stream into fila while holding an llm_semaforo slot, with
+    LLM_TIMEOUT_SEGUNDOS counted from when the slot is acquired. The slot is freed as soon
+    as the LLM is done, however slowly the client reads the SSE events. A timeout or error
+    is put in fila as the exception; _FIM_STREAM always comes last.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        async with llm_semaforo():
+            prazo = loop.time() + LLM_TIMEOUT_SEGUNDOS
+            inicio = time.perf_counter()
+            metricas.llm_em_andamento.inc()
+            try:
+                while True:
+                    trecho = await asyncio.wait_for(stream.__anext__(), timeout=max(0.0, prazo - loop.time()))
+                    fila.put_nowait(trecho)
+            finally:
+                metricas.llm_em_andamento.dec()
+                metricas.etapa_duracao.observar(time.perf_counter() - inicio, etapa="justificativa_stream")
+    except StopAsyncIteration:
+        pass
+    except Exception as e:
+        fila.put_nowait(e)
+    finally:
+        await stream.aclose()
+        fila.put_nowait(_FIM_STREAM)
+
+async def eventos_recomendacao(mensagem: str):
+    """
+    SSE events for /api/recomendacao/stream:
+    - recomendacao: dish, wine and scores (available right away) plus the message header
+    - justificativa: one event per justification chunk from the LLM
+    - fim: full justification and final chat message
+    """
+    dados = catalogo.dados
+    prato_data = buscar_prato_no_csv(mensagem, dados)
+    if not prato_data:
+        yield evento_sse("fim", {
+            "prato": "",
+            "justificativa": "",
+            "mensagem": f'Desculpe, não encontrei informações sobre "{mensagem}". Tente mencionar um prato específico como "Sushi", "Salmão grelhado", "Picanha" ou "Risotto".'
+        })
+        return
+    
+    nome_prato = prato_data['nome_prato']
+    recomendacoes = recomendar_para_prato(dados, nome_prato)
+    if not recomendacoes:
+        yield evento_sse("fim", {
+            "prato": nome_prato,
+            "justificativa": "",
+            "mensagem": f"Não encontrei vinhos compatíveis para {nome_prato}."
+        })
+        return
+    
+    melhor_vinho = recomendacoes[0]
+    cabecalho = cabecalho_mensagem(melhor_vinho)
+    yield evento_sse("recomendacao", {
+        "prato": nome_prato,
+        "vinho": vinho_response(melhor_vinho).model_dump(),
+        "mensagem": cabecalho
+    })
+    
+    trechos = []
+    # Why the default justification replaced the LLM's (None when the LLM text is complete)
+    motivo = None
+    if LLM_AVAILABLE:
+        stream = gerar_justificativa_vinho_stream(
+            nome_prato, caracteristicas_do_prato(prato_data), info_do_vinho(melhor_vinho)
+        )
+        fila = asyncio.Queue()
+        produtor = asyncio.create_task(ler_stream_do_llm(stream, fila))
+        try:
+            while (item := await fila.get()) is not _FIM_STREAM:
+                if isinstance(item, asyncio.TimeoutError):
+                    motivo = "timeout"
+                    print(f"Tempo esgotado ao gerar justificativa ({LLM_TIMEOUT_SEGUNDOS}s)")
+                elif isinstance(item, Exception):
+                    motivo = "erro"
+                    metricas.etapa_erros.inc(etapa="justificativa_stream")
+                    print(f"Erro ao gerar justificativa: {item}")
+                else:
+                    trechos.append(item)
+                    yield evento_sse("justificativa", {"texto": item})
+        finally:
+            # Client gone: stop the LLM stream and free its slot
+            produtor.cancel()
+    else:
+        motivo = "indisponivel"
+    
+    if motivo is None and not trechos:
+        motivo = "erro"
+    if motivo is not None:
+        # A stream cut off by a timeout or error is replaced as a whole: the chunks already
+        # sent are superseded by the justification in the fim event
+        metricas.llm_fallbacks.inc(motivo=motivo)
+        justificativa = justificativa_padrao(melhor_vinho.vinho, nome_prato)
+        if not trechos:
+            yield evento_sse("justificativa", {"texto": justificativa})
+    else:
+        justificativa = "".join(trechos)
+    
+    yield evento_sse("fim", {
+        "prato": nome_prato,
+        "justificativa": justificativa,
+        "mensagem": cabecalho + justificativa,
+        "motivo": motivo
+    })
+
+def recomendar_bloco(dados, mensagens: list, top_n: int) -> list:
+    """Search each message and score all found dishes at once: (message, dish dict or None, wines or None) per item"""
+    pratos = [buscar_prato_no_csv(mensagem, dados) if mensagem.strip() else None for mensagem in mensagens]
+    nomes = [prato['nome_prato'] for prato in pratos if prato]
+    with metricas.medir_etapa("scoring"):
+        recomendacoes = iter(dados.recomendar_lote(nomes, top_n, como_dataframe=False))
+    return [(mensagem, prato, next(recomendacoes) if prato else None) for mensagem, prato in zip(mensagens, pratos)]
+
+def item_lote(indice: int, mensagem: str, prato_data: Optional[dict], recomendacoes: Optional[list]) -> dict:
+    """One NDJSON line of /api/recomendacao/lote (plain dicts, no Pydantic per item)"""
+    item = {"indice": indice, "mensagem": mensagem, "prato": prato_data['nome_prato'] if prato_data else None}
+    if not prato_data:
+        item["vinhos"] = []
+        item["erro"] = "Prato não encontrado" if mensagem.strip() else "Mensagem vazia"
+        return item
+    item["vinhos"] = [
+        {
+            "nome": vinho.vinho,
+            "tipo": vinho.tipo_vinho,
+            "similaridade": vinho.similaridade_percentual,
+            "score_features": vinho.score_features,
+            "score_regras": vinho.score_regras
+        }
+        for vinho in recomendacoes
+    ]
+    if not recomendacoes:
+        item["erro"] = "Nenhum vinho compatível"
+    return item
+
+def linha_ndjson(item: dict) -> str:
+    return json.dumps(item, ensure_ascii=False) + "\n"
+
+async def justificar_item(item: dict, prato_data: dict, melhor_vinho) -> dict:
+    item["justificativa"] = await gerar_justificativa_async(
+        prato_data['nome_prato'], caracteristicas_do_prato(prato_data), info_do_vinho(melhor_vinho)
+    )
+    return item
+
+async def linhas_lote(itens: list, top_n: int, justificar: bool):
+    """
+    NDJSON lines for /api/recomendacao/lote.
+    Items are searched and scored in blocks off the event loop and sent as soon as each block is ready.
+    With justificar, an item is sent once its justification is done (so lines may come out of order),
+    with at most LOTE_JUSTIFICATIVAS_PENDENTES justifications waiting at a time.
+    """
+    dados = catalogo.dados
+    loop = asyncio.get_running_loop()
+    pendentes = set()
+    
+    try:
+        for inicio in range(0, len(itens), TAMANHO_BLOCO_LOTE):
+            bloco = itens[inicio:inicio + TAMANHO_BLOCO_LOTE]
+            resultados = await loop.run_in_executor(None, recomendar_bloco, dados, bloco, top_n)
+            
+            for indice, (mensagem, prato_data, recomendacoes) in enumerate(resultados, start=inicio):
+                item = item_lote(indice, mensagem, prato_data, recomendacoes)
+                if not (justificar and recomendacoes):
+                    yield linha_ndjson(item)
+                    continue
+                
+                while len(pendentes) >= LOTE_JUSTIFICATIVAS_PENDENTES:
+                    prontas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+                    for tarefa in prontas:
+                        yield linha_ndjson(tarefa.result())
+                pendentes.add(asyncio.create_task(justificar_item(item, prato_data, recomendacoes[0])))
+            
+            # Send justifications that finished while this block was processed
+            prontas = {tarefa for tarefa in pendentes if tarefa.done()}
+            pendentes -= prontas
+            for tarefa in prontas:
+                yield linha_ndjson(tarefa.result())
+        
+        while pendentes:
+            prontas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+            for tarefa in prontas:
+                yield linha_ndjson(tarefa.result())
+    finally:
+        # Client disconnected: drop justifications nobody will read
+        for tarefa in pendentes:
+            tarefa.cancel()
+
+@app.post("/api/recomendacao/lote")
+async def recomendar_lote(request: RecomendacaoLoteRequest):
+    """
+    Bulk recommendation endpoint (NDJSON)
+    Accepts up to LOTE_MAX_ITENS dish names or messages and streams one JSON line per item
+    """
+    if len(request.itens) > LOTE_MAX_ITENS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {LOTE_MAX_ITENS} itens por lote")
+    
+    return StreamingResponse(
+        linhas_lote(request.itens, request.top_n, request.justificativa),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/recomendacao/atributos", response_model=RecomendacaoAtributosResponse)
+async def recomendar_por_atributos(request: RecomendacaoAtributosRequest):
+    """
+    Recommendation for a dish described by its attributes (no catalog lookup)
+    Served from the per-profile table: works for dishes that are not in the catalog
+    """
+    atributos = request.model_dump(exclude={"top_n"})
+    dados = catalogo.dados
+    # Off the event loop: the first request after a (re)load builds the profile table
+    perfis = await asyncio.get_running_loop().run_in_executor(None, lambda: dados.perfis)
+    try:
+        linha = perfis.linha(**atributos)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    with metricas.medir_etapa("scoring"):
+        recomendacoes = perfis.top_recomendacoes(linha, request.top_n)
+    
+    return RecomendacaoAtributosResponse(
+        atributos=atributos,
+        vinhos=[vinho_response(vinho) for vinho in recomendacoes]
+    )
+
+@app.post("/api/recomendacao/stream")
+async def recomendar_stream(request: RecomendacaoRequest):
+    """
+    Streaming recommendation endpoint (Server-Sent Events)
+    Sends the wine pick immediately, then the justification as the LLM generates it
+    """
+    mensagem = request.mensagem.strip()
+    if not mensagem:
+        raise HTTPException(status_code=400, detail="Mensagem é obrigatória")
+    
+    return StreamingResponse(
+        eventos_recomendacao(mensagem),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics (text exposition format) for this worker process"""
+    return PlainTextResponse(metricas.registro.expor(), media_type=metricas.TIPO_CONTEUDO)
+
+def pagina_listagem(listagem, campos: list, filtro: Optional[str], cursor: Optional[str], offset: Optional[int], limite: int):
+    """One page from a CatalogListing, with query errors reported as 400"""
+    if cursor is not None and offset is not None:
+        raise HTTPException(status_code=400, detail="Use cursor ou offset, não ambos")
+    try:
+        posicao = int(cursor) if cursor is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    try:
+        return listagem.pagina(campos, filtro=filtro, cursor=posicao, offset=offset, limite=limite)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def campos_pedidos(campos: Optional[str], padrao: list) -> list:
+    """Comma-separated field list from the query string (padrao when absent)"""
+    if not campos:
+        return padrao
+    return [c.strip() for c in campos.split(",") if c.strip()]
 
 @app.get("/api/pratos")
-def listar_pratos():
-    """List all available dishes"""
-    pratos = df_pratos['nome_prato'].tolist()
+def listar_pratos(
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    offset: Optional[int] = Query(None, ge=0),
+    campos: Optional[str] = None,
+    tipo_prato: Optional[str] = None
+):
+    """
+    List dishes, one page at a time (cursor or offset), optionally filtered by tipo_prato.
+    Without campos, items are dish names; with campos (e.g. nome_prato,tipo_prato), objects.
+    """
+    listagem = catalogo.dados.listagem_pratos
+    total, itens, proximo = pagina_listagem(
+        listagem, campos_pedidos(campos, ["nome_prato"]), tipo_prato, cursor, offset, limite
+    )
     return {
-        "total": len(pratos),
-        "pratos": pratos[:20],  # Return first 20 for preview
-        "message": f"Total de {len(pratos)} pratos disponíveis"
+        "total": total,
+        "pratos": itens if campos else [item["nome_prato"] for item in itens],
+        "proximo_cursor": None if proximo is None else str(proximo),
+        "message": f"Total de {total} pratos disponíveis"
     }
 
 @app.get("/api/vinhos")
-def listar_vinhos():
-    """List all available wines"""
-    vinhos = df_vinhos[['vinho', 'tipo_vinho']].to_dict('records')
+def listar_vinhos(
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    offset: Optional[int] = Query(None, ge=0),
+    campos: Optional[str] = None,
+    tipo_vinho: Optional[str] = None
+):
+    """List wines (vinho and tipo_vinho by default), one page at a time, optionally filtered by tipo_vinho"""
+    listagem = catalogo.dados.listagem_vinhos
+    total, itens, proximo = pagina_listagem(
+        listagem, campos_pedidos(campos, ["vinho", "tipo_vinho"]), tipo_vinho, cursor, offset, limite
+    )
     return {
-        "total": len(vinhos),
-        "vinhos": vinhos
+        "total": total,
+        "vinhos": itens,
+        "proximo_cursor": None if proximo is None else str(proximo)
+    }
+
+@app.post("/admin/catalogo/recarregar")
+async def recarregar_catalogo(x_admin_token: Optional[str] = Header(default=None)):
+    """Rebuild the catalog from the CSVs and swap it in without dropping requests"""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Token de administração inválido")
+    
+    try:
+        dados = await asyncio.get_running_loop().run_in_executor(None, catalogo.recarregar)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Falha ao recarregar catálogo (versão atual mantida): {e}")
+    
+    return {
+        "status": "recarregado",
+        "pratos": len(dados.df_pratos),
+        "vinhos": len(dados.df_vinhos)
     }
 
 if __name__ == "__main__":
     import uvicorn
+    
+    # Number of uvicorn worker processes (each one memory-maps the same catalog snapshot)
+    API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+    
     print("\n" + "="*80)
     print("🍷 Wine Recommendation API")
     print("="*80)
-    print(f"📊 Loaded {len(df_pratos)} dishes and {len(df_vinhos)} wines")
+    if API_WORKERS > 1:
+        # Build the snapshot once here so the workers share its pages instead of each parsing the CSVs
+        manifesto = catalogo.garantir_snapshot()
+        quantidades = manifesto["quantidade_textos"]
+        print(f"📦 Catalog snapshot: {catalogo.diretorio_snapshot}")
+        print(f"📊 {quantidades['df_pratos.nome_prato']} dishes and {quantidades['df_vinhos.vinho']} wines, shared by {API_WORKERS} workers")
+    else:
+        print(f"📊 Loaded {len(catalogo.df_pratos)} dishes and {len(catalogo.df_vinhos)} wines")
     print(f"🤖 LLM Status: {'✅ Available' if LLM_AVAILABLE else '⚠️ Not configured'}")
     print("="*80 + "\n")
     
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if API_WORKERS > 1:
+        # Workers import the app by name; run from the project root
+        uvicorn.run("api:app", host="0.0.0.0", port=8000, workers=API_WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
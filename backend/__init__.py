@@ -1,13 +1,28 @@
 """Backend package for wine recommendation system."""
 
-from .llm import configurar_llm, gerar_justificativa_vinho
-from .sistema_recomendacao_vinho import recomendar_vinho, sistema_recomendacao_vinho
+from .llm import JustificationEngine, configurar_llm, gerar_justificativa_vinho, obter_motor_justificativa
+from .motor_recomendacao import RecomendacaoVinho
+from .sistema_recomendacao_vinho import (
+    WineCatalog,
+    catalogo_padrao,
+    recomendar_vinho,
+    recomendar_vinho_por_atributos,
+    recomendar_vinhos_lote,
+    sistema_recomendacao_vinho,
+)
 from .sistema_integrado import sistema_completo_com_justificativa
 
 __all__ = [
+    'JustificationEngine',
     'configurar_llm',
     'gerar_justificativa_vinho',
+    'obter_motor_justificativa',
+    'RecomendacaoVinho',
+    'WineCatalog',
+    'catalogo_padrao',
     'recomendar_vinho',
+    'recomendar_vinho_por_atributos',
+    'recomendar_vinhos_lote',
     'sistema_recomendacao_vinho',
     'sistema_completo_com_justificativa',
 ]
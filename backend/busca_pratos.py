@@ -0,0 +1,262 @@
+"""
+Índice de Busca de Pratos
+Normaliza nomes e ingredientes uma única vez para que a busca por nome exato,
+nome parcial ou ingrediente não precise varrer a base a cada requisição
+"""
+
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Tamanho máximo dos n-gramas indexados para a busca por nome parcial
+TAMANHO_NGRAMA = 3
+
+# Linhas verificadas no primeiro bloco ao cruzar listas invertidas (o bloco dobra a cada passo)
+TAMANHO_BLOCO_INTERSECAO = 256
+
+# Expansões de palavras de ingredientes mantidas em memória
+MAX_EXPANSOES_CACHE = 4096
+
+_SEPARADORES_TOKENS = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar_texto(texto) -> str:
+    """Remove acentos, converte para minúsculas e colapsa espaços."""
+    if not isinstance(texto, str):
+        return ""
+    sem_acentos = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in sem_acentos if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().split())
+
+
+def tokenizar(texto_normalizado: str) -> list:
+    """Divide um texto já normalizado em palavras."""
+    return [t for t in _SEPARADORES_TOKENS.split(texto_normalizado) if t]
+
+
+def _ngramas(texto: str, n: int) -> set:
+    return {texto[i:i + n] for i in range(len(texto) - n + 1)}
+
+
+def _contar_repeticoes(ngramas: list) -> set:
+    """Chaves "<n-grama><k>" para cada n-grama que aparece k >= 2 vezes na lista."""
+    if len(set(ngramas)) == len(ngramas):
+        return set()
+    return {f"{ngrama}{k}" for ngrama, vezes in Counter(ngramas).items() for k in range(2, vezes + 1)}
+
+
+def _ngramas_repetidos(texto: str) -> set:
+    """
+    Chaves de repetição dos n-gramas de TAMANHO_NGRAMA caracteres do texto.
+
+    Um nome só contém a consulta se tiver cada n-grama dela pelo menos tantas vezes
+    quanto a consulta; sem essas chaves, consultas com palavras repetidas ("de de de")
+    casam com quase todo o catálogo no filtro e cada candidato precisa ser verificado.
+    As chaves têm mais de TAMANHO_NGRAMA caracteres, então não colidem com os n-gramas.
+    """
+    return _contar_repeticoes([texto[i:i + TAMANHO_NGRAMA] for i in range(len(texto) - TAMANHO_NGRAMA + 1)])
+
+
+def _chaves_nome(nome: str) -> set:
+    """N-gramas de 1 a TAMANHO_NGRAMA caracteres do nome, mais as chaves de repetição."""
+    maiores = [nome[i:i + TAMANHO_NGRAMA] for i in range(len(nome) - TAMANHO_NGRAMA + 1)]
+    chaves = set(maiores).union(*(_ngramas(nome, n) for n in range(1, TAMANHO_NGRAMA)))
+    return chaves | _contar_repeticoes(maiores)
+
+
+def _listas_invertidas(chaves_por_linha) -> dict:
+    """Converte {linha: chaves} em {chave: array ordenado de linhas}."""
+    linhas_por_chave = defaultdict(list)
+    for linha, chaves in enumerate(chaves_por_linha):
+        for chave in chaves:
+            linhas_por_chave[chave].append(linha)
+    return {chave: np.asarray(linhas, dtype=np.int32) for chave, linhas in linhas_por_chave.items()}
+
+
+def _empacotar_listas(indice: dict):
+    """Converte {chave: linhas} em (chaves, linhas concatenadas, limites) para gravação."""
+    chaves = list(indice)
+    tamanhos = np.fromiter((len(indice[c]) for c in chaves), dtype=np.int64, count=len(chaves))
+    limites = np.zeros(len(chaves) + 1, dtype=np.int64)
+    np.cumsum(tamanhos, out=limites[1:])
+    linhas = np.concatenate([indice[c] for c in chaves]) if chaves else np.empty(0, dtype=np.int32)
+    return chaves, linhas.astype(np.int32, copy=False), limites
+
+
+def _desempacotar_listas(chaves, linhas: np.ndarray, limites: np.ndarray) -> dict:
+    """Inverso de _empacotar_listas; as listas são fatias (sem cópia) de linhas."""
+    limites = limites.tolist()
+    return {chave: linhas[limites[i]:limites[i + 1]] for i, chave in enumerate(chaves)}
+
+
+class DishSearchIndex:
+    """
+    Índices pré-construídos sobre nome_prato e ingredientes.
+
+    - nomes exatos: mapa hash de nome normalizado para a primeira linha
+    - nomes parciais: n-gramas (1 a 3 caracteres) e n-gramas repetidos para listas
+      ordenadas de linhas
+    - ingredientes: índice invertido de palavras para listas ordenadas de linhas;
+      cada palavra da consulta é expandida para as palavras do vocabulário que a
+      contêm, preservando a semântica de substring (ex.: "ovo" encontra "ovos")
+
+    Todas as buscas retornam a primeira linha (ordem do catálogo) que satisfaz a
+    consulta, como o filtro original seguido de iloc[0].
+    """
+
+    def __init__(self, nomes_pratos, ingredientes):
+        self._definir_textos(
+            [normalizar_texto(nome) for nome in nomes_pratos],
+            [normalizar_texto(ing) for ing in ingredientes]
+        )
+        self.indice_ngramas = _listas_invertidas(_chaves_nome(nome) for nome in self.nomes_normalizados)
+        self.indice_ingredientes = _listas_invertidas(
+            set(tokenizar(ing)) for ing in self.ingredientes_normalizados
+        )
+        self.vocabulario_ingredientes = list(self.indice_ingredientes)
+        # O mesmo índice é consultado por várias threads (executor da API, lotes)
+        self._cache_expansoes = {}
+        self._cache_lock = threading.Lock()
+
+    def _definir_textos(self, nomes_normalizados, ingredientes_normalizados):
+        self.nomes_normalizados = nomes_normalizados
+        self.ingredientes_normalizados = ingredientes_normalizados
+
+        # Primeira linha de cada nome (a última gravada ao percorrer de trás para frente)
+        self.indice_exato = dict(zip(reversed(self.nomes_normalizados), range(len(self.nomes_normalizados) - 1, -1, -1)))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame):
+        """Constrói o índice a partir das colunas nome_prato e ingredientes."""
+        return cls(df['nome_prato'].tolist(), df['ingredientes'].tolist())
+
+    @classmethod
+    def de_snapshot(cls, partes: dict):
+        """Reconstrói o índice a partir das partes geradas por para_snapshot, sem renormalizar textos."""
+        indice = cls.__new__(cls)
+        indice._definir_textos(partes['nomes_normalizados'], partes['ingredientes_normalizados'])
+        indice.indice_ngramas = _desempacotar_listas(
+            partes['ngramas_chaves'], partes['ngramas_linhas'], partes['ngramas_limites']
+        )
+        indice.indice_ingredientes = _desempacotar_listas(
+            partes['ingredientes_chaves'], partes['ingredientes_linhas'], partes['ingredientes_limites']
+        )
+        indice.vocabulario_ingredientes = list(indice.indice_ingredientes)
+        indice._cache_expansoes = {}
+        indice._cache_lock = threading.Lock()
+        return indice
+
+    def para_snapshot(self) -> dict:
+        """Textos normalizados e listas invertidas concatenadas, prontos para gravação."""
+        partes = {
+            'nomes_normalizados': self.nomes_normalizados,
+            'ingredientes_normalizados': self.ingredientes_normalizados
+        }
+        for nome, indice in (('ngramas', self.indice_ngramas), ('ingredientes', self.indice_ingredientes)):
+            chaves, linhas, limites = _empacotar_listas(indice)
+            partes[f'{nome}_chaves'] = chaves
+            partes[f'{nome}_linhas'] = linhas
+            partes[f'{nome}_limites'] = limites
+        return partes
+
+    def __len__(self):
+        return len(self.nomes_normalizados)
+
+    def buscar_nome_exato(self, consulta: str):
+        """Linha do prato cujo nome é igual à consulta (sem acento/caixa), ou None."""
+        return self.indice_exato.get(normalizar_texto(consulta))
+
+    def buscar_nome_parcial(self, consulta: str):
+        """Primeira linha cujo nome contém a consulta, ou None."""
+        consulta = normalizar_texto(consulta)
+        if not consulta:
+            return None
+
+        if len(consulta) <= TAMANHO_NGRAMA:
+            # O próprio n-grama indexado é a resposta exata
+            linhas = self.indice_ngramas.get(consulta)
+            return int(linhas[0]) if linhas is not None else None
+
+        chaves = _ngramas(consulta, TAMANHO_NGRAMA) | _ngramas_repetidos(consulta)
+        candidatos = self._intersecao(self.indice_ngramas, chaves)
+        for linha in candidatos:
+            if consulta in self.nomes_normalizados[linha]:
+                return linha
+        return None
+
+    def buscar_ingrediente(self, consulta: str):
+        """Primeira linha cujos ingredientes contêm todas as palavras da consulta, ou None."""
+        consulta = normalizar_texto(consulta)
+        tokens = set(tokenizar(consulta))
+        if not tokens:
+            return None
+
+        listas = {token: self._expandir_token(token) for token in tokens}
+        candidatos = self._intersecao(listas, tokens)
+        for linha in candidatos:
+            if consulta in self.ingredientes_normalizados[linha]:
+                return linha
+        return None
+
+    def buscar(self, consulta: str):
+        """Nome exato, depois nome parcial, depois ingredientes. Retorna a linha ou None."""
+        for busca in (self.buscar_nome_exato, self.buscar_nome_parcial, self.buscar_ingrediente):
+            linha = busca(consulta)
+            if linha is not None:
+                return linha
+        return None
+
+    def _expandir_token(self, token: str):
+        """Linhas cujos ingredientes têm alguma palavra contendo o token (None se nenhuma)."""
+        with self._cache_lock:
+            if token in self._cache_expansoes:
+                return self._cache_expansoes[token]
+
+        listas = [self.indice_ingredientes[p] for p in self.vocabulario_ingredientes if token in p]
+        if not listas:
+            linhas = None
+        elif len(listas) == 1:
+            linhas = listas[0]
+        else:
+            linhas = np.unique(np.concatenate(listas))
+
+        # A expansão é calculada fora do lock; duas threads com o mesmo token só repetem o trabalho
+        with self._cache_lock:
+            if token not in self._cache_expansoes and len(self._cache_expansoes) >= MAX_EXPANSOES_CACHE:
+                self._cache_expansoes.pop(next(iter(self._cache_expansoes)))
+            self._cache_expansoes[token] = linhas
+        return linhas
+
+    @staticmethod
+    def _intersecao(indice: dict, chaves):
+        """
+        Gera, em ordem crescente, as linhas presentes nas listas de todas as chaves.
+
+        Percorre a menor lista em blocos e testa a presença nas demais por busca
+        binária (da menor para a maior, só para as linhas que ainda restam), parando
+        assim que o chamador encontrar o primeiro resultado.
+        """
+        listas = []
+        for chave in chaves:
+            linhas = indice.get(chave)
+            if linhas is None:
+                return
+            listas.append(linhas)
+
+        listas.sort(key=len)
+        menor, demais = listas[0], listas[1:]
+        inicio, tamanho = 0, TAMANHO_BLOCO_INTERSECAO
+        while inicio < len(menor):
+            bloco = menor[inicio:inicio + tamanho]
+            for linhas in demais:
+                if not len(bloco):
+                    break
+                posicoes = np.minimum(np.searchsorted(linhas, bloco), len(linhas) - 1)
+                bloco = bloco[linhas[posicoes] == bloco]
+            yield from bloco.tolist()
+            inicio += tamanho
+            tamanho *= 2
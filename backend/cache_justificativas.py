@@ -0,0 +1,174 @@
+"""
+Cache Persistente de Justificativas
+Guarda em SQLite (modo WAL) as justificativas geradas pelo LLM, compartilhadas
+entre os workers do uvicorn e preservadas entre reinícios
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# Configuração via variáveis de ambiente
+CACHE_HABILITADO = os.getenv("JUSTIFICATIVA_CACHE_HABILITADO", "true").lower() == "true"
+CACHE_CAMINHO = os.getenv(
+    "JUSTIFICATIVA_CACHE_CAMINHO",
+    str(Path(__file__).resolve().parent / "cache" / "justificativas.sqlite3")
+)
+CACHE_MAX_ENTRADAS = int(os.getenv("JUSTIFICATIVA_CACHE_MAX_ENTRADAS", "10000"))
+CACHE_TTL_SEGUNDOS = float(os.getenv("JUSTIFICATIVA_CACHE_TTL_SEGUNDOS", str(30 * 24 * 3600)))
+
+# A remoção de entradas antigas roda a cada N inserções
+INTERVALO_EVICCAO = 100
+
+# Um acerto só grava o horário de acesso se o gravado tiver mais de N segundos: acertos
+# são só leitura na maior parte do tempo, e a ordem de remoção fica com essa resolução
+INTERVALO_ATUALIZACAO_ACESSO = 3600.0
+
+
+def chave_justificativa(argumentos: dict, modelo: str) -> str:
+    """Hash SHA-256 das entradas da assinatura e do nome do modelo."""
+    conteudo = json.dumps({"modelo": modelo, "argumentos": argumentos}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+class JustificationCache:
+    """
+    Cache chave → justificativa em um arquivo SQLite local.
+
+    Entradas expiram após ttl_segundos; quando há mais de max_entradas, as menos
+    acessadas recentemente (com resolução de INTERVALO_ATUALIZACAO_ACESSO) são
+    removidas. Os contadores de acertos/falhas são do processo atual.
+    """
+
+    def __init__(self, caminho: str, max_entradas: int = CACHE_MAX_ENTRADAS, ttl_segundos: float = CACHE_TTL_SEGUNDOS):
+        self.caminho = str(caminho)
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self._insercoes = 0
+
+        Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        with self._conexao() as conexao:
+            conexao.execute(
+                """
+                CREATE TABLE IF NOT EXISTS justificativas (
+                    chave TEXT PRIMARY KEY,
+                    modelo TEXT NOT NULL,
+                    texto TEXT NOT NULL,
+                    criado_em REAL NOT NULL,
+                    acessado_em REAL NOT NULL
+                )
+                """
+            )
+            conexao.execute("CREATE INDEX IF NOT EXISTS idx_acessado_em ON justificativas (acessado_em)")
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Uma conexão por thread (conexões SQLite não são compartilháveis entre threads)."""
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5.0)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+        return conexao
+
+    def obter(self, chave: str) -> Optional[str]:
+        """Retorna a justificativa em cache, ou None se ausente ou expirada."""
+        agora = time.time()
+        conexao = self._conexao()
+        linha = conexao.execute(
+            "SELECT texto, acessado_em FROM justificativas WHERE chave = ? AND criado_em >= ?",
+            (chave, agora - self.ttl_segundos)
+        ).fetchone()
+
+        with self._lock:
+            if linha is None:
+                self.falhas += 1
+                return None
+            self.acertos += 1
+
+        texto, acessado_em = linha
+        if agora - acessado_em >= INTERVALO_ATUALIZACAO_ACESSO:
+            with conexao:
+                conexao.execute("UPDATE justificativas SET acessado_em = ? WHERE chave = ?", (agora, chave))
+        return texto
+
+    def guardar(self, chave: str, modelo: str, texto: str) -> None:
+        """Armazena (ou substitui) uma justificativa."""
+        agora = time.time()
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO justificativas (chave, modelo, texto, criado_em, acessado_em) VALUES (?, ?, ?, ?, ?)",
+                (chave, modelo, texto, agora, agora)
+            )
+
+        with self._lock:
+            self._insercoes += 1
+            evictar = self._insercoes % INTERVALO_EVICCAO == 0
+        if evictar:
+            self.evictar()
+
+    def evictar(self) -> int:
+        """Remove entradas expiradas e as excedentes menos acessadas. Retorna quantas foram removidas."""
+        conexao = self._conexao()
+        with conexao:
+            removidas = conexao.execute(
+                "DELETE FROM justificativas WHERE criado_em < ?",
+                (time.time() - self.ttl_segundos,)
+            ).rowcount
+            removidas += conexao.execute(
+                """
+                DELETE FROM justificativas WHERE chave IN (
+                    SELECT chave FROM justificativas ORDER BY acessado_em DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entradas,)
+            ).rowcount
+        return removidas
+
+    def limpar(self) -> None:
+        """Remove todas as entradas."""
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute("DELETE FROM justificativas")
+
+    def __len__(self):
+        return self._conexao().execute("SELECT COUNT(*) FROM justificativas").fetchone()[0]
+
+    def estatisticas(self) -> dict:
+        """Acertos, falhas e taxa de acerto do processo atual, e total de entradas."""
+        with self._lock:
+            acertos, falhas = self.acertos, self.falhas
+        total = acertos + falhas
+        return {
+            "acertos": acertos,
+            "falhas": falhas,
+            "taxa_acerto": acertos / total if total else 0.0,
+            "entradas": len(self)
+        }
+
+
+_cache_padrao = None
+_cache_lock = threading.Lock()
+
+
+def obter_cache_justificativas() -> Optional[JustificationCache]:
+    """Cache compartilhado do processo, criado na primeira chamada (None se desabilitado)."""
+    global _cache_padrao
+    if not CACHE_HABILITADO:
+        return None
+    if _cache_padrao is None:
+        with _cache_lock:
+            if _cache_padrao is None:
+                _cache_padrao = JustificationCache(CACHE_CAMINHO)
+    return _cache_padrao
@@ -0,0 +1,168 @@
+"""
+Gerador de Catálogo Sintético
+Produz pratos.csv e vinhos.csv em escala (10 mil a 1 milhão de linhas) com os mesmos
+vocabulários categóricos do sistema, para testes de desempenho de busca, scoring e memória
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sistema_recomendacao_vinho import (
+    COLUNAS_CARACTERISTICAS,
+    acidez_map,
+    array_caracteristicas,
+    indice_caracteristicas,
+    intensidade_map,
+    tempero_map,
+    tipo_map,
+)
+
+# Base de referência: frequências das categorias e vocabulário de ingredientes
+DIRETORIO_REFERENCIA = Path(__file__).resolve().parent
+
+SEED_PADRAO = 42
+
+# Preparos usados para compor nomes de pratos
+PREPAROS = [
+    'Risoto', 'Assado', 'Grelhado', 'Ensopado', 'Torta', 'Salada', 'Moqueca', 'Espetinho',
+    'Caldo', 'Refogado', 'Gratinado', 'Escondidinho', 'Fritada', 'Carpaccio', 'Ravioli', 'Curry'
+]
+
+# Produtores fictícios usados para compor nomes de vinhos (SKUs)
+PRODUTORES = [
+    'Quinta do Vale', 'Bodega Andina', 'Château Lumière', 'Vinícola Serra Alta', 'Tenuta Rossa',
+    'Domaine des Pins', 'Herdade do Sol', 'Cantina Vecchia', 'Weingut Berg', 'Viña Los Robles'
+]
+ESTILOS = ['Reserva', 'Gran Reserva', 'Clássico', 'Jovem', 'Safra Especial', 'Seleção']
+
+# Limites válidos de cada característica de vinho
+LIMITES_CARACTERISTICAS = {'acidez': (1, 3), 'intensidade': (1, 3), 'docura': (1, 3), 'tanino': (0, 3)}
+
+
+def _pesos(referencia: pd.Series, categorias) -> np.ndarray:
+    """Frequência de cada categoria na base de referência (+1 para que todas apareçam)."""
+    contagens = referencia.value_counts()
+    pesos = np.array([contagens.get(c, 0) + 1 for c in categorias], dtype=np.float64)
+    return pesos / pesos.sum()
+
+
+def _vocabulario_ingredientes(df_referencia: pd.DataFrame) -> list:
+    ingredientes = df_referencia['ingredientes'].str.split(',').explode().str.strip()
+    return sorted(set(ingredientes[ingredientes != '']))
+
+
+def gerar_pratos(n_pratos: int, rng: np.random.Generator, df_referencia: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Gera n_pratos pratos com nomes únicos.
+
+    Tipo, tempero, acidez e intensidade seguem as chaves de tipo_map, tempero_map,
+    acidez_map e intensidade_map, com as frequências da base de referência; os
+    ingredientes são sorteados do vocabulário da base de referência.
+    """
+    if df_referencia is None:
+        df_referencia = pd.read_csv(DIRETORIO_REFERENCIA / 'pratos.csv')
+    vocabulario = np.array(_vocabulario_ingredientes(df_referencia), dtype=object)
+
+    def sortear(coluna, categorias):
+        categorias = list(categorias)
+        indices = rng.choice(len(categorias), size=n_pratos, p=_pesos(df_referencia[coluna], categorias))
+        return np.array(categorias, dtype=object)[indices]
+
+    # 2 a 4 ingredientes por prato (o primeiro também compõe o nome)
+    quantidades = rng.integers(2, 5, size=n_pratos)
+    sorteados = rng.integers(0, len(vocabulario), size=(n_pratos, 4))
+    ingredientes = [
+        ', '.join(dict.fromkeys(vocabulario[linha[:q]]))
+        for linha, q in zip(sorteados, quantidades)
+    ]
+    preparos = rng.integers(0, len(PREPAROS), size=n_pratos)
+    nomes = [
+        f"{PREPAROS[p]} de {vocabulario[linha[0]]} {i + 1}"
+        for i, (p, linha) in enumerate(zip(preparos, sorteados))
+    ]
+
+    return pd.DataFrame({
+        'id_prato': np.arange(1, n_pratos + 1),
+        'nome_prato': nomes,
+        'ingredientes': ingredientes,
+        'tipo_prato': sortear('tipo_prato', tipo_map),
+        'temperos': sortear('temperos', tempero_map),
+        'acidez': sortear('acidez', acidez_map),
+        'intensidade_sabor': sortear('intensidade_sabor', intensidade_map),
+    })
+
+
+def gerar_vinhos(n_vinhos: int, rng: np.random.Generator, df_referencia: pd.DataFrame = None, variacao: float = 0.2) -> pd.DataFrame:
+    """
+    Gera n_vinhos SKUs de vinho a partir das uvas de array_caracteristicas.
+
+    Cada SKU recebe nome único, tipo da uva (base de referência) e as colunas de
+    características já preenchidas; com probabilidade `variacao` cada característica
+    se desloca ±1 dentro dos limites válidos.
+    """
+    if df_referencia is None:
+        df_referencia = pd.read_csv(DIRETORIO_REFERENCIA / 'vinhos.csv')
+    tipo_por_uva = dict(zip(df_referencia['vinho'], df_referencia['tipo_vinho']))
+    uvas = [uva for uva in indice_caracteristicas if uva in tipo_por_uva]
+    caracteristicas_uvas = array_caracteristicas[[indice_caracteristicas[uva] for uva in uvas]]
+
+    indices_uva = rng.integers(0, len(uvas), size=n_vinhos)
+    produtores = rng.integers(0, len(PRODUTORES), size=n_vinhos)
+    estilos = rng.integers(0, len(ESTILOS), size=n_vinhos)
+    safras = rng.integers(2005, 2025, size=n_vinhos)
+
+    df = pd.DataFrame({
+        'vinho': [
+            f"{uvas[u]} {PRODUTORES[p]} {ESTILOS[e]} {s} #{i + 1}"
+            for i, (u, p, e, s) in enumerate(zip(indices_uva, produtores, estilos, safras))
+        ],
+        'tipo_vinho': [tipo_por_uva[uvas[u]] for u in indices_uva],
+        'uva': [uvas[u] for u in indices_uva],
+    })
+
+    for caracteristica, (minimo, maximo) in LIMITES_CARACTERISTICAS.items():
+        base = caracteristicas_uvas[caracteristica][indices_uva].astype(np.int64)
+        deslocamento = np.where(rng.random(n_vinhos) < variacao, rng.choice([-1, 1], size=n_vinhos), 0)
+        df[COLUNAS_CARACTERISTICAS[caracteristica]] = np.clip(base + deslocamento, minimo, maximo)
+
+    return df
+
+
+def gerar_catalogo(diretorio, n_pratos: int, n_vinhos: int, seed: int = SEED_PADRAO, variacao: float = 0.2):
+    """
+    Grava pratos.csv e vinhos.csv sintéticos em diretorio (criado se necessário).
+
+    A mesma seed sempre gera os mesmos arquivos. Retorna o diretório.
+    """
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    gerar_pratos(n_pratos, rng).to_csv(diretorio / 'pratos.csv', index=False)
+    gerar_vinhos(n_vinhos, rng, variacao=variacao).to_csv(diretorio / 'vinhos.csv', index=False)
+    return diretorio
+
+
+# ============================================================================
+# EXEMPLO DE USO
+# ============================================================================
+
+if __name__ == "__main__":
+    # python backend/gerar_catalogo.py <diretório> --pratos 100000 --vinhos 1000 [--seed 42]
+    parser = argparse.ArgumentParser(description="Gera um catálogo sintético de pratos e vinhos")
+    parser.add_argument('diretorio', type=Path)
+    parser.add_argument('--pratos', type=int, default=10_000)
+    parser.add_argument('--vinhos', type=int, default=1_000)
+    parser.add_argument('--seed', type=int, default=SEED_PADRAO)
+    parser.add_argument('--variacao', type=float, default=0.2,
+                        help="probabilidade de cada característica de vinho variar ±1 em relação à uva")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    gerar_catalogo(args.diretorio, args.pratos, args.vinhos, args.seed, args.variacao)
+    print(f"✅ {args.pratos} pratos e {args.vinhos} vinhos gravados em {args.diretorio} "
+          f"em {time.perf_counter() - inicio:.2f}s")
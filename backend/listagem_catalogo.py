@@ -0,0 +1,111 @@
+"""
+Listagem Paginada do Catálogo
+Mantém as colunas de pratos e vinhos como listas Python e as linhas de cada tipo
+como arrays ordenados, para que cada página seja só um fatiamento, sem converter
+o DataFrame a cada requisição
+"""
+
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 1000
+
+
+class CatalogListing:
+    """
+    Paginação por cursor ou deslocamento sobre uma tabela do catálogo.
+
+    O cursor é a linha (na ordem do catálogo) do próximo item: continua válido com
+    ou sem filtro e não exige contar as linhas anteriores. Colunas e índices do
+    filtro são montados na primeira vez em que são usados e reaproveitados depois.
+    """
+
+    def __init__(self, df: pd.DataFrame, coluna_filtro: str):
+        self._df = df
+        self.colunas = [str(c) for c in df.columns]
+        self.coluna_filtro = coluna_filtro
+        self._listas = {}
+        self._linhas_por_valor = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._df)
+
+    def coluna(self, nome: str) -> list:
+        """Valores da coluna como lista Python (nulos como None, prontos para JSON)."""
+        lista = self._listas.get(nome)
+        if lista is None:
+            serie = self._df[nome]
+            if serie.isna().any():
+                serie = serie.astype(object).where(serie.notna(), None)
+            lista = self._listas.setdefault(nome, serie.tolist())
+        return lista
+
+    def linhas_do_valor(self, valor: str) -> np.ndarray:
+        """Linhas (ordenadas) cuja coluna de filtro é igual a valor."""
+        if self._linhas_por_valor is None:
+            with self._lock:
+                if self._linhas_por_valor is None:
+                    codigos, valores = pd.factorize(self._df[self.coluna_filtro], sort=False)
+                    ordem = np.argsort(codigos, kind='stable')
+                    limites = np.searchsorted(codigos[ordem], np.arange(len(valores) + 1))
+                    self._linhas_por_valor = {
+                        str(v): ordem[limites[i]:limites[i + 1]] for i, v in enumerate(valores)
+                    }
+        return self._linhas_por_valor.get(valor, np.empty(0, dtype=np.int64))
+
+    def validar_campos(self, campos) -> list:
+        """Campos pedidos, na ordem; levanta ValueError para colunas inexistentes."""
+        desconhecidos = [c for c in campos if c not in self.colunas]
+        if desconhecidos:
+            raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}. Disponíveis: {', '.join(self.colunas)}")
+        return list(campos)
+
+    def pagina(
+        self,
+        campos,
+        filtro: Optional[str] = None,
+        cursor: Optional[int] = None,
+        offset: Optional[int] = None,
+        limite: int = LIMITE_PADRAO
+    ):
+        """
+        Uma página da listagem.
+
+        Args:
+            campos: Colunas incluídas em cada item
+            filtro: Valor exigido na coluna de filtro (None = sem filtro)
+            cursor: Linha a partir da qual listar (de uma página anterior)
+            offset: Posição inicial dentro da listagem (alternativa ao cursor)
+            limite: Máximo de itens
+
+        Returns:
+            (total de itens da listagem, lista de dicts {campo: valor}, cursor da próxima página ou None)
+        """
+        campos = self.validar_campos(campos)
+        limite = max(1, min(int(limite), LIMITE_MAXIMO))
+
+        if filtro is None:
+            total = len(self)
+            inicio = cursor if cursor is not None else (offset or 0)
+            inicio = min(max(inicio, 0), total)
+            linhas = range(inicio, min(inicio + limite, total))
+            proxima = linhas.stop if linhas.stop < total else None
+        else:
+            todas = self.linhas_do_valor(filtro)
+            total = len(todas)
+            if cursor is not None:
+                posicao = int(np.searchsorted(todas, cursor))
+            else:
+                posicao = min(max(offset or 0, 0), total)
+            linhas = todas[posicao:posicao + limite].tolist()
+            fim = posicao + limite
+            proxima = int(todas[fim]) if fim < total else None
+
+        colunas = [(campo, self.coluna(campo)) for campo in campos]
+        itens = [{campo: valores[linha] for campo, valores in colunas} for linha in linhas]
+        return total, itens, proxima
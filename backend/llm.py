@@ -3,12 +3,18 @@ Sistema de Justificativa de Recomendação de Vinhos usando DSPy
 Gera explicações em português sobre por que um vinho foi recomendado para um prato
 """
 
+import asyncio
 import dspy
 import os
+import sqlite3
 import sys
-from typing import Optional
+import threading
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from typing import AsyncIterator, Optional
 from dotenv import load_dotenv
 
+from cache_justificativas import chave_justificativa, obter_cache_justificativas
+
 # Configurar encoding UTF-8 para Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -16,6 +22,12 @@ if sys.platform == 'win32':
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Provedor do LM: "perplexity" (padrão) ou "local" (LM simulado, ver lm_local.py)
+PROVEDOR_LLM = os.getenv("LLM_PROVEDOR", "perplexity").lower()
+
+# Threads do executor próprio de cada JustificationEngine (usado por gerar_varios)
+THREADS_JUSTIFICATIVA = int(os.getenv("LLM_MAX_CONCURRENCIA", "4"))
+
 
 class WineRecommendationSignature(dspy.Signature):
     """Gera justificativa detalhada em português para recomendação de vinho."""
@@ -98,14 +110,23 @@ class WineJustificationModule(dspy.Module):
         return result
 
 
-def configurar_llm(model: str = "sonar", api_key: Optional[str] = None):
+def criar_lm(model: str = "sonar", api_key: Optional[str] = None, provedor: Optional[str] = None) -> dspy.BaseLM:
     """
-    Configura o modelo de linguagem para o DSPy.
+    Cria o modelo de linguagem, sem alterar a configuração global do DSPy.
     
     Args:
-        model: Nome do modelo (default: perplexity/llama-3.1-sonar-large-128k-online)
+        model: Nome do modelo (default: sonar)
         api_key: Chave da API Perplexity (opcional, usa variável de ambiente se não fornecida)
+        provedor: "perplexity" ou "local" (opcional, usa LLM_PROVEDOR se não fornecido)
     """
+    provedor = (provedor or PROVEDOR_LLM).lower()
+    if provedor == "local":
+        # Importado só aqui: o LM simulado não faz parte do caminho de produção
+        from lm_local import criar_lm_local
+        return criar_lm_local()
+    if provedor != "perplexity":
+        raise ValueError(f"Provedor de LLM desconhecido: {provedor}. Use 'perplexity' ou 'local'.")
+    
     if api_key is None:
         api_key = os.getenv("PERPLEXITY_API_KEY")
     
@@ -115,7 +136,7 @@ def configurar_llm(model: str = "sonar", api_key: Optional[str] = None):
         )
     
     # Perplexity requires specific configuration without structured outputs
-    lm = dspy.LM(
+    return dspy.LM(
         model=model, 
         api_key=api_key, 
         api_base="https://api.perplexity.ai",
@@ -123,11 +144,241 @@ def configurar_llm(model: str = "sonar", api_key: Optional[str] = None):
         max_tokens=2000,
         response_format={"type": "text"}
     )
+
+
+def configurar_llm(model: str = "sonar", api_key: Optional[str] = None, provedor: Optional[str] = None):
+    """
+    Configura o modelo de linguagem para o DSPy e o motor de justificativas do processo.
+    
+    Args:
+        model: Nome do modelo (default: perplexity/llama-3.1-sonar-large-128k-online)
+        api_key: Chave da API Perplexity (opcional, usa variável de ambiente se não fornecida)
+        provedor: "perplexity" ou "local" (opcional, usa LLM_PROVEDOR se não fornecido)
+    """
+    global _motor_padrao
+    
+    lm = criar_lm(model, api_key, provedor)
     dspy.configure(lm=lm)
-    print(f"✅ Modelo {model} configurado com sucesso!")
+    with _motor_lock:
+        _motor_padrao = JustificationEngine(lm)
+    print(f"✅ Modelo {lm.model} configurado com sucesso!")
     return lm
 
 
+def _argumentos_justificativa(nome_prato: str, caracteristicas_prato: dict, vinho_info: dict) -> dict:
+    """Monta os argumentos do WineJustificationModule a partir dos dicionários do prato e do vinho."""
+    return dict(
+        nome_prato=nome_prato,
+        tipo_prato=caracteristicas_prato.get('tipo_prato', ''),
+        temperos=caracteristicas_prato.get('temperos', ''),
+        acidez=caracteristicas_prato.get('acidez', ''),
+        intensidade_sabor=caracteristicas_prato.get('intensidade_sabor', ''),
+        ingredientes=caracteristicas_prato.get('ingredientes', ''),
+        vinho_recomendado=vinho_info.get('vinho', ''),
+        tipo_vinho=vinho_info.get('tipo_vinho', ''),
+        # float(): mesmos argumentos (e chave de cache) para linhas de DataFrame e RecomendacaoVinho
+        similaridade_percentual=float(vinho_info.get('similaridade_percentual', 0)),
+        score_caracteristicas=float(vinho_info.get('score_features', 0)),
+        score_regras=float(vinho_info.get('score_regras', 0))
+    )
+
+
+# Marca o fim do stream na fila entre o produtor e o consumidor de gerar_stream
+_FIM_STREAM = object()
+
+
+class JustificationEngine:
+    """
+    Motor de justificativas de longa duração: um LM configurado e um módulo DSPy,
+    criados uma vez e reutilizados por todas as chamadas.
+    
+    Cada chamada usa dspy.context(lm=...), sem depender da configuração global,
+    então o motor pode ser usado por várias threads ao mesmo tempo.
+    """
+    
+    def __init__(self, lm: dspy.BaseLM):
+        self.lm = lm
+        self.modulo = WineJustificationModule()
+        # Executor de gerar_varios, criado no primeiro uso e reaproveitado entre chamadas
+        self._executor = None
+        self._executor_lock = threading.Lock()
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Executor próprio do motor (THREADS_JUSTIFICATIVA threads)."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=max(1, THREADS_JUSTIFICATIVA), thread_name_prefix="justificativa"
+                    )
+        return self._executor
+    
+    def fechar(self) -> None:
+        """Encerra o executor próprio (as chamadas em andamento terminam normalmente)."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+    
+    @property
+    def modelo(self) -> str:
+        """Nome do modelo (parte da chave do cache)."""
+        return getattr(self.lm, 'model', '') or ''
+    
+    def _ler_cache(self, argumentos: dict):
+        """Retorna (chave, justificativa em cache ou None); chave é None se o cache estiver desabilitado."""
+        cache = obter_cache_justificativas()
+        if cache is None:
+            return None, None
+        chave = chave_justificativa(argumentos, self.modelo)
+        try:
+            return chave, cache.obter(chave)
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache de justificativas indisponível: {e}")
+            return chave, None
+    
+    def _gravar_cache(self, chave: Optional[str], texto: str) -> None:
+        """Guarda a justificativa no cache (falhas do cache não interrompem a recomendação)."""
+        cache = obter_cache_justificativas()
+        if cache is None or chave is None or not texto:
+            return
+        try:
+            cache.guardar(chave, self.modelo, texto)
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache de justificativas indisponível: {e}")
+    
+    def gerar(self, nome_prato: str, caracteristicas_prato: dict, vinho_info: dict) -> str:
+        """Gera (ou lê do cache) a justificativa para um par prato/vinho."""
+        argumentos = _argumentos_justificativa(nome_prato, caracteristicas_prato, vinho_info)
+        
+        # Consultar o cache persistente antes de chamar o LLM
+        chave, justificativa = self._ler_cache(argumentos)
+        if justificativa is not None:
+            return justificativa
+        
+        with dspy.context(lm=self.lm):
+            resultado = self.modulo(**argumentos)
+        
+        self._gravar_cache(chave, resultado.justificativa)
+        return resultado.justificativa
+    
+    def gerar_varios(
+        self,
+        nome_prato: str,
+        caracteristicas_prato: dict,
+        vinhos_info: list,
+        max_concorrencia: int = 3,
+        executor: Optional[Executor] = None
+    ) -> list:
+        """
+        Gera justificativas para vários vinhos do mesmo prato em paralelo.
+        
+        No máximo max_concorrencia chamadas desta lista ficam em execução ao mesmo tempo,
+        então a latência total fica próxima à da chamada mais lenta. As threads vêm de
+        executor (ex.: o pool de LLM da API) ou do executor próprio do motor; nenhum pool
+        é criado por chamada.
+        
+        Returns:
+            Lista na ordem de vinhos_info; cada item é a justificativa (str) ou a exceção
+            levantada ao gerá-la
+        """
+        if not vinhos_info:
+            return []
+        
+        def gerar_um(vinho_info):
+            try:
+                return self.gerar(nome_prato, caracteristicas_prato, vinho_info)
+            except Exception as e:
+                return e
+        
+        executor = executor or self.executor
+        limite = max(1, max_concorrencia)
+        resultados = [None] * len(vinhos_info)
+        pendentes = {}
+        for posicao, vinho_info in enumerate(vinhos_info):
+            if len(pendentes) >= limite:
+                prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    resultados[pendentes.pop(futuro)] = futuro.result()
+            pendentes[executor.submit(gerar_um, vinho_info)] = posicao
+        for futuro in wait(pendentes).done:
+            resultados[pendentes[futuro]] = futuro.result()
+        return resultados
+    
+    async def gerar_stream(self, nome_prato: str, caracteristicas_prato: dict, vinho_info: dict) -> AsyncIterator[str]:
+        """Gera a justificativa em streaming (ver gerar_justificativa_vinho_stream)."""
+        argumentos = _argumentos_justificativa(nome_prato, caracteristicas_prato, vinho_info)
+        
+        # O SQLite bloqueia (até o busy timeout se outro worker estiver gravando): fora do event loop
+        chave, justificativa = await asyncio.to_thread(self._ler_cache, argumentos)
+        if justificativa is not None:
+            yield justificativa
+            return
+        
+        # Os listeners guardam estado do stream, então são criados a cada chamada
+        programa = dspy.streamify(
+            self.modulo,
+            stream_listeners=[dspy.streaming.StreamListener(signature_field_name="justificativa")]
+        )
+        
+        # O stream do DSPy roda em uma única tarefa: o chamador pode consumir este gerador
+        # com asyncio.wait_for (uma tarefa por trecho) sem que dspy.context seja aberto em
+        # um contexto e fechado em outro
+        fila = asyncio.Queue()
+        
+        async def produzir():
+            try:
+                emitiu = False
+                with dspy.context(lm=self.lm):
+                    async for item in programa(**argumentos):
+                        if isinstance(item, dspy.streaming.StreamResponse):
+                            if item.chunk:
+                                emitiu = True
+                                await fila.put(item.chunk)
+                        elif isinstance(item, dspy.Prediction) and not emitiu:
+                            emitiu = True
+                            await fila.put(item.justificativa)
+            except Exception as e:
+                await fila.put(e)
+            finally:
+                await fila.put(_FIM_STREAM)
+        
+        produtor = asyncio.create_task(produzir())
+        trechos = []
+        try:
+            while (item := await fila.get()) is not _FIM_STREAM:
+                if isinstance(item, Exception):
+                    raise item
+                trechos.append(item)
+                yield item
+        finally:
+            produtor.cancel()
+        
+        # Só chega aqui se o stream terminou por completo
+        await asyncio.to_thread(self._gravar_cache, chave, "".join(trechos))
+
+
+_motor_padrao: Optional[JustificationEngine] = None
+_motor_lock = threading.Lock()
+
+
+def obter_motor_justificativa() -> JustificationEngine:
+    """
+    Retorna o motor de justificativas do processo, criando-o na primeira chamada.
+    
+    Usa o LM já configurado no DSPy, se houver; caso contrário cria o LM Perplexity
+    (levanta ValueError se a API key não estiver configurada).
+    """
+    global _motor_padrao
+    if _motor_padrao is None:
+        with _motor_lock:
+            if _motor_padrao is None:
+                lm = dspy.settings.lm or criar_lm()
+                _motor_padrao = JustificationEngine(lm)
+    return _motor_padrao
+
+
 def gerar_justificativa_vinho(
     nome_prato: str,
     caracteristicas_prato: dict,
@@ -144,25 +395,30 @@ def gerar_justificativa_vinho(
     Returns:
         Justificativa em português
     """
-    # Inicializar módulo
-    justifier = WineJustificationModule()
+    return obter_motor_justificativa().gerar(nome_prato, caracteristicas_prato, vinho_info)
+
+
+async def gerar_justificativa_vinho_stream(
+    nome_prato: str,
+    caracteristicas_prato: dict,
+    vinho_info: dict
+) -> AsyncIterator[str]:
+    """
+    Gera a justificativa em streaming, emitindo os trechos do texto à medida que o LLM os produz.
     
-    # Gerar justificativa
-    resultado = justifier(
-        nome_prato=nome_prato,
-        tipo_prato=caracteristicas_prato.get('tipo_prato', ''),
-        temperos=caracteristicas_prato.get('temperos', ''),
-        acidez=caracteristicas_prato.get('acidez', ''),
-        intensidade_sabor=caracteristicas_prato.get('intensidade_sabor', ''),
-        ingredientes=caracteristicas_prato.get('ingredientes', ''),
-        vinho_recomendado=vinho_info.get('vinho', ''),
-        tipo_vinho=vinho_info.get('tipo_vinho', ''),
-        similaridade_percentual=vinho_info.get('similaridade_percentual', 0),
-        score_caracteristicas=vinho_info.get('score_features', 0),
-        score_regras=vinho_info.get('score_regras', 0)
-    )
+    Se a justificativa estiver no cache persistente, ou o provedor não fizer streaming,
+    ela é emitida completa em um único trecho.
     
-    return resultado.justificativa
+    Args:
+        nome_prato: Nome do prato
+        caracteristicas_prato: Dicionário com características do prato
+        vinho_info: Dicionário com informações do vinho recomendado
+        
+    Yields:
+        Trechos da justificativa em português
+    """
+    async for trecho in obter_motor_justificativa().gerar_stream(nome_prato, caracteristicas_prato, vinho_info):
+        yield trecho
 
 
 # ============================================================================
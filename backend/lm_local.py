@@ -0,0 +1,190 @@
+"""
+LM Local Simulado
+Substitui o LLM Perplexity em testes de carga offline: devolve justificativas
+determinísticas em português, com latência, taxa de erro e streaming configuráveis
+"""
+
+import asyncio
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+import anyio
+import dspy
+from litellm import ModelResponse, ModelResponseStream, ServiceUnavailableError
+
+# Configuração via variáveis de ambiente
+LATENCIA_MS = float(os.getenv("LLM_LOCAL_LATENCIA_MS", "800"))
+LATENCIA_SIGMA = float(os.getenv("LLM_LOCAL_LATENCIA_SIGMA", "0.5"))
+TAXA_ERRO = float(os.getenv("LLM_LOCAL_TAXA_ERRO", "0"))
+PALAVRAS_POR_TRECHO = int(os.getenv("LLM_LOCAL_PALAVRAS_POR_TRECHO", "3"))
+SEED = os.getenv("LLM_LOCAL_SEED")
+
+MODELO_LOCAL = "local/justificativa-simulada"
+
+# Campos de entrada como o ChatAdapter do DSPy os formata na mensagem do usuário
+_CAMPO = re.compile(r"\[\[ ## (\w+) ## \]\]\n(.*?)(?=\n\n\[\[ ## |\Z)", re.DOTALL)
+
+_TEMPLATE = (
+    "O {vinho_recomendado} ({tipo_vinho}) acompanha bem o prato {nome_prato}: "
+    "com acidez {acidez} e intensidade {intensidade_sabor}, o prato de {tipo_prato} "
+    "pede um vinho que equilibre {ingredientes} sem encobrir os temperos {temperos}. "
+    "A afinidade de {similaridade_percentual}% reflete tanto as características do vinho "
+    "quanto as regras clássicas de harmonização."
+)
+
+
+def justificativa_simulada(campos: dict) -> str:
+    """Justificativa determinística montada a partir dos campos de entrada da assinatura."""
+    valores = {
+        nome: campos.get(nome, "").strip() or "não informado"
+        for nome in re.findall(r"\{(\w+)\}", _TEMPLATE)
+    }
+    return _TEMPLATE.format(**valores)
+
+
+class LocalLM(dspy.BaseLM):
+    """
+    dspy.BaseLM que simula um provedor (respostas no formato OpenAI, como as do LiteLLM).
+
+    Cada chamada espera uma latência log-normal (mediana latencia_ms, dispersão
+    sigma; sigma=0 torna a latência fixa) e falha com ServiceUnavailableError com
+    probabilidade taxa_erro. Dentro de dspy.streamify, os trechos do texto são
+    enviados ao stream do DSPy e a latência é distribuída entre eles.
+    """
+
+    def __init__(
+        self,
+        latencia_ms: float = LATENCIA_MS,
+        sigma: float = LATENCIA_SIGMA,
+        taxa_erro: float = TAXA_ERRO,
+        palavras_por_trecho: int = PALAVRAS_POR_TRECHO,
+        seed: Optional[int] = None
+    ):
+        # Sem cache: BaseLM não guarda respostas, então cada chamada passa pela simulação
+        super().__init__(model=MODELO_LOCAL, cache=False)
+        self.latencia_ms = latencia_ms
+        self.sigma = sigma
+        self.taxa_erro = taxa_erro
+        self.palavras_por_trecho = max(1, palavras_por_trecho)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sortear(self):
+        """Retorna (latência em segundos, se a chamada deve falhar)."""
+        with self._lock:
+            latencia = self.latencia_ms
+            if self.sigma > 0 and latencia > 0:
+                latencia *= math.exp(self._rng.gauss(0.0, self.sigma))
+            falhar = self._rng.random() < self.taxa_erro
+        return max(0.0, latencia) / 1000, falhar
+
+    def texto(self, prompt: Optional[str], messages: Optional[list]) -> str:
+        """Resposta no formato do ChatAdapter: campo justificativa seguido do marcador de fim."""
+        mensagens = messages or [{"role": "user", "content": prompt or ""}]
+        conteudo = "\n\n".join(
+            m["content"] for m in mensagens if m.get("role") == "user" and isinstance(m.get("content"), str)
+        )
+        campos = dict(_CAMPO.findall(conteudo))
+        return f"[[ ## justificativa ## ]]\n{justificativa_simulada(campos)}\n\n[[ ## completed ## ]]"
+
+    def trechos(self, texto: str) -> list:
+        """Divide o texto em trechos de palavras_por_trecho palavras (preservando os espaços)."""
+        palavras = re.findall(r"\S+\s*", texto)
+        n = self.palavras_por_trecho
+        return ["".join(palavras[i:i + n]) for i in range(0, len(palavras), n)]
+
+    def resposta(self, texto: str) -> ModelResponse:
+        tokens = len(texto.split())
+        return ModelResponse(
+            model=MODELO_LOCAL,
+            choices=[{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": texto}}],
+            usage={"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens}
+        )
+
+    @staticmethod
+    def _erro():
+        return ServiceUnavailableError("Falha simulada do LM local", llm_provider="local", model=MODELO_LOCAL)
+
+    @staticmethod
+    def _stream_dspy():
+        """(stream de envio do dspy.streamify, id do Predict que chamou) ou (None, None) fora de um stream."""
+        stream = dspy.settings.send_stream
+        if stream is None:
+            return None, None
+        chamador = dspy.settings.caller_predict
+        return stream, id(chamador) if chamador is not None else None
+
+    def _trecho(self, trecho: str, id_predict) -> ModelResponseStream:
+        pedaco = ModelResponseStream(model=MODELO_LOCAL, choices=[{"index": 0, "delta": {"content": trecho}}])
+        if id_predict is not None:
+            # Os StreamListener do DSPy identificam o Predict de origem por este atributo
+            pedaco.predict_id = id_predict
+        return pedaco
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        latencia, falhar = self.sortear()
+        texto = self.texto(prompt, messages)
+        stream, id_predict = self._stream_dspy()
+        if stream is None:
+            time.sleep(latencia)
+            if falhar:
+                raise self._erro()
+            return self.resposta(texto)
+
+        # Chamado numa thread de trabalho do dspy.streamify: os trechos voltam ao event loop dele
+        trechos = self.trechos(texto)
+        for i, trecho in enumerate(trechos):
+            time.sleep(latencia / len(trechos))
+            # A falha ocorre no meio do stream, como uma conexão interrompida
+            if falhar and i == len(trechos) // 2:
+                raise self._erro()
+            anyio.from_thread.run(stream.send, self._trecho(trecho, id_predict))
+        return self.resposta(texto)
+
+    async def aforward(self, prompt=None, messages=None, **kwargs):
+        latencia, falhar = self.sortear()
+        texto = self.texto(prompt, messages)
+        stream, id_predict = self._stream_dspy()
+        if stream is None:
+            await asyncio.sleep(latencia)
+            if falhar:
+                raise self._erro()
+            return self.resposta(texto)
+
+        trechos = self.trechos(texto)
+        for i, trecho in enumerate(trechos):
+            await asyncio.sleep(latencia / len(trechos))
+            if falhar and i == len(trechos) // 2:
+                raise self._erro()
+            await stream.send(self._trecho(trecho, id_predict))
+        return self.resposta(texto)
+
+
+def criar_lm_local(
+    latencia_ms: float = LATENCIA_MS,
+    sigma: float = LATENCIA_SIGMA,
+    taxa_erro: float = TAXA_ERRO,
+    palavras_por_trecho: int = PALAVRAS_POR_TRECHO,
+    seed: Optional[int] = None
+) -> LocalLM:
+    """
+    Cria o LM local (sem rede e sem API key).
+
+    Não há cache nem novas tentativas: cada chamada passa pela simulação, e a
+    latência e os erros simulados chegam intactos ao chamador.
+
+    Args:
+        latencia_ms: Mediana da latência por chamada (LLM_LOCAL_LATENCIA_MS)
+        sigma: Dispersão log-normal da latência (LLM_LOCAL_LATENCIA_SIGMA; 0 = fixa)
+        taxa_erro: Probabilidade de cada chamada falhar (LLM_LOCAL_TAXA_ERRO)
+        palavras_por_trecho: Palavras por trecho no streaming (LLM_LOCAL_PALAVRAS_POR_TRECHO)
+        seed: Semente dos sorteios de latência e erro (LLM_LOCAL_SEED)
+    """
+    if seed is None and SEED is not None:
+        seed = int(SEED)
+    return LocalLM(latencia_ms, sigma, taxa_erro, palavras_por_trecho, seed)
@@ -0,0 +1,290 @@
+"""
+Métricas no Formato Prometheus
+Contadores, medidores e histogramas em memória (por processo), com exposição no
+formato texto do Prometheus, sem depender do prometheus_client
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from cache_justificativas import obter_cache_justificativas
+
+# Limites (segundos) dos histogramas de latência: de busca em índice (sub-ms) a chamadas ao LLM
+BUCKETS_LATENCIA = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(nomes, valores, extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica:
+    """Base: nome, ajuda, rótulos e valores por combinação de rótulos, protegidos por um lock."""
+
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos=(), funcao: Optional[Callable] = None):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.funcao = funcao
+        # Métricas sem rótulos aparecem com 0 antes da primeira atualização
+        self._valores = {} if self.rotulos else {(): 0}
+        self._lock = threading.Lock()
+
+    def _chave(self, rotulos: dict) -> tuple:
+        if set(rotulos) != set(self.rotulos):
+            raise ValueError(f"{self.nome}: rótulos esperados {self.rotulos}, recebidos {tuple(rotulos)}")
+        return tuple(str(rotulos[nome]) for nome in self.rotulos)
+
+    def amostras(self):
+        """Pares (sufixo e rótulos formatados, valor) para a exposição."""
+        if self.funcao is not None:
+            # funcao() retorna um número ou {tupla de valores dos rótulos: número}
+            valores = self.funcao()
+            valores = valores if isinstance(valores, dict) else {(): valores}
+        else:
+            with self._lock:
+                valores = dict(self._valores)
+        for chave, valor in sorted(valores.items()):
+            yield self.nome + _formatar_rotulos(self.rotulos, chave), valor
+
+    def expor(self) -> str:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        linhas += [f"{nome} {_formatar_numero(valor)}" for nome, valor in self.amostras()]
+        return "\n".join(linhas)
+
+
+class Counter(_Metrica):
+    """Contador monotônico."""
+
+    tipo = "counter"
+
+    def inc(self, quantidade: float = 1, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + quantidade
+
+
+class Gauge(_Metrica):
+    """Valor que sobe e desce (ex.: chamadas em andamento)."""
+
+    tipo = "gauge"
+
+    def inc(self, quantidade: float = 1, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + quantidade
+
+    def dec(self, quantidade: float = 1, **rotulos) -> None:
+        self.inc(-quantidade, **rotulos)
+
+    def set(self, valor: float, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = valor
+
+    @contextmanager
+    def em_andamento(self, **rotulos):
+        """Incrementa enquanto o bloco executa."""
+        self.inc(**rotulos)
+        try:
+            yield
+        finally:
+            self.dec(**rotulos)
+
+
+class Histogram(_Metrica):
+    """Histograma com limites fixos: contagens por faixa, soma e total de observações."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nome, ajuda, rotulos)
+        self._valores = {}
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor: float, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            contagens = self._valores.get(chave)
+            if contagens is None:
+                # Uma posição por limite, mais +Inf, soma e total
+                contagens = self._valores[chave] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            contagens[indice] += 1
+            contagens[-2] += valor
+            contagens[-1] += 1
+
+    def amostras(self):
+        with self._lock:
+            valores = {chave: list(contagens) for chave, contagens in self._valores.items()}
+        limites = self.buckets + (float("inf"),)
+        for chave, contagens in sorted(valores.items()):
+            acumulado = 0
+            for limite, contagem in zip(limites, contagens):
+                acumulado += contagem
+                le = f'le="{_formatar_numero(limite)}"'
+                yield f"{self.nome}_bucket" + _formatar_rotulos(self.rotulos, chave, le), acumulado
+            yield f"{self.nome}_sum" + _formatar_rotulos(self.rotulos, chave), contagens[-2]
+            yield f"{self.nome}_count" + _formatar_rotulos(self.rotulos, chave), contagens[-1]
+
+
+class MetricsRegistry:
+    """Conjunto de métricas de um processo, exposto em um único texto."""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, metrica: _Metrica) -> _Metrica:
+        with self._lock:
+            if metrica.nome in self._metricas:
+                raise ValueError(f"Métrica já registrada: {metrica.nome}")
+            self._metricas[metrica.nome] = metrica
+        return metrica
+
+    def counter(self, nome: str, ajuda: str, rotulos=(), funcao: Optional[Callable] = None) -> Counter:
+        return self.registrar(Counter(nome, ajuda, rotulos, funcao))
+
+    def gauge(self, nome: str, ajuda: str, rotulos=(), funcao: Optional[Callable] = None) -> Gauge:
+        return self.registrar(Gauge(nome, ajuda, rotulos, funcao))
+
+    def histogram(self, nome: str, ajuda: str, rotulos=(), buckets=BUCKETS_LATENCIA) -> Histogram:
+        return self.registrar(Histogram(nome, ajuda, rotulos, buckets))
+
+    def expor(self) -> str:
+        """Todas as métricas no formato texto do Prometheus."""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        return "\n".join(metrica.expor() for metrica in metricas) + "\n"
+
+
+# ============================================================================
+# MÉTRICAS DA APLICAÇÃO
+# ============================================================================
+
+registro = MetricsRegistry()
+
+requisicoes_total = registro.counter(
+    "vinhos_requisicoes_total", "Requisições HTTP atendidas", ("metodo", "rota", "status")
+)
+requisicao_duracao = registro.histogram(
+    "vinhos_requisicao_duracao_segundos", "Duração das requisições HTTP", ("metodo", "rota")
+)
+etapa_duracao = registro.histogram(
+    "vinhos_etapa_duracao_segundos",
+    "Duração de cada etapa da recomendação (busca, scoring, justificativa)", ("etapa",)
+)
+etapa_erros = registro.counter(
+    "vinhos_etapa_erros_total", "Exceções levantadas em cada etapa da recomendação", ("etapa",)
+)
+llm_em_andamento = registro.gauge(
+    "vinhos_llm_chamadas_em_andamento", "Chamadas ao LLM em execução neste processo"
+)
+llm_fallbacks = registro.counter(
+    "vinhos_llm_fallbacks_total", "Justificativas padrão usadas no lugar do LLM", ("motivo",)
+)
+
+
+def _contador_cache(campo: str):
+    def ler():
+        cache = obter_cache_justificativas()
+        return getattr(cache, campo) if cache is not None else 0
+    return ler
+
+
+cache_acertos = registro.counter(
+    "vinhos_cache_justificativas_acertos_total", "Justificativas servidas pelo cache persistente",
+    funcao=_contador_cache("acertos")
+)
+cache_falhas = registro.counter(
+    "vinhos_cache_justificativas_falhas_total", "Consultas ao cache de justificativas sem resultado",
+    funcao=_contador_cache("falhas")
+)
+
+
+# ============================================================================
+# TEMPOS POR REQUISIÇÃO (SERVER-TIMING)
+# ============================================================================
+
+class RequestTimings:
+    """
+    Durações acumuladas por etapa de uma única requisição, na ordem em que aparecem.
+
+    Enquanto ativo (ver ativar), medir_etapa também soma aqui as etapas executadas
+    no mesmo contexto (código rodando em outras threads não é incluído).
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.duracoes = {}
+
+    def adicionar(self, etapa: str, segundos: float) -> None:
+        self.duracoes[etapa] = self.duracoes.get(etapa, 0.0) + segundos
+
+    @contextmanager
+    def etapa(self, nome: str):
+        """Soma a duração do bloco à etapa nome (sem alimentar os histogramas)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.adicionar(nome, time.perf_counter() - inicio)
+
+    @contextmanager
+    def ativar(self):
+        token = _tempos_requisicao.set(self)
+        try:
+            yield self
+        finally:
+            _tempos_requisicao.reset(token)
+
+    def server_timing(self) -> str:
+        """Valor do cabeçalho Server-Timing (durações em ms), terminando com o total."""
+        duracoes = {**self.duracoes, "total": time.perf_counter() - self.inicio}
+        return ", ".join(f"{etapa};dur={segundos * 1000:.3f}" for etapa, segundos in duracoes.items())
+
+
+_tempos_requisicao: ContextVar[Optional[RequestTimings]] = ContextVar("tempos_requisicao", default=None)
+
+
+@contextmanager
+def medir_etapa(etapa: str):
+    """
+    Observa a duração do bloco em vinhos_etapa_duracao_segundos e conta exceções (não
+    cancelamentos); se houver RequestTimings ativo, soma a duração também a ele.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        etapa_erros.inc(etapa=etapa)
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        etapa_duracao.observar(duracao, etapa=etapa)
+        tempos = _tempos_requisicao.get()
+        if tempos is not None:
+            tempos.adicionar(etapa, duracao)
@@ -0,0 +1,737 @@
+"""
+Motor de Pontuação de Harmonização
+Pré-calcula as matrizes prato × vinho uma única vez para que cada recomendação
+seja apenas uma consulta de linha seguida de seleção dos melhores vinhos
+"""
+
+import itertools
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Pesos do score final: 40% similaridade de características + 60% regras
+PESO_FEATURES = 0.4
+PESO_REGRAS = 0.6
+
+# Score usado quando não existe regra para o par (tipo_prato, tipo_vinho)
+SCORE_REGRA_PADRAO = 0.5
+
+# Vinhos guardados por perfil de prato em DishProfileTable (top_n maiores são calculados na hora)
+TOP_PERFIL = 10
+
+
+def normalizar_linhas(matriz: np.ndarray) -> np.ndarray:
+    """Normaliza cada linha para norma L2 unitária (linhas nulas permanecem nulas)."""
+    matriz = np.asarray(matriz, dtype=np.float64)
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    return np.divide(matriz, normas, out=np.zeros_like(matriz), where=normas > 0)
+
+
+def selecionar_top(scores: np.ndarray, top_n: int) -> np.ndarray:
+    """
+    Índices dos top_n maiores scores, em ordem decrescente; empates mantêm a ordem do catálogo.
+
+    Usa seleção parcial (argpartition, O(V)) e ordena só os candidatos, em vez de
+    ordenar o vetor inteiro. O resultado é idêntico a argsort(-scores, kind='stable')[:top_n].
+    """
+    total = scores.shape[0]
+    top_n = max(0, min(top_n, total))
+    if top_n == 0:
+        return np.empty(0, dtype=np.intp)
+    if top_n == total:
+        return np.argsort(-scores, kind='stable')
+
+    limiar = scores[np.argpartition(-scores, top_n - 1)[:top_n]].min()
+    # Todos os empatados no limiar entram como candidatos, em ordem de catálogo
+    candidatos = np.flatnonzero(scores >= limiar)
+    return candidatos[np.argsort(-scores[candidatos], kind='stable')[:top_n]]
+
+
+def selecionar_top_lote(scores: np.ndarray, top_n: int) -> np.ndarray:
+    """Versão de selecionar_top para uma matriz (uma seleção por linha). Retorna (L × top_n) índices."""
+    linhas, total = scores.shape
+    top_n = max(0, min(top_n, total))
+    if top_n == 0 or top_n == total or linhas == 0:
+        return np.argsort(-scores, axis=1, kind='stable')[:, :top_n]
+
+    candidatos = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+    candidatos.sort(axis=1)
+    scores_candidatos = np.take_along_axis(scores, candidatos, axis=1)
+    ordem = np.take_along_axis(candidatos, np.argsort(-scores_candidatos, axis=1, kind='stable'), axis=1)
+
+    # Linhas com empates além do limiar podem ter deixado de fora um vinho anterior no catálogo
+    limiar = scores_candidatos.min(axis=1, keepdims=True)
+    for i in np.flatnonzero((scores >= limiar).sum(axis=1) > top_n):
+        ordem[i] = selecionar_top(scores[i], top_n)
+    return ordem
+
+
+class RecomendacaoVinho(NamedTuple):
+    """Um vinho recomendado, com os scores em percentual (2 casas decimais)."""
+    vinho: str
+    tipo_vinho: str
+    similaridade_percentual: float
+    score_features: float
+    score_regras: float
+
+
+class HarmonizationRules:
+    """
+    Regras de harmonização compiladas em uma matriz densa (tipo_prato × tipo_vinho).
+
+    Pares sem regra e tipos desconhecidos recebem o score padrão, já gravado na
+    matriz: a consulta é um único gather vetorizado, sem dicionários aninhados.
+    """
+
+    def __init__(self, tipos_prato, tipos_vinho, matriz: np.ndarray, padrao: float = SCORE_REGRA_PADRAO):
+        """
+        Args:
+            tipos_prato: Tipos de prato, na ordem das linhas da matriz
+            tipos_vinho: Tipos de vinho, na ordem das colunas da matriz
+            matriz: Scores (T_prato × T_vinho), já com o padrão nos pares sem regra
+            padrao: Score para tipos fora da tabela
+        """
+        self.tipos_prato = list(tipos_prato)
+        self.tipos_vinho = list(tipos_vinho)
+        self.indice_prato = {tipo: i for i, tipo in enumerate(self.tipos_prato)}
+        self.indice_vinho = {tipo: j for j, tipo in enumerate(self.tipos_vinho)}
+        self.padrao = float(padrao)
+
+        # Linha e coluna extras (última posição) com o padrão, para tipos desconhecidos (código -1)
+        self.matriz = np.full((len(self.tipos_prato) + 1, len(self.tipos_vinho) + 1), self.padrao)
+        self.matriz[:-1, :-1] = np.asarray(matriz, dtype=np.float64).reshape(len(self.tipos_prato), len(self.tipos_vinho))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, padrao: float = SCORE_REGRA_PADRAO):
+        """Regras a partir de um DataFrame em formato longo (tipo_prato, tipo_vinho, score)."""
+        tipos_prato = pd.unique(df['tipo_prato']).tolist()
+        tipos_vinho = pd.unique(df['tipo_vinho']).tolist()
+        matriz = np.full((len(tipos_prato), len(tipos_vinho)), float(padrao))
+        linhas = pd.Index(tipos_prato).get_indexer(df['tipo_prato'])
+        colunas = pd.Index(tipos_vinho).get_indexer(df['tipo_vinho'])
+        # Em pares repetidos vale a última linha do arquivo
+        matriz[linhas, colunas] = df['score'].to_numpy(dtype=np.float64)
+        return cls(tipos_prato, tipos_vinho, matriz, padrao)
+
+    @classmethod
+    def from_csv(cls, caminho, padrao: float = SCORE_REGRA_PADRAO):
+        """Carrega as regras de um CSV com as colunas tipo_prato, tipo_vinho e score."""
+        return cls.from_dataframe(pd.read_csv(caminho), padrao)
+
+    @classmethod
+    def from_dict(cls, regras: dict, padrao: float = SCORE_REGRA_PADRAO):
+        """Regras a partir de um dicionário {tipo_prato: {tipo_vinho: score}}."""
+        linhas = [(tp, tv, score) for tp, scores in regras.items() for tv, score in scores.items()]
+        return cls.from_dataframe(pd.DataFrame(linhas, columns=['tipo_prato', 'tipo_vinho', 'score']), padrao)
+
+    def para_dict(self) -> dict:
+        """Regras como {tipo_prato: {tipo_vinho: score}} (inclui os pares com o padrão)."""
+        return {
+            tp: {tv: float(self.matriz[i, j]) for j, tv in enumerate(self.tipos_vinho)}
+            for i, tp in enumerate(self.tipos_prato)
+        }
+
+    def codificar_pratos(self, tipos_prato) -> np.ndarray:
+        """Código da linha de cada tipo de prato (-1 se desconhecido)."""
+        return np.fromiter((self.indice_prato.get(t, -1) for t in tipos_prato), dtype=np.intp, count=len(tipos_prato))
+
+    def codificar_vinhos(self, tipos_vinho) -> np.ndarray:
+        """Código da coluna de cada tipo de vinho (-1 se desconhecido)."""
+        return np.fromiter((self.indice_vinho.get(t, -1) for t in tipos_vinho), dtype=np.intp, count=len(tipos_vinho))
+
+    def tabela(self, tipos_prato, tipos_vinho) -> np.ndarray:
+        """Matriz (len(tipos_prato) × len(tipos_vinho)) de scores por gather na tabela densa."""
+        return self.matriz[np.ix_(self.codificar_pratos(tipos_prato), self.codificar_vinhos(tipos_vinho))]
+
+    def score(self, tipo_prato: str, tipo_vinho: str) -> float:
+        """Score de um único par."""
+        return float(self.matriz[self.indice_prato.get(tipo_prato, -1), self.indice_vinho.get(tipo_vinho, -1)])
+
+
+class EncodedDishStore:
+    """
+    Atributos dos pratos codificados uma única vez em arrays compactos (int8),
+    com índices por nome e por id_prato.
+
+    Códigos 0 indicam um valor categórico desconhecido.
+    """
+
+    def __init__(
+        self,
+        tipo_prato_num: np.ndarray,
+        temperos_num: np.ndarray,
+        acidez_num: np.ndarray,
+        intensidade_num: np.ndarray,
+        tipo_prato_cat: np.ndarray,
+        categorias_tipo_prato,
+        nomes_pratos,
+        ids_pratos=None
+    ):
+        self.tipo_prato_num = np.asarray(tipo_prato_num, dtype=np.int8)
+        self.temperos_num = np.asarray(temperos_num, dtype=np.int8)
+        self.acidez_num = np.asarray(acidez_num, dtype=np.int8)
+        self.intensidade_num = np.asarray(intensidade_num, dtype=np.int8)
+
+        # Tipo de prato como categoria (peixe e frutos do mar têm o mesmo peso, mas regras diferentes)
+        self.tipo_prato_cat = np.asarray(tipo_prato_cat, dtype=np.int16)
+        self.categorias_tipo_prato = list(categorias_tipo_prato)
+
+        self.nomes_pratos = np.asarray(nomes_pratos, dtype=object)
+
+        # Primeira ocorrência de cada nome/id, como no filtro original por nome
+        # (percorrendo de trás para frente, a primeira ocorrência é a última gravada)
+        posicoes_invertidas = range(len(self.nomes_pratos) - 1, -1, -1)
+        self.indice_nomes = dict(zip(self.nomes_pratos[::-1].tolist(), posicoes_invertidas))
+
+        self.ids_pratos = None if ids_pratos is None else np.asarray(ids_pratos)
+        self.indice_ids = {}
+        if self.ids_pratos is not None:
+            self.indice_ids = dict(zip(self.ids_pratos[::-1].astype(np.int64).tolist(), posicoes_invertidas))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, tipo_map: dict, tempero_map: dict, acidez_map: dict, intensidade_map: dict):
+        """
+        Codifica as colunas categóricas do DataFrame de pratos sem copiá-lo.
+
+        Args:
+            df: DataFrame com nome_prato, tipo_prato, temperos, acidez e intensidade_sabor
+            tipo_map, tempero_map, acidez_map, intensidade_map: Mapeamentos de codificar_pratos
+        """
+        def codificar(coluna, mapa):
+            return df[coluna].map(mapa).fillna(0).to_numpy(dtype=np.int8)
+
+        tipo_prato_cat, categorias = pd.factorize(df['tipo_prato'])
+
+        return cls(
+            codificar('tipo_prato', tipo_map),
+            codificar('temperos', tempero_map),
+            codificar('acidez', acidez_map),
+            codificar('intensidade_sabor', intensidade_map),
+            tipo_prato_cat,
+            categorias,
+            df['nome_prato'].to_numpy(dtype=object),
+            df['id_prato'].to_numpy() if 'id_prato' in df.columns else None
+        )
+
+    @classmethod
+    def de_snapshot(cls, partes: dict):
+        """Reconstrói o índice a partir das partes geradas por para_snapshot (arrays podem ser memmaps)."""
+        return cls(
+            partes['tipo_prato_num'],
+            partes['temperos_num'],
+            partes['acidez_num'],
+            partes['intensidade_num'],
+            partes['tipo_prato_cat'],
+            partes['categorias_tipo_prato'],
+            partes['nomes_pratos'],
+            partes.get('ids_pratos')
+        )
+
+    def para_snapshot(self) -> dict:
+        """Arrays e listas de textos necessários para reconstruir o índice sem o DataFrame."""
+        partes = {
+            'tipo_prato_num': self.tipo_prato_num,
+            'temperos_num': self.temperos_num,
+            'acidez_num': self.acidez_num,
+            'intensidade_num': self.intensidade_num,
+            'tipo_prato_cat': self.tipo_prato_cat,
+            'categorias_tipo_prato': [str(c) for c in self.categorias_tipo_prato],
+            'nomes_pratos': self.nomes_pratos.tolist()
+        }
+        if self.ids_pratos is not None:
+            partes['ids_pratos'] = self.ids_pratos
+        return partes
+
+    def __len__(self):
+        return len(self.nomes_pratos)
+
+    def linha(self, nome_prato: str):
+        """Retorna a linha do prato pelo nome, ou None se ele não existir."""
+        return self.indice_nomes.get(nome_prato)
+
+    def linha_por_id(self, id_prato: int):
+        """Retorna a linha do prato pelo id_prato, ou None se ele não existir."""
+        return self.indice_ids.get(int(id_prato))
+
+    def features(self) -> np.ndarray:
+        """Matriz (P × 3) com o vetor [acidez, intensidade, tipo_prato] de cada prato."""
+        return np.column_stack([self.acidez_num, self.intensidade_num, self.tipo_prato_num])
+
+
+class WineScoringEngine:
+    """
+    Matrizes de similaridade e de regras entre todos os pratos e vinhos.
+
+    Vetor do prato: [acidez, intensidade, tipo_prato]
+    Vetor do vinho: [acidez, intensidade, tanino]
+    """
+
+    def __init__(
+        self,
+        pratos: EncodedDishStore,
+        features_vinhos: np.ndarray,
+        score_regras: np.ndarray,
+        nomes_vinhos,
+        tipos_vinhos
+    ):
+        """
+        Args:
+            pratos: Índice de pratos codificados, na ordem das linhas
+            features_vinhos: Matriz (V × 3) de características dos vinhos
+            score_regras: Matriz (P × V) com o score de regras de cada par
+            nomes_vinhos: Nomes dos vinhos, na ordem das colunas
+            tipos_vinhos: Tipos dos vinhos, na ordem das colunas
+        """
+        self.pratos = pratos
+
+        # Similaridade de cosseno = produto interno entre vetores pré-normalizados
+        self.score_features = normalizar_linhas(pratos.features()) @ normalizar_linhas(features_vinhos).T
+        self.score_regras = np.asarray(score_regras, dtype=np.float64)
+        self.score_final = self.score_features * PESO_FEATURES + self.score_regras * PESO_REGRAS
+
+        self.nomes_pratos = pratos.nomes_pratos
+        self.nomes_vinhos = np.asarray(nomes_vinhos, dtype=object)
+        self.tipos_vinhos = np.asarray(tipos_vinhos, dtype=object)
+
+    @classmethod
+    def construir(cls, pratos: EncodedDishStore, df_vinhos: pd.DataFrame, regras):
+        """
+        Constrói o motor a partir do índice de pratos e do DataFrame de vinhos.
+
+        Args:
+            pratos: Índice de pratos codificados
+            df_vinhos: Vinhos com as colunas acidez_vinho, intensidade_vinho e tanino
+            regras: HarmonizationRules (ou dicionário {tipo_prato: {tipo_vinho: score}})
+        """
+        if not isinstance(regras, HarmonizationRules):
+            regras = HarmonizationRules.from_dict(regras)
+
+        features_vinhos = df_vinhos[['acidez_vinho', 'intensidade_vinho', 'tanino']].to_numpy(dtype=np.float64)
+        tipos_vinhos = df_vinhos['tipo_vinho'].tolist()
+
+        # Uma linha de regras por categoria de prato, replicada para cada prato daquela categoria
+        regras_por_tipo = regras.tabela(pratos.categorias_tipo_prato, tipos_vinhos)
+        score_regras = regras_por_tipo[pratos.tipo_prato_cat]
+
+        return cls(pratos, features_vinhos, score_regras, df_vinhos['vinho'].tolist(), tipos_vinhos)
+
+    @classmethod
+    def de_snapshot(cls, pratos: EncodedDishStore, partes: dict):
+        """
+        Reconstrói o motor com matrizes já calculadas, sem refazer os produtos.
+
+        Args:
+            pratos: Índice de pratos codificados, na ordem das linhas
+            partes: Dicionário gerado por para_snapshot (as matrizes podem ser memmaps)
+        """
+        motor = cls.__new__(cls)
+        motor.pratos = pratos
+        motor.score_features = partes['score_features']
+        motor.score_regras = partes['score_regras']
+        motor.score_final = partes['score_final']
+        motor.nomes_pratos = pratos.nomes_pratos
+        motor.nomes_vinhos = np.asarray(partes['nomes_vinhos'], dtype=object)
+        motor.tipos_vinhos = np.asarray(partes['tipos_vinhos'], dtype=object)
+        return motor
+
+    def para_snapshot(self) -> dict:
+        """Matrizes (P × V) e colunas de vinhos necessárias para reconstruir o motor."""
+        return {
+            'score_features': self.score_features,
+            'score_regras': self.score_regras,
+            'score_final': self.score_final,
+            'nomes_vinhos': [str(v) for v in self.nomes_vinhos],
+            'tipos_vinhos': [str(t) for t in self.tipos_vinhos]
+        }
+
+    def linha_prato(self, nome_prato: str):
+        """Retorna o índice da linha do prato, ou None se ele não existir."""
+        return self.pratos.linha(nome_prato)
+
+    def top_indices(self, linha: int, top_n: int = 5) -> np.ndarray:
+        """
+        Índices (colunas) dos top_n vinhos para a linha de um prato.
+
+        Empates mantêm a ordem do catálogo de vinhos.
+        """
+        return selecionar_top(self.score_final[linha], top_n)
+
+    def _colunas_top(self, linha: int, ordem: np.ndarray) -> dict:
+        return {
+            'vinho': self.nomes_vinhos[ordem],
+            'tipo_vinho': self.tipos_vinhos[ordem],
+            'similaridade_percentual': np.round(self.score_final[linha, ordem] * 100, 2),
+            'score_features': np.round(self.score_features[linha, ordem] * 100, 2),
+            'score_regras': np.round(self.score_regras[linha, ordem] * 100, 2)
+        }
+
+    def top_recomendacoes(self, linha: int, top_n: int = 5) -> list:
+        """Os top_n vinhos para a linha de um prato, como lista de RecomendacaoVinho (sem DataFrame)."""
+        colunas = self._colunas_top(linha, self.top_indices(linha, top_n))
+        return [RecomendacaoVinho._make(valores) for valores in zip(*(c.tolist() for c in colunas.values()))]
+
+    def top_recomendacoes_lote(self, linhas, top_n: int = 5) -> list:
+        """
+        Versão de top_recomendacoes para várias linhas (seleção vetorizada).
+
+        Retorna uma lista de RecomendacaoVinho por linha, na ordem de linhas.
+        """
+        linhas = np.asarray(linhas, dtype=np.intp)
+        ordem = selecionar_top_lote(self.score_final[linhas], top_n)
+        linhas_rep = linhas[:, None]
+        colunas = [
+            self.nomes_vinhos[ordem].tolist(),
+            self.tipos_vinhos[ordem].tolist(),
+            np.round(self.score_final[linhas_rep, ordem] * 100, 2).tolist(),
+            np.round(self.score_features[linhas_rep, ordem] * 100, 2).tolist(),
+            np.round(self.score_regras[linhas_rep, ordem] * 100, 2).tolist()
+        ]
+        return [
+            [RecomendacaoVinho._make(valores) for valores in zip(*(coluna[i] for coluna in colunas))]
+            for i in range(len(linhas))
+        ]
+
+    def top_vinhos(self, linha: int, top_n: int = 5) -> pd.DataFrame:
+        """
+        Seleciona os top_n vinhos para a linha de um prato, como DataFrame indexado pela
+        posição do vinho no catálogo.
+
+        Empates mantêm a ordem do catálogo de vinhos.
+        """
+        ordem = self.top_indices(linha, top_n)
+        return pd.DataFrame(self._colunas_top(linha, ordem), index=ordem)
+
+    def top_vinhos_lote(self, linhas, top_n: int = 5) -> pd.DataFrame:
+        """
+        Seleciona os top_n vinhos para várias linhas de pratos de uma só vez.
+
+        Retorna um DataFrame em formato longo, com uma linha por (prato, posição).
+        """
+        linhas = np.asarray(linhas, dtype=np.intp)
+        top_n = max(0, min(top_n, self.score_final.shape[1]))
+
+        scores = self.score_final[linhas]
+        ordem = selecionar_top_lote(scores, top_n)
+        linhas_rep = np.repeat(linhas, top_n)
+        colunas = ordem.ravel()
+
+        return pd.DataFrame({
+            'nome_prato': self.nomes_pratos[linhas_rep],
+            'posicao': np.tile(np.arange(1, top_n + 1), len(linhas)),
+            'vinho': self.nomes_vinhos[colunas],
+            'tipo_vinho': self.tipos_vinhos[colunas],
+            'similaridade_percentual': np.round(np.take_along_axis(scores, ordem, axis=1).ravel() * 100, 2),
+            'score_features': np.round(self.score_features[linhas_rep, colunas] * 100, 2),
+            'score_regras': np.round(self.score_regras[linhas_rep, colunas] * 100, 2)
+        })
+
+
+class DishProfileTable:
+    """
+    Top vinhos pré-calculados para cada perfil de prato (tipo_prato, acidez, intensidade).
+
+    O score de um prato depende só desses três atributos (temperos não entra no vetor
+    nem nas regras), então os perfis (5 × 3 × 3 com os mapeamentos atuais) cobrem
+    qualquer prato, do catálogo ou não: cada recomendação é uma consulta à tabela.
+    Pedidos com top_n acima de top_perfil calculam a linha do perfil na hora.
+    """
+
+    def __init__(
+        self,
+        features_vinhos: np.ndarray,
+        regras_por_tipo: np.ndarray,
+        nomes_vinhos,
+        tipos_vinhos,
+        tipo_map: dict,
+        acidez_map: dict,
+        intensidade_map: dict,
+        temperos=(),
+        top_perfil: int = TOP_PERFIL
+    ):
+        """
+        Args:
+            features_vinhos: Matriz (V × 3) de características dos vinhos
+            regras_por_tipo: Matriz (len(tipo_map) × V) com o score de regras de cada tipo de prato
+            nomes_vinhos: Nomes dos vinhos, na ordem das colunas
+            tipos_vinhos: Tipos dos vinhos, na ordem das colunas
+            tipo_map, acidez_map, intensidade_map: Valores aceitos e seus códigos (de codificar_pratos)
+            temperos: Temperos aceitos (validados, mas sem efeito no score)
+            top_perfil: Vinhos guardados por perfil
+        """
+        self.tipos_prato = list(tipo_map)
+        self.niveis_acidez = list(acidez_map)
+        self.niveis_intensidade = list(intensidade_map)
+        self.temperos = list(temperos)
+        self._temperos = set(self.temperos)
+
+        self.features_vinhos = normalizar_linhas(features_vinhos)
+        self.regras_por_tipo = np.asarray(regras_por_tipo, dtype=np.float64)
+        self.nomes_vinhos = np.asarray(nomes_vinhos, dtype=object)
+        self.tipos_vinhos = np.asarray(tipos_vinhos, dtype=object)
+
+        # Perfis na ordem (tipo, acidez, intensidade); vetor [acidez, intensidade, tipo_prato] de cada um
+        tipo, acidez, intensidade = np.indices(
+            (len(self.tipos_prato), len(self.niveis_acidez), len(self.niveis_intensidade))
+        ).reshape(3, -1)
+        self.tipo_perfil = tipo
+        self.vetores = normalizar_linhas(np.column_stack([
+            np.asarray(list(acidez_map.values()), dtype=np.float64)[acidez],
+            np.asarray(list(intensidade_map.values()), dtype=np.float64)[intensidade],
+            np.asarray(list(tipo_map.values()), dtype=np.float64)[tipo]
+        ]))
+
+        # Um tipo de prato por vez, para não materializar a matriz (perfis × V) inteira
+        self.top_perfil = max(0, min(top_perfil, len(self.nomes_vinhos)))
+        self.top = np.empty((len(tipo), self.top_perfil), dtype=np.intp)
+        self.top_final, self.top_features, self.top_regras = (
+            np.empty((len(tipo), self.top_perfil)) for _ in range(3)
+        )
+        for t in range(len(self.tipos_prato)):
+            linhas = np.flatnonzero(tipo == t)
+            score_features, score_regras, score_final = self._scores(linhas)
+            ordem = selecionar_top_lote(score_final, self.top_perfil)
+            self.top[linhas] = ordem
+            self.top_final[linhas] = np.take_along_axis(score_final, ordem, axis=1)
+            self.top_features[linhas] = np.take_along_axis(score_features, ordem, axis=1)
+            self.top_regras[linhas] = np.take_along_axis(np.broadcast_to(score_regras, score_final.shape), ordem, axis=1)
+
+        # Recomendações prontas de cada perfil: a consulta é só um fatiamento de lista
+        self._indice_perfis = {
+            chave: linha for linha, chave in enumerate(itertools.product(
+                self.tipos_prato, self.niveis_acidez, self.niveis_intensidade
+            ))
+        }
+        self._recomendacoes = [
+            self.top_recomendacoes(linha, self.top_perfil, usar_tabela=False) for linha in range(len(self))
+        ]
+
+    @classmethod
+    def construir(cls, df_vinhos: pd.DataFrame, regras, tipo_map: dict, acidez_map: dict, intensidade_map: dict,
+                  tempero_map: dict = None, top_perfil: int = TOP_PERFIL):
+        """
+        Constrói a tabela a partir do DataFrame de vinhos e das regras.
+
+        Args:
+            df_vinhos: Vinhos com as colunas acidez_vinho, intensidade_vinho e tanino
+            regras: HarmonizationRules (ou dicionário {tipo_prato: {tipo_vinho: score}})
+            tipo_map, acidez_map, intensidade_map, tempero_map: Mapeamentos de codificar_pratos
+            top_perfil: Vinhos guardados por perfil
+        """
+        if not isinstance(regras, HarmonizationRules):
+            regras = HarmonizationRules.from_dict(regras)
+
+        tipos_vinhos = df_vinhos['tipo_vinho'].tolist()
+        return cls(
+            df_vinhos[['acidez_vinho', 'intensidade_vinho', 'tanino']].to_numpy(dtype=np.float64),
+            regras.tabela(list(tipo_map), tipos_vinhos),
+            df_vinhos['vinho'].tolist(),
+            tipos_vinhos,
+            tipo_map,
+            acidez_map,
+            intensidade_map,
+            tempero_map or (),
+            top_perfil
+        )
+
+    def __len__(self):
+        return len(self.tipo_perfil)
+
+    def _scores(self, linhas: np.ndarray):
+        """(score_features, score_regras, score_final) dos perfis nas linhas contra todos os vinhos."""
+        score_features = self.vetores[linhas] @ self.features_vinhos.T
+        score_regras = self.regras_por_tipo[self.tipo_perfil[linhas]]
+        return score_features, score_regras, score_features * PESO_FEATURES + score_regras * PESO_REGRAS
+
+    def linha(self, tipo_prato: str, acidez: str, intensidade_sabor: str, temperos: str = None) -> int:
+        """
+        Linha do perfil na tabela.
+
+        Raises:
+            ValueError: Se algum atributo não estiver entre os valores aceitos
+        """
+        erros = [
+            f"{nome} '{valor}' inválido (aceitos: {', '.join(aceitos)})"
+            for nome, valor, aceitos in (
+                ('tipo_prato', tipo_prato, self.tipos_prato),
+                ('acidez', acidez, self.niveis_acidez),
+                ('intensidade_sabor', intensidade_sabor, self.niveis_intensidade)
+            )
+            if valor not in aceitos
+        ]
+        if temperos is not None and self._temperos and temperos not in self._temperos:
+            erros.append(f"temperos '{temperos}' inválido (aceitos: {', '.join(self.temperos)})")
+        if erros:
+            raise ValueError("; ".join(erros))
+
+        return self._indice_perfis[(tipo_prato, acidez, intensidade_sabor)]
+
+    def _colunas_top(self, linha: int, top_n: int):
+        if top_n <= self.top_perfil:
+            ordem = self.top[linha, :max(top_n, 0)]
+            scores = (self.top_final[linha, :len(ordem)], self.top_features[linha, :len(ordem)],
+                      self.top_regras[linha, :len(ordem)])
+        else:
+            score_features, score_regras, score_final = (s[0] for s in self._scores(np.array([linha])))
+            ordem = selecionar_top(score_final, top_n)
+            scores = (score_final[ordem], score_features[ordem], score_regras[ordem])
+
+        return ordem, {
+            'vinho': self.nomes_vinhos[ordem],
+            'tipo_vinho': self.tipos_vinhos[ordem],
+            'similaridade_percentual': np.round(scores[0] * 100, 2),
+            'score_features': np.round(scores[1] * 100, 2),
+            'score_regras': np.round(scores[2] * 100, 2)
+        }
+
+    def top_recomendacoes(self, linha: int, top_n: int = 5, usar_tabela: bool = True) -> list:
+        """Os top_n vinhos para o perfil, como lista de RecomendacaoVinho."""
+        if usar_tabela and top_n <= self.top_perfil:
+            return self._recomendacoes[linha][:max(top_n, 0)]
+        _, colunas = self._colunas_top(linha, top_n)
+        return [RecomendacaoVinho._make(valores) for valores in zip(*(c.tolist() for c in colunas.values()))]
+
+    def top_vinhos(self, linha: int, top_n: int = 5) -> pd.DataFrame:
+        """Os top_n vinhos para o perfil, como DataFrame indexado pela posição do vinho no catálogo."""
+        ordem, colunas = self._colunas_top(linha, top_n)
+        return pd.DataFrame(colunas, index=ordem)
+
+
+class GroupedWineScoringEngine(WineScoringEngine):
+    """
+    Variante de WineScoringEngine para catálogos muito grandes (ex.: um vinho por SKU).
+
+    Vinhos com o mesmo vetor de características e a mesma coluna de regras têm o mesmo
+    score para qualquer prato; como as características são inteiros pequenos, o catálogo
+    cabe em poucas centenas de grupos (uma grade quantizada). As matrizes ficam (P × G),
+    e cada consulta ordena os grupos e só expande os vinhos dos grupos candidatos:
+    o custo não cresce com o número de vinhos. O resultado (inclusive a ordem dos
+    empates) é o mesmo de WineScoringEngine.
+    """
+
+    def __init__(
+        self,
+        pratos: EncodedDishStore,
+        features_grupos: np.ndarray,
+        score_regras: np.ndarray,
+        grupo_vinho: np.ndarray,
+        nomes_vinhos,
+        tipos_vinhos
+    ):
+        """
+        Args:
+            pratos: Índice de pratos codificados, na ordem das linhas
+            features_grupos: Matriz (G × 3) de características de cada grupo
+            score_regras: Matriz (P × G) com o score de regras de cada par prato × grupo
+            grupo_vinho: Grupo de cada vinho (V,), na ordem do catálogo
+            nomes_vinhos: Nomes dos vinhos, na ordem do catálogo
+            tipos_vinhos: Tipos dos vinhos, na ordem do catálogo
+        """
+        super().__init__(pratos, features_grupos, score_regras, nomes_vinhos, tipos_vinhos)
+        self._indexar_grupos(grupo_vinho)
+
+    def _indexar_grupos(self, grupo_vinho, membros=None, inicio_grupos=None):
+        # Vinhos de cada grupo em ordem de catálogo: membros[inicio_grupos[g]:inicio_grupos[g + 1]]
+        self.grupo_vinho = np.asarray(grupo_vinho)
+        if membros is None:
+            membros = np.argsort(self.grupo_vinho, kind='stable')
+            inicio_grupos = np.searchsorted(self.grupo_vinho[membros], np.arange(self.score_final.shape[1] + 1))
+        self.membros = np.asarray(membros)
+        self.inicio_grupos = np.asarray(inicio_grupos)
+        self.tamanho_grupos = np.diff(self.inicio_grupos)
+
+    @classmethod
+    def construir(cls, pratos: EncodedDishStore, df_vinhos: pd.DataFrame, regras):
+        """Agrupa os vinhos de df_vinhos e constrói o motor (ver WineScoringEngine.construir)."""
+        if not isinstance(regras, HarmonizationRules):
+            regras = HarmonizationRules.from_dict(regras)
+
+        features_vinhos = df_vinhos[['acidez_vinho', 'intensidade_vinho', 'tanino']].to_numpy(dtype=np.float64)
+        tipos_vinhos = df_vinhos['tipo_vinho'].tolist()
+
+        # Chave do grupo: características + coluna de regras (tipos desconhecidos dividem a coluna padrão)
+        chaves = np.column_stack([features_vinhos, regras.codificar_vinhos(tipos_vinhos)])
+        chaves_grupos, grupo_vinho = np.unique(chaves, axis=0, return_inverse=True)
+        grupo_vinho = grupo_vinho.reshape(-1).astype(np.int32)
+
+        regras_por_tipo = regras.matriz[np.ix_(
+            regras.codificar_pratos(pratos.categorias_tipo_prato), chaves_grupos[:, 3].astype(np.intp)
+        )]
+        score_regras = regras_por_tipo[pratos.tipo_prato_cat]
+
+        return cls(pratos, chaves_grupos[:, :3], score_regras, grupo_vinho, df_vinhos['vinho'].tolist(), tipos_vinhos)
+
+    @classmethod
+    def de_snapshot(cls, pratos: EncodedDishStore, partes: dict):
+        """Reconstrói o motor com as matrizes (P × G) e o índice de grupos já calculados."""
+        motor = super().de_snapshot(pratos, partes)
+        motor._indexar_grupos(partes['grupo_vinho'], partes['membros'], partes['inicio_grupos'])
+        return motor
+
+    def para_snapshot(self) -> dict:
+        """Matrizes (P × G), índice de grupos e colunas de vinhos necessárias para reconstruir o motor."""
+        return {
+            **super().para_snapshot(),
+            'grupo_vinho': self.grupo_vinho,
+            'membros': self.membros,
+            'inicio_grupos': self.inicio_grupos
+        }
+
+    def top_indices(self, linha: int, top_n: int = 5) -> np.ndarray:
+        """
+        Índices (posições no catálogo) dos top_n vinhos para a linha de um prato.
+
+        Empates mantêm a ordem do catálogo de vinhos.
+        """
+        top_n = max(0, min(top_n, len(self.grupo_vinho)))
+        if top_n == 0:
+            return np.empty(0, dtype=np.intp)
+
+        scores = self.score_final[linha]
+        ordem_grupos = np.argsort(-scores, kind='stable')
+        # Grupos até completar top_n vinhos, mais todos os empatados com o último deles
+        ultimo = int(np.searchsorted(np.cumsum(self.tamanho_grupos[ordem_grupos]), top_n))
+        limiar = scores[ordem_grupos[ultimo]]
+        grupos = ordem_grupos[scores[ordem_grupos] >= limiar]
+
+        # Basta os top_n primeiros vinhos (em ordem de catálogo) de cada grupo candidato
+        candidatos = np.concatenate([
+            self.membros[inicio:inicio + min(tamanho, top_n)]
+            for inicio, tamanho in zip(self.inicio_grupos[grupos].tolist(), self.tamanho_grupos[grupos].tolist())
+        ])
+        ordem = np.lexsort((candidatos, -scores[self.grupo_vinho[candidatos]]))[:top_n]
+        return candidatos[ordem].astype(np.intp)
+
+    def _colunas_top(self, linha: int, ordem: np.ndarray) -> dict:
+        grupos = self.grupo_vinho[ordem]
+        return {
+            'vinho': self.nomes_vinhos[ordem],
+            'tipo_vinho': self.tipos_vinhos[ordem],
+            'similaridade_percentual': np.round(self.score_final[linha, grupos] * 100, 2),
+            'score_features': np.round(self.score_features[linha, grupos] * 100, 2),
+            'score_regras': np.round(self.score_regras[linha, grupos] * 100, 2)
+        }
+
+    def top_recomendacoes_lote(self, linhas, top_n: int = 5) -> list:
+        """Versão de top_recomendacoes para várias linhas (uma consulta aos grupos por linha)."""
+        return [self.top_recomendacoes(linha, top_n) for linha in np.asarray(linhas, dtype=np.intp).tolist()]
+
+    def top_vinhos_lote(self, linhas, top_n: int = 5) -> pd.DataFrame:
+        """Ver WineScoringEngine.top_vinhos_lote."""
+        linhas = np.asarray(linhas, dtype=np.intp)
+        top_n = max(0, min(top_n, len(self.grupo_vinho)))
+
+        ordem = np.array([self.top_indices(linha, top_n) for linha in linhas.tolist()], dtype=np.intp).reshape(len(linhas), top_n)
+        linhas_rep = np.repeat(linhas, top_n)
+        colunas = ordem.ravel()
+        grupos = self.grupo_vinho[colunas]
+
+        return pd.DataFrame({
+            'nome_prato': self.nomes_pratos[linhas_rep],
+            'posicao': np.tile(np.arange(1, top_n + 1), len(linhas)),
+            'vinho': self.nomes_vinhos[colunas],
+            'tipo_vinho': self.tipos_vinhos[colunas],
+            'similaridade_percentual': np.round(self.score_final[linhas_rep, grupos] * 100, 2),
+            'score_features': np.round(self.score_features[linhas_rep, grupos] * 100, 2),
+            'score_regras': np.round(self.score_regras[linhas_rep, grupos] * 100, 2)
+        })
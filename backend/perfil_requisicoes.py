@@ -0,0 +1,87 @@
+"""
+Perfil de Requisições sob Demanda
+Captura um cProfile de uma única requisição e grava o resultado (.prof para
+snakeviz/pstats e um resumo em texto) para investigar requisições lentas
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Configuração via variáveis de ambiente (desabilitado por padrão)
+PERFIL_HABILITADO = os.getenv("PERFIL_HABILITADO", "false").lower() == "true"
+PERFIL_DIRETORIO = os.getenv(
+    "PERFIL_DIRETORIO",
+    str(Path(__file__).resolve().parent / "perfis")
+)
+
+# Funções listadas no resumo em texto (ordenadas por tempo acumulado)
+LINHAS_RESUMO = 40
+
+# cProfile só admite um perfil ativo por vez (Python 3.12+ levanta ValueError)
+_perfil_lock = threading.Lock()
+
+
+class ProfileCapture:
+    """
+    Resultado de perfilar: arquivo .prof de destino (ou None se outro perfil estava ativo).
+
+    Os arquivos só são escritos por gravar(), que é bloqueante (pstats ordena e imprime o
+    resumo): em código assíncrono, chame-o fora do event loop ou depois da resposta.
+    """
+
+    def __init__(self):
+        self.arquivo = None
+        self._perfil = None
+        self._base = None
+
+    def gravar(self) -> None:
+        """Grava <base>.prof e o resumo <base>.txt (sem efeito se nada foi capturado)."""
+        if self._perfil is None:
+            return
+        self._base.parent.mkdir(parents=True, exist_ok=True)
+        self._perfil.dump_stats(f"{self._base}.prof")
+
+        resumo = io.StringIO()
+        pstats.Stats(self._perfil, stream=resumo).sort_stats("cumulative").print_stats(LINHAS_RESUMO)
+        Path(f"{self._base}.txt").write_text(resumo.getvalue(), encoding="utf-8")
+        self._perfil = None
+
+
+@contextmanager
+def perfilar(nome: str, diretorio: str = None):
+    """
+    Perfila o bloco com cProfile; captura.gravar() escreve <diretorio>/<timestamp>-<nome>.prof e .txt.
+
+    Só a thread atual é perfilada: em código assíncrono o perfil inclui as outras
+    tarefas que rodarem no event loop durante o bloco, e o trabalho feito em outras
+    threads (ex.: chamadas ao LLM) aparece apenas como espera. Se já houver um perfil
+    ativo, o bloco executa sem perfil e captura.arquivo fica None.
+    """
+    captura = ProfileCapture()
+    if not _perfil_lock.acquire(blocking=False):
+        yield captura
+        return
+
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+        try:
+            yield captura
+        finally:
+            perfil.disable()
+    finally:
+        # Basta que só um perfil esteja ativo: a gravação deste pode ocorrer em paralelo a outro
+        _perfil_lock.release()
+
+    agora = time.time()
+    captura._perfil = perfil
+    captura._base = Path(diretorio or PERFIL_DIRETORIO) / (
+        f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(agora))}-{int(agora * 1000) % 1000:03d}-{os.getpid()}-{nome}"
+    )
+    captura.arquivo = f"{captura._base}.prof"
@@ -5,36 +5,44 @@ Combina o sistema de recomendação com geração de justificativas usando DSPy
 
 import pandas as pd
 import sys
-from sistema_recomendacao_vinho import (
-    recomendar_vinho, 
-    df_pratos, 
-    df_vinhos,
-    sistema_recomendacao_vinho
-)
-from llm import configurar_llm, gerar_justificativa_vinho
+from sistema_recomendacao_vinho import catalogo_padrao
+from llm import obter_motor_justificativa
 
 # Configurar encoding UTF-8 para Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
 
-def sistema_completo_com_justificativa(nome_prato: str, usar_llm: bool = True):
+def sistema_completo_com_justificativa(
+    nome_prato: str,
+    usar_llm: bool = True,
+    justificar_todos: bool = False,
+    max_concorrencia: int = 3,
+    catalogo=None
+):
     """
     Sistema completo que recomenda vinhos e gera justificativas usando LLM.
     
     Args:
         nome_prato: Nome do prato para harmonização
         usar_llm: Se True, gera justificativa com LLM; se False, apenas recomendação
+        justificar_todos: Se True, justifica todos os vinhos do top 3 em paralelo;
+            se False, apenas o primeiro colocado
+        max_concorrencia: Máximo de chamadas simultâneas ao LLM quando justificar_todos=True
+        catalogo: WineCatalog a usar (padrão: catálogo do processo)
     """
+    catalogo = catalogo or catalogo_padrao()
+    df_pratos = catalogo.df_pratos
+    
     print("="*80)
     print("🍷 SISTEMA COMPLETO DE RECOMENDAÇÃO E JUSTIFICATIVA")
     print("="*80)
     print(f"\nPrato selecionado: {nome_prato}")
     
     # Buscar informações do prato
-    prato = df_pratos[df_pratos['nome_prato'] == nome_prato]
+    prato_info = catalogo.prato(nome_prato)
     
-    if prato.empty:
+    if prato_info is None:
         print(f"\n❌ Erro: Prato '{nome_prato}' não encontrado.")
         print("\nPratos disponíveis:")
         for p in df_pratos['nome_prato'].head(10):
@@ -42,8 +50,6 @@ def sistema_completo_com_justificativa(nome_prato: str, usar_llm: bool = True):
         print(f"  ... e mais {len(df_pratos) - 10} pratos")
         return
     
-    prato_info = prato.iloc[0]
-    
     # Mostrar características do prato
     print(f"\nCaracterísticas do prato:")
     print(f"  • Tipo: {prato_info['tipo_prato']}")
@@ -53,7 +59,7 @@ def sistema_completo_com_justificativa(nome_prato: str, usar_llm: bool = True):
     print(f"  • Ingredientes: {prato_info['ingredientes']}")
     
     # Obter recomendações
-    recomendacoes = recomendar_vinho(nome_prato, df_pratos, df_vinhos, top_n=3)
+    recomendacoes = catalogo.recomendar(nome_prato, top_n=3)
     
     print("\n" + "="*80)
     print("🏆 TOP 3 VINHOS RECOMENDADOS")
@@ -66,21 +72,18 @@ def sistema_completo_com_justificativa(nome_prato: str, usar_llm: bool = True):
         print(f"   • Score por características: {vinho['score_features']}%")
         print(f"   • Score por regras de harmonização: {vinho['score_regras']}%")
     
-    # Gerar justificativa para o primeiro colocado usando LLM
+    # Gerar justificativa para o primeiro colocado (ou para todo o pódio) usando LLM
     if usar_llm:
         print("\n" + "="*80)
         print("🤖 JUSTIFICATIVA GERADA POR IA")
         print("="*80)
         
         try:
-            # Configurar LLM se ainda não foi configurado
-            try:
-                configurar_llm()
-            except Exception:
-                pass  # LLM já configurado
+            # Motor de justificativas do processo (LM configurado uma única vez e reutilizado)
+            motor_justificativa = obter_motor_justificativa()
             
-            # Pegar o primeiro vinho recomendado
-            melhor_vinho = recomendacoes.iloc[0]
+            # Vinhos a justificar
+            vinhos_justificar = recomendacoes if justificar_todos else recomendacoes.head(1)
             
             # Preparar dados para a justificativa
             caracteristicas_prato = {
@@ -91,25 +94,36 @@ def sistema_completo_com_justificativa(nome_prato: str, usar_llm: bool = True):
                 'ingredientes': prato_info['ingredientes']
             }
             
-            vinho_info = {
-                'vinho': melhor_vinho['vinho'],
-                'tipo_vinho': melhor_vinho['tipo_vinho'],
-                'similaridade_percentual': melhor_vinho['similaridade_percentual'],
-                'score_features': melhor_vinho['score_features'],
-                'score_regras': melhor_vinho['score_regras']
-            }
+            vinhos_info = [
+                {
+                    'vinho': vinho['vinho'],
+                    'tipo_vinho': vinho['tipo_vinho'],
+                    'similaridade_percentual': vinho['similaridade_percentual'],
+                    'score_features': vinho['score_features'],
+                    'score_regras': vinho['score_regras']
+                }
+                for _, vinho in vinhos_justificar.iterrows()
+            ]
             
-            print(f"\n🔄 Gerando justificativa para: {melhor_vinho['vinho']}...\n")
+            nomes_vinhos = ", ".join(v['vinho'] for v in vinhos_info)
+            print(f"\n🔄 Gerando justificativa para: {nomes_vinhos}...\n")
             
-            # Gerar justificativa
-            justificativa = gerar_justificativa_vinho(
+            # Gerar justificativas (em paralelo quando há mais de um vinho)
+            justificativas = motor_justificativa.gerar_varios(
                 nome_prato=nome_prato,
                 caracteristicas_prato=caracteristicas_prato,
-                vinho_info=vinho_info
+                vinhos_info=vinhos_info,
+                max_concorrencia=max_concorrencia
             )
             
-            print("📝 JUSTIFICATIVA DA HARMONIZAÇÃO:\n")
-            print(justificativa)
+            for posicao, (vinho_info, justificativa) in enumerate(zip(vinhos_info, justificativas), 1):
+                if len(vinhos_info) > 1:
+                    print(f"\n{posicao}º lugar - {vinho_info['vinho']}")
+                if isinstance(justificativa, Exception):
+                    print(f"⚠️  Erro ao gerar justificativa: {justificativa}")
+                    continue
+                print("📝 JUSTIFICATIVA DA HARMONIZAÇÃO:\n")
+                print(justificativa)
             
         except ValueError as e:
             print(f"\n⚠️  Aviso: Não foi possível gerar justificativa com LLM")
@@ -3,22 +3,42 @@ Sistema de Recomendação de Vinhos
 Baseado em similaridade de características e regras de harmonização
 """
 
+import os
+import hashlib
+import json
 import pandas as pd
 import numpy as np
 import sys
-from sklearn.metrics.pairwise import cosine_similarity
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from motor_recomendacao import (
+    DishProfileTable, EncodedDishStore, GroupedWineScoringEngine, HarmonizationRules, WineScoringEngine
+)
+from busca_pratos import DishSearchIndex
+from listagem_catalogo import CatalogListing
+from snapshot_catalogo import carregar_snapshot, ler_manifesto, salvar_snapshot
 
 # Configurar encoding UTF-8 para Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
 # ============================================================================
-# BASES DE DADOS - Carregadas de CSV
+# BASES DE DADOS - Carregadas de CSV sob demanda (ver WineCatalog)
 # ============================================================================
 
-# Carregar dados dos CSVs
-df_pratos = pd.read_csv('pratos.csv')
-df_vinhos = pd.read_csv('vinhos.csv')
+# Diretório padrão dos CSVs (pode ser trocado com a variável CATALOGO_DIR)
+DIRETORIO_DADOS = Path(os.getenv("CATALOGO_DIR", Path(__file__).resolve().parent))
+
+# Diretório do snapshot binário do catálogo (padrão: <diretório dos CSVs>/snapshot)
+DIRETORIO_SNAPSHOT = os.getenv("CATALOGO_SNAPSHOT_DIR")
+
+# Motor de scoring: "denso" (matrizes pratos × vinhos), "grupos" (vinhos agrupados pelas
+# características, para catálogos com muitos SKUs) ou "auto" (grupos quando pratos × vinhos
+# passa de CATALOGO_LIMITE_MATRIZ_DENSA elementos)
+MOTOR_CATALOGO = os.getenv("CATALOGO_MOTOR", "auto")
+LIMITE_MATRIZ_DENSA = int(os.getenv("CATALOGO_LIMITE_MATRIZ_DENSA", "10000000"))
 
 # Características dos vinhos (conhecimento especializado)
 # Mapeamento expandido baseado nos tipos de vinho
@@ -66,16 +86,108 @@ caracteristicas_vinhos = {
     'Sake': {'acidez': 1, 'intensidade': 1, 'docura': 2, 'tanino': 0}
 }
 
+# A tabela acima é só a fonte editável: o código usa o array estruturado compilado a
+# partir dela (uma linha int8 por vinho) e o índice nome → linha
+DTYPE_CARACTERISTICAS = np.dtype([
+    ('acidez', np.int8), ('intensidade', np.int8), ('docura', np.int8), ('tanino', np.int8)
+])
+
+# Coluna do DataFrame de vinhos preenchida por cada campo de DTYPE_CARACTERISTICAS
+COLUNAS_CARACTERISTICAS = {
+    'acidez': 'acidez_vinho', 'intensidade': 'intensidade_vinho', 'docura': 'docura', 'tanino': 'tanino'
+}
+
+def compilar_caracteristicas(tabela):
+    """Array estruturado (int8, uma linha por vinho) e índice {nome: linha} a partir de {vinho: {campo: valor}}"""
+    nomes = list(tabela)
+    array = np.array(
+        [tuple(tabela[nome][campo] for campo in DTYPE_CARACTERISTICAS.names) for nome in nomes],
+        dtype=DTYPE_CARACTERISTICAS
+    )
+    return array, {nome: linha for linha, nome in enumerate(nomes)}
+
+array_caracteristicas, indice_caracteristicas = compilar_caracteristicas(caracteristicas_vinhos)
+_nomes_caracteristicas = pd.Index(list(indice_caracteristicas))
+
+def caracteristicas_dos_vinhos(nomes):
+    """
+    Linhas de array_caracteristicas para cada nome, em uma única consulta vetorizada
+
+    Levanta KeyError com os nomes que não estão em caracteristicas_vinhos.
+    """
+    linhas = _nomes_caracteristicas.get_indexer(nomes)
+    if (linhas < 0).any():
+        desconhecidos = pd.unique(np.asarray(nomes, dtype=object)[linhas < 0])
+        raise KeyError(f"Vinhos sem características cadastradas: {', '.join(map(str, desconhecidos[:10]))}")
+    return array_caracteristicas[linhas]
+
+# Regras de harmonização baseadas no tipo de prato: arquivo CSV em formato longo
+# (tipo_prato, tipo_vinho, score). Pares ausentes recebem SCORE_REGRA_PADRAO (0.5).
+# Um arquivo com o mesmo nome no diretório do catálogo tem precedência sobre este.
+ARQUIVO_REGRAS = 'regras_harmonizacao.csv'
+CAMINHO_REGRAS_PADRAO = Path(__file__).resolve().parent / ARQUIVO_REGRAS
+
+# ============================================================================
+# MAPEAMENTOS DE CODIFICAÇÃO DOS PRATOS
+# ============================================================================
+
+# Mapear tipo de prato
+# Baseado em intensidade de proteína e peso do prato
+tipo_map = {
+    'carne vermelha': 5,    # Proteína mais forte e intensa
+    'carne branca': 3,      # Proteína moderada
+    'frutos do mar': 2,     # Proteína delicada, sabor do mar
+    'peixe': 2,             # Proteína delicada, similar a frutos do mar
+    'vegetariano': 1        # Sem proteína animal, mais leve
+}
+
+# Mapear temperos (expandido)
+tempero_map = {
+    'intenso': 3, 
+    'picante': 3, 
+    'forte': 3,
+    'defumado': 3,
+    'moderado': 2, 
+    'cremoso': 2,
+    'terroso': 2,
+    'salgado': 2,
+    'doce': 2,
+    'herbal': 1,
+    'cítrico': 1,
+    'suave': 1
+}
+
+# Mapear acidez
+acidez_map = {'baixa': 1, 'média': 2, 'alta': 3}
+
+# Mapear intensidade
+intensidade_map = {'baixa': 1, 'média': 2, 'alta': 3}
+
 # ============================================================================
 # PREPARAÇÃO DOS DADOS
 # ============================================================================
 
-# Adicionar características ao dataframe de vinhos
-for col in ['acidez_vinho', 'intensidade_vinho', 'docura', 'tanino']:
-    col_key = col.replace('_vinho', '')
-    df_vinhos[col] = df_vinhos['vinho'].apply(
-        lambda x: caracteristicas_vinhos[x][col_key]
-    )
+def preparar_vinhos(df):
+    """
+    Retorna uma cópia do DataFrame de vinhos com as colunas de características (int8)
+
+    Colunas que já vêm no CSV (ex.: SKUs do catálogo sintético) são mantidas, convertidas
+    para int8 quando os valores cabem; as ausentes são preenchidas a partir de
+    array_caracteristicas pelo nome do vinho.
+    """
+    df_preparado = df.copy()
+
+    ausentes = [campo for campo, coluna in COLUNAS_CARACTERISTICAS.items() if coluna not in df_preparado.columns]
+    caracteristicas = caracteristicas_dos_vinhos(df_preparado['vinho']) if ausentes else None
+
+    for campo, coluna in COLUNAS_CARACTERISTICAS.items():
+        if campo in ausentes:
+            df_preparado[coluna] = caracteristicas[campo]
+        elif pd.api.types.is_integer_dtype(df_preparado[coluna]) and len(df_preparado) and \
+                -128 <= df_preparado[coluna].min() and df_preparado[coluna].max() <= 127:
+            df_preparado[coluna] = df_preparado[coluna].astype(np.int8)
+
+    return df_preparado
 
 # ============================================================================
 # FUNÇÕES DO SISTEMA
@@ -85,38 +197,6 @@ def codificar_pratos(df):
     """Converte atributos categóricos dos pratos em valores numéricos"""
     df_encoded = df.copy()
 
-    # Mapear tipo de prato
-    # Baseado em intensidade de proteína e peso do prato
-    tipo_map = {
-        'carne vermelha': 5,    # Proteína mais forte e intensa
-        'carne branca': 3,      # Proteína moderada
-        'frutos do mar': 2,     # Proteína delicada, sabor do mar
-        'peixe': 2,             # Proteína delicada, similar a frutos do mar
-        'vegetariano': 1        # Sem proteína animal, mais leve
-    }
-
-    # Mapear temperos (expandido)
-    tempero_map = {
-        'intenso': 3, 
-        'picante': 3, 
-        'forte': 3,
-        'defumado': 3,
-        'moderado': 2, 
-        'cremoso': 2,
-        'terroso': 2,
-        'salgado': 2,
-        'doce': 2,
-        'herbal': 1,
-        'cítrico': 1,
-        'suave': 1
-    }
-
-    # Mapear acidez
-    acidez_map = {'baixa': 1, 'média': 2, 'alta': 3}
-
-    # Mapear intensidade
-    intensidade_map = {'baixa': 1, 'média': 2, 'alta': 3}
-
     df_encoded['tipo_prato_num'] = df_encoded['tipo_prato'].map(tipo_map)
     df_encoded['temperos_num'] = df_encoded['temperos'].map(tempero_map)
     df_encoded['acidez_num'] = df_encoded['acidez'].map(acidez_map)
@@ -124,170 +204,576 @@ def codificar_pratos(df):
 
     return df_encoded
 
-def recomendar_vinho(nome_prato, df_pratos, df_vinhos, top_n=5):
+_regras_padrao = None
+
+def regras_padrao():
+    """Regras de CAMINHO_REGRAS_PADRAO, compiladas uma única vez por processo"""
+    global _regras_padrao
+    if _regras_padrao is None:
+        _regras_padrao = HarmonizationRules.from_csv(CAMINHO_REGRAS_PADRAO)
+    return _regras_padrao
+
+def construir_motor(pratos, df_vinhos, regras, tipo_motor=None):
+    """WineScoringEngine ou GroupedWineScoringEngine, conforme tipo_motor (padrão: MOTOR_CATALOGO)"""
+    tipo_motor = tipo_motor or MOTOR_CATALOGO
+    if tipo_motor not in ('auto', 'denso', 'grupos'):
+        raise ValueError(f"Motor de scoring inválido: {tipo_motor!r} (use auto, denso ou grupos)")
+    if tipo_motor == 'auto':
+        tipo_motor = 'grupos' if len(pratos) * len(df_vinhos) > LIMITE_MATRIZ_DENSA else 'denso'
+    classe = GroupedWineScoringEngine if tipo_motor == 'grupos' else WineScoringEngine
+    return classe.construir(pratos, df_vinhos, regras)
+
+def indexar_pratos(df):
+    """Constrói o índice de pratos codificados (arrays compactos por nome/id)"""
+    return EncodedDishStore.from_dataframe(df, tipo_map, tempero_map, acidez_map, intensidade_map)
+
+def impressao_regras():
+    """Hash das tabelas de conhecimento no código usadas na preparação (invalida snapshots antigos)"""
+    tabelas = [caracteristicas_vinhos, tipo_map, tempero_map, acidez_map, intensidade_map]
+    return hashlib.sha256(json.dumps(tabelas, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def hash_arquivo(caminho):
+    """SHA-256 do conteúdo de um arquivo"""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def _colunas_para_snapshot(prefixo, df):
+    """Colunas do DataFrame como partes do snapshot (array para colunas numéricas, texto para o resto)"""
+    return {
+        f"{prefixo}.{coluna}": df[coluna].to_numpy() if pd.api.types.is_numeric_dtype(df[coluna]) else df[coluna].tolist()
+        for coluna in df.columns
+    }
+
+def _colunas_de_snapshot(prefixo, partes, colunas):
+    return pd.DataFrame({coluna: partes[f"{prefixo}.{coluna}"] for coluna in colunas})
+
+class CatalogData:
+    """
+    Bases de pratos e vinhos já preparadas, com os índices e o motor construídos sobre elas.
+
+    Não é alterado depois de construído: numa recarga um novo CatalogData substitui o
+    anterior, então quem guarda a referência tem uma visão consistente da base.
+    """
+
+    def __init__(self, df_pratos, df_vinhos, assinatura=None, pratos=None, busca=None, motor=None, mapeado=False, regras=None,
+                 indexar_busca=True):
+        self.df_pratos = df_pratos
+        self.df_vinhos = df_vinhos
+        self.assinatura = assinatura
+        self.regras = regras if regras is not None else regras_padrao()
+        # True quando matrizes e índices vêm de um snapshot mapeado em memória (páginas
+        # compartilhadas com outros processos que abriram o mesmo snapshot)
+        self.mapeado = mapeado
+        self.pratos = pratos if pratos is not None else indexar_pratos(df_pratos)
+        # Com indexar_busca=False o índice de busca (a parte mais cara da construção) só é
+        # montado na primeira busca: recomendações por nome não dependem dele
+        if busca is None and indexar_busca:
+            busca = DishSearchIndex.from_dataframe(df_pratos)
+        self._busca = busca
+        self._busca_lock = threading.Lock()
+        self.motor = motor if motor is not None else construir_motor(self.pratos, df_vinhos, self.regras)
+        # Listagens paginadas (colunas convertidas sob demanda, uma vez por versão do catálogo)
+        self.listagem_pratos = CatalogListing(df_pratos, 'tipo_prato')
+        self.listagem_vinhos = CatalogListing(df_vinhos, 'tipo_vinho')
+        # Tabela de perfis para pratos avulsos (montada no primeiro uso)
+        self._perfis = None
+        self._perfis_lock = threading.Lock()
+
+    def salvar_snapshot(self, diretorio, metadados=None):
+        """Grava DataFrames, índices e matrizes já calculados em um snapshot binário"""
+        partes = {
+            **_colunas_para_snapshot('df_pratos', self.df_pratos),
+            **_colunas_para_snapshot('df_vinhos', self.df_vinhos),
+            **{f"pratos.{nome}": valor for nome, valor in self.pratos.para_snapshot().items()},
+            **{f"busca.{nome}": valor for nome, valor in self.busca.para_snapshot().items()},
+            **{f"motor.{nome}": valor for nome, valor in self.motor.para_snapshot().items()},
+        }
+        metadados = {
+            'colunas_pratos': [str(c) for c in self.df_pratos.columns],
+            'colunas_vinhos': [str(c) for c in self.df_vinhos.columns],
+            'impressao_regras': impressao_regras(),
+            **(metadados or {})
+        }
+        return salvar_snapshot(diretorio, partes, metadados)
+
+    @classmethod
+    def de_snapshot(cls, diretorio, assinatura=None, manifesto=None, regras=None):
+        """Reconstrói os dados a partir de um snapshot (matrizes e listas mapeadas em memória)"""
+        partes, manifesto = carregar_snapshot(diretorio, manifesto)
+
+        def subpartes(prefixo):
+            return {nome[len(prefixo) + 1:]: valor for nome, valor in partes.items() if nome.startswith(prefixo + '.')}
+
+        pratos = EncodedDishStore.de_snapshot(subpartes('pratos'))
+        partes_motor = subpartes('motor')
+        classe_motor = GroupedWineScoringEngine if 'grupo_vinho' in partes_motor else WineScoringEngine
+        return cls(
+            _colunas_de_snapshot('df_pratos', partes, manifesto['colunas_pratos']),
+            _colunas_de_snapshot('df_vinhos', partes, manifesto['colunas_vinhos']),
+            assinatura,
+            pratos=pratos,
+            busca=DishSearchIndex.de_snapshot(subpartes('busca')),
+            motor=classe_motor.de_snapshot(pratos, partes_motor),
+            mapeado=True,
+            regras=regras
+        )
+
+    def prato(self, nome_prato):
+        """Linha do DataFrame de pratos para o nome, ou None se o prato não existir"""
+        linha = self.pratos.linha(nome_prato)
+        return None if linha is None else self.df_pratos.iloc[linha]
+
+    def buscar_prato(self, consulta):
+        """Busca por nome exato, nome parcial ou ingrediente. Retorna o prato como dict ou None"""
+        linha = self.busca.buscar(consulta)
+        if linha is None:
+            return None
+        # Lido das colunas já convertidas da listagem (muito mais barato que iloc[linha].to_dict())
+        listagem = self.listagem_pratos
+        return {coluna: listagem.coluna(coluna)[linha] for coluna in listagem.colunas}
+
+    @property
+    def busca(self):
+        """DishSearchIndex sobre os pratos desta versão do catálogo"""
+        if self._busca is None:
+            with self._busca_lock:
+                if self._busca is None:
+                    self._busca = DishSearchIndex.from_dataframe(self.df_pratos)
+        return self._busca
+
+    @property
+    def perfis(self):
+        """DishProfileTable sobre os vinhos e regras desta versão do catálogo"""
+        if self._perfis is None:
+            with self._perfis_lock:
+                if self._perfis is None:
+                    self._perfis = DishProfileTable.construir(
+                        self.df_vinhos, self.regras, tipo_map, acidez_map, intensidade_map, tempero_map
+                    )
+        return self._perfis
+
+    def recomendar_por_atributos(self, tipo_prato, acidez, intensidade_sabor, temperos=None, top_n=5, como_dataframe=True):
+        """Ver recomendar_vinho_por_atributos"""
+        linha = self.perfis.linha(tipo_prato, acidez, intensidade_sabor, temperos)
+
+        if not como_dataframe:
+            return self.perfis.top_recomendacoes(linha, top_n)
+        return self.perfis.top_vinhos(linha, top_n)
+
+    def recomendar(self, nome_prato, top_n=5, como_dataframe=True):
+        """Ver recomendar_vinho"""
+        linha = self.motor.linha_prato(nome_prato)
+
+        if linha is None:
+            return f"Prato '{nome_prato}' não encontrado na base de dados."
+
+        if not como_dataframe:
+            return self.motor.top_recomendacoes(linha, top_n)
+        return self.motor.top_vinhos(linha, top_n)
+
+    def recomendar_lote(self, nomes_pratos, top_n=5, como_dataframe=True):
+        """
+        Ver recomendar_vinhos_lote. Com como_dataframe=False retorna uma lista alinhada a
+        nomes_pratos: a lista de RecomendacaoVinho de cada prato, ou None se ele não existir
+        """
+        if not como_dataframe:
+            linhas = [self.motor.linha_prato(nome) for nome in nomes_pratos]
+            encontradas = [linha for linha in linhas if linha is not None]
+            recomendacoes = iter(self.motor.top_recomendacoes_lote(encontradas, top_n) if encontradas else [])
+            return [None if linha is None else next(recomendacoes) for linha in linhas]
+
+        linhas = []
+        nao_encontrados = []
+        for nome in nomes_pratos:
+            linha = self.motor.linha_prato(nome)
+            if linha is None:
+                nao_encontrados.append(nome)
+            else:
+                linhas.append(linha)
+
+        resultados = self.motor.top_vinhos_lote(linhas, top_n)
+        resultados.attrs['pratos_nao_encontrados'] = nao_encontrados
+
+        return resultados
+
+
+class WineCatalog:
+    """
+    Catálogo de pratos e vinhos carregado sob demanda a partir de um diretório.
+
+    Nada é lido na construção: os CSVs são carregados, preparados e indexados uma única
+    vez, no primeiro acesso. Cada catálogo é independente, então é possível manter
+    várias bases no mesmo processo.
+
+    recarregar() reconstrói tudo a partir dos CSVs e troca os dados de uma vez; as
+    requisições em andamento continuam usando o CatalogData que já obtiveram.
+
+    Se existir um snapshot binário (ver gerar_snapshot) gerado a partir dos mesmos
+    CSVs, ele é mapeado em memória no lugar de reprocessar os arquivos.
+
+    As regras de harmonização vêm de regras_harmonizacao.csv no diretório, ou do
+    arquivo padrão do backend se o diretório não tiver um.
+    """
+
+    def __init__(self, diretorio=None, arquivo_pratos='pratos.csv', arquivo_vinhos='vinhos.csv', diretorio_snapshot=None):
+        diretorio = Path(diretorio) if diretorio is not None else DIRETORIO_DADOS
+        self.caminho_pratos = diretorio / arquivo_pratos
+        self.caminho_vinhos = diretorio / arquivo_vinhos
+        self._caminho_regras_local = diretorio / ARQUIVO_REGRAS
+        if diretorio_snapshot is None:
+            diretorio_snapshot = DIRETORIO_SNAPSHOT or diretorio / 'snapshot'
+        self.diretorio_snapshot = Path(diretorio_snapshot)
+        self._dados = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dataframes(cls, df_pratos, df_vinhos):
+        """Catálogo sobre DataFrames já carregados (os vinhos são preparados se necessário; índice de busca sob demanda)"""
+        catalogo = cls()
+        catalogo.caminho_pratos = catalogo.caminho_vinhos = catalogo.diretorio_snapshot = None
+        if not {'acidez_vinho', 'intensidade_vinho', 'tanino'}.issubset(df_vinhos.columns):
+            df_vinhos = preparar_vinhos(df_vinhos)
+        catalogo._dados = CatalogData(df_pratos, df_vinhos, indexar_busca=False)
+        return catalogo
+
+    @property
+    def caminho_regras(self):
+        """regras_harmonizacao.csv do diretório do catálogo, se existir; senão o arquivo padrão"""
+        return self._caminho_regras_local if self._caminho_regras_local.exists() else CAMINHO_REGRAS_PADRAO
+
+    @property
+    def arquivos(self):
+        """CSVs de origem do catálogo: pratos, vinhos e regras"""
+        return (self.caminho_pratos, self.caminho_vinhos, self.caminho_regras)
+
+    def assinatura_arquivos(self):
+        """(mtime, tamanho) dos CSVs, usado para detectar alterações"""
+        if self.caminho_pratos is None:
+            return None
+        return tuple((caminho.stat().st_mtime_ns, caminho.stat().st_size) for caminho in self.arquivos)
+
+    def _ler_regras(self):
+        # Relido a cada carga (arquivo pequeno), para que edições nas regras valham na recarga
+        return HarmonizationRules.from_csv(self.caminho_regras)
+
+    def _ler_csvs(self):
+        assinatura = self.assinatura_arquivos()
+        df_pratos = pd.read_csv(self.caminho_pratos)
+        df_vinhos = preparar_vinhos(pd.read_csv(self.caminho_vinhos))
+        return CatalogData(df_pratos, df_vinhos, assinatura, regras=self._ler_regras())
+
+    def _manifesto_valido(self, assinatura):
+        """
+        Manifesto do snapshot, se ele foi gerado a partir dos CSVs atuais; senão None.
+
+        Compara (mtime, tamanho) e, se só o mtime mudou (ex.: arquivos copiados no
+        deploy), o hash do conteúdo.
+        """
+        if self.diretorio_snapshot is None:
+            return None
+        manifesto = ler_manifesto(self.diretorio_snapshot)
+        if manifesto is None or manifesto.get('impressao_regras') != impressao_regras():
+            return None
+        if 'assinatura' not in manifesto or 'hashes' not in manifesto:
+            return None
+
+        if len(manifesto['assinatura']) != len(self.arquivos):
+            return None
+        for caminho, atual, gravada, hash_gravado in zip(
+                self.arquivos, assinatura, manifesto['assinatura'], manifesto['hashes']):
+            if tuple(atual) == tuple(gravada):
+                continue
+            if atual[1] != gravada[1] or hash_arquivo(caminho) != hash_gravado:
+                return None
+        return manifesto
+
+    def snapshot_valido(self):
+        """True se existe um snapshot gerado a partir dos CSVs atuais"""
+        return self.caminho_pratos is not None and self._manifesto_valido(self.assinatura_arquivos()) is not None
+
+    def _construir(self):
+        """Snapshot binário se estiver atualizado, senão os CSVs"""
+        assinatura = self.assinatura_arquivos()
+        manifesto = self._manifesto_valido(assinatura)
+        if manifesto is not None:
+            try:
+                return CatalogData.de_snapshot(self.diretorio_snapshot, assinatura, manifesto, self._ler_regras())
+            except (OSError, KeyError, ValueError) as e:
+                print(f"⚠️ Snapshot do catálogo inválido ({e}); lendo os CSVs")
+        return self._ler_csvs()
+
+    def _gravar_snapshot(self):
+        dados = self._ler_csvs()
+        dados.salvar_snapshot(self.diretorio_snapshot, {
+            'assinatura': [list(a) for a in dados.assinatura],
+            'hashes': [hash_arquivo(caminho) for caminho in self.arquivos]
+        })
+        return dados
+
+    def gerar_snapshot(self):
+        """
+        Lê os CSVs, constrói os índices e grava o snapshot binário em diretorio_snapshot.
+
+        Retorna o caminho do snapshot. Os dados construídos passam a ser os do catálogo.
+        """
+        with self._lock:
+            self._dados = self._gravar_snapshot()
+        return self.diretorio_snapshot
+
+    def garantir_snapshot(self):
+        """
+        Gera o snapshot apenas se não houver um atualizado, sem manter os dados neste processo.
+
+        Usado antes de iniciar vários workers: cada um mapeia o mesmo snapshot, e o
+        processo que o gerou não fica com uma cópia privada das matrizes.
+        Retorna o manifesto do snapshot.
+        """
+        with self._lock:
+            if self._manifesto_valido(self.assinatura_arquivos()) is None:
+                self._gravar_snapshot()
+        return ler_manifesto(self.diretorio_snapshot)
+
+    def carregar(self):
+        """Carrega o snapshot ou lê os CSVs e constrói os índices, se ainda não foi feito. Retorna os dados"""
+        if self._dados is None:
+            with self._lock:
+                if self._dados is None:
+                    self._dados = self._construir()
+        return self._dados
+
+    def desatualizado(self):
+        """True se os CSVs mudaram desde o último carregamento, ou se os dados vieram dos CSVs e já há snapshot deles"""
+        dados = self._dados
+        if dados is None or self.caminho_pratos is None:
+            return False
+        assinatura = self.assinatura_arquivos()
+        if assinatura != dados.assinatura:
+            return True
+        return not dados.mapeado and self._manifesto_valido(assinatura) is not None
+
+    def recarregar(self):
+        """
+        Reconstrói os dados (snapshot atualizado ou CSVs) e os substitui atomicamente.
+
+        Se a leitura falhar, os dados atuais são mantidos e a exceção é propagada.
+        """
+        with self._lock:
+            self._dados = self._construir()
+        return self._dados
+
+    def recarregar_se_alterado(self):
+        """Recarrega se os CSVs ou o snapshot mudaram. Retorna True se houve recarga"""
+        if not self.desatualizado():
+            return False
+        self.recarregar()
+        return True
+
+    @property
+    def carregado(self):
+        return self._dados is not None
+
+    @property
+    def dados(self):
+        return self.carregar()
+
+    @property
+    def df_pratos(self):
+        return self.dados.df_pratos
+
+    @property
+    def df_vinhos(self):
+        return self.dados.df_vinhos
+
+    def prato(self, nome_prato):
+        """Ver CatalogData.prato"""
+        return self.dados.prato(nome_prato)
+
+    def buscar_prato(self, consulta):
+        """Ver CatalogData.buscar_prato"""
+        return self.dados.buscar_prato(consulta)
+
+    def recomendar(self, nome_prato, top_n=5, como_dataframe=True):
+        """Ver recomendar_vinho"""
+        return self.dados.recomendar(nome_prato, top_n, como_dataframe)
+
+    def recomendar_lote(self, nomes_pratos, top_n=5, como_dataframe=True):
+        """Ver recomendar_vinhos_lote"""
+        return self.dados.recomendar_lote(nomes_pratos, top_n, como_dataframe)
+
+    def recomendar_por_atributos(self, tipo_prato, acidez, intensidade_sabor, temperos=None, top_n=5, como_dataframe=True):
+        """Ver recomendar_vinho_por_atributos"""
+        return self.dados.recomendar_por_atributos(tipo_prato, acidez, intensidade_sabor, temperos, top_n, como_dataframe)
+
+
+_catalogo_padrao = None
+_catalogo_padrao_lock = threading.Lock()
+
+def catalogo_padrao():
+    """Catálogo compartilhado do processo, sobre DIRETORIO_DADOS (carregado no primeiro uso)"""
+    global _catalogo_padrao
+    if _catalogo_padrao is None:
+        with _catalogo_padrao_lock:
+            if _catalogo_padrao is None:
+                _catalogo_padrao = WineCatalog()
+    return _catalogo_padrao
+
+# Catálogos temporários sobre DataFrames avulsos, reaproveitados enquanto o mesmo par de
+# DataFrames (mesmos objetos, com o mesmo conteúdo) for usado; os mais antigos são descartados
+MAX_CATALOGOS_AVULSOS = 4
+_catalogos_avulsos = OrderedDict()
+_catalogos_avulsos_lock = threading.Lock()
+
+# Colunas dos pratos lidas pela recomendação. Só elas entram na impressão digital: hashear
+# textos longos como os ingredientes custaria quase tanto quanto reconstruir o catálogo
+COLUNAS_IMPRESSAO_PRATOS = ['id_prato', 'nome_prato', 'tipo_prato', 'temperos', 'acidez', 'intensidade_sabor']
+
+def _impressao_digital(df, colunas=None):
+    """Formato, nomes das colunas e hash do conteúdo (linha a linha, em ordem) das colunas informadas que existirem"""
+    conteudo = df if colunas is None else df[[coluna for coluna in colunas if coluna in df.columns]]
+    hashes = pd.util.hash_pandas_object(conteudo, index=False).to_numpy()
+    return df.shape, tuple(df.columns), hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+def _catalogo_avulso(df_pratos, df_vinhos):
+    """WineCatalog sobre o par de DataFrames, construído uma vez por par (ver MAX_CATALOGOS_AVULSOS)
+
+    Cada chamada compara a impressão digital dos DataFrames com a do catálogo guardado, então
+    alterações feitas no lugar geram um catálogo novo. Nos pratos só contam as colunas de
+    COLUNAS_IMPRESSAO_PRATOS; os vinhos contam por inteiro.
+    """
+    chave = (id(df_pratos), id(df_vinhos))
+    impressao = (_impressao_digital(df_pratos, COLUNAS_IMPRESSAO_PRATOS), _impressao_digital(df_vinhos))
+    with _catalogos_avulsos_lock:
+        entrada = _catalogos_avulsos.get(chave)
+        if entrada is not None:
+            ref_pratos, ref_vinhos, impressao_guardada, catalogo = entrada
+            # O id pode ter sido reutilizado por outro objeto depois que o original foi coletado
+            if ref_pratos() is df_pratos and ref_vinhos() is df_vinhos and impressao_guardada == impressao:
+                _catalogos_avulsos.move_to_end(chave)
+                return catalogo
+            del _catalogos_avulsos[chave]
+
+    catalogo = WineCatalog.from_dataframes(df_pratos, df_vinhos)
+
+    with _catalogos_avulsos_lock:
+        _catalogos_avulsos[chave] = (weakref.ref(df_pratos), weakref.ref(df_vinhos), impressao, catalogo)
+        while len(_catalogos_avulsos) > MAX_CATALOGOS_AVULSOS:
+            _catalogos_avulsos.popitem(last=False)
+    return catalogo
+
+def _resolver_catalogo(catalogo=None, df_pratos=None, df_vinhos=None):
+    """Catálogo informado, o padrão, ou um catálogo temporário sobre DataFrames avulsos"""
+    if catalogo is not None:
+        return catalogo
+    if df_pratos is None and df_vinhos is None:
+        return catalogo_padrao()
+
+    padrao = _catalogo_padrao
+    if padrao is not None and padrao.carregado:
+        if (df_pratos is None or df_pratos is padrao.df_pratos) and \
+                (df_vinhos is None or df_vinhos is padrao.df_vinhos):
+            return padrao
+        df_pratos = padrao.df_pratos if df_pratos is None else df_pratos
+        df_vinhos = padrao.df_vinhos if df_vinhos is None else df_vinhos
+    elif df_pratos is None or df_vinhos is None:
+        padrao = catalogo_padrao()
+        df_pratos = padrao.df_pratos if df_pratos is None else df_pratos
+        df_vinhos = padrao.df_vinhos if df_vinhos is None else df_vinhos
+    return _catalogo_avulso(df_pratos, df_vinhos)
+
+def __getattr__(nome):
+    """Compatibilidade: df_pratos, df_vinhos e índices como atributos do módulo (carregam o catálogo padrão)"""
+    atributos = {
+        'df_pratos': lambda dados: dados.df_pratos,
+        'df_vinhos': lambda dados: dados.df_vinhos,
+        'pratos_codificados': lambda dados: dados.pratos,
+        'indice_busca_pratos': lambda dados: dados.busca,
+        'regras_harmonizacao': lambda dados: dados.regras.para_dict(),
+    }
+    if nome in atributos:
+        return atributos[nome](catalogo_padrao().dados)
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+def recomendar_vinho(nome_prato, df_pratos=None, df_vinhos=None, top_n=5, catalogo=None, como_dataframe=True):
     """
     Recomenda vinhos baseado em similaridade e regras de harmonização
 
     Parâmetros:
     - nome_prato: nome do prato a ser harmonizado
-    - df_pratos: DataFrame com informações dos pratos
-    - df_vinhos: DataFrame com informações dos vinhos
+    - df_pratos: DataFrame com informações dos pratos (opcional)
+    - df_vinhos: DataFrame com informações dos vinhos (opcional)
     - top_n: número de recomendações a retornar
+    - catalogo: WineCatalog a usar (padrão: catálogo do processo)
+    - como_dataframe: se False, retorna uma lista de RecomendacaoVinho (mais leve, para a API)
 
     Retorna: DataFrame com top_n vinhos recomendados e seus scores
+    (ou lista de RecomendacaoVinho, na mesma ordem)
     """
-    # Encontrar o prato
-    prato = df_pratos[df_pratos['nome_prato'] == nome_prato]
-
-    if prato.empty:
-        return f"Prato '{nome_prato}' não encontrado na base de dados."
-
-    prato = prato.iloc[0]
-
-    # Codificar o prato
-    df_pratos_encoded = codificar_pratos(df_pratos)
-    prato_encoded = df_pratos_encoded[df_pratos_encoded['nome_prato'] == nome_prato].iloc[0]
-
-    # Regras de harmonização baseadas no tipo de prato (expandido)
-    regras_harmonizacao = {
-        'carne vermelha': {
-            'tinto seco': 1.0, 
-            'tinto suave': 0.8, 
-            'tinto leve': 0.7,
-            'tinto frutado': 0.8,
-            'branco seco': 0.3, 
-            'branco doce': 0.2,
-            'branco aromático': 0.3,
-            'rosé seco': 0.4,
-            'espumante': 0.3,
-            'licoroso': 0.2
-        },
-        'carne branca': {
-            'branco seco': 0.9, 
-            'tinto suave': 0.7, 
-            'tinto leve': 0.8,
-            'tinto seco': 0.5, 
-            'branco doce': 0.6,
-            'branco aromático': 0.7,
-            'rosé seco': 0.8,
-            'espumante': 0.7,
-            'tinto frutado': 0.6,
-            'licoroso': 0.3
-        },
-        'peixe': {
-            'branco seco': 1.0, 
-            'branco doce': 0.6, 
-            'branco aromático': 0.8,
-            'tinto suave': 0.3, 
-            'tinto leve': 0.4,
-            'tinto seco': 0.2,
-            'rosé seco': 0.7,
-            'espumante': 0.8,
-            'tinto frutado': 0.3,
-            'licoroso': 0.7
-        },
-        'vegetariano': {
-            'branco seco': 0.8, 
-            'branco doce': 0.7, 
-            'branco aromático': 0.7,
-            'tinto suave': 0.6, 
-            'tinto leve': 0.7,
-            'tinto seco': 0.5,
-            'rosé seco': 0.8,
-            'espumante': 0.9,
-            'tinto frutado': 0.6,
-            'licoroso': 0.4
-        },
-        'frutos do mar': {
-            'branco seco': 1.0,
-            'branco aromático': 0.8,
-            'branco doce': 0.5,
-            'rosé seco': 0.7,
-            'espumante': 0.9,
-            'tinto leve': 0.3,
-            'tinto suave': 0.3,
-            'tinto seco': 0.2,
-            'tinto frutado': 0.3,
-            'licoroso': 0.6
-        }
-    }
+    return _resolver_catalogo(catalogo, df_pratos, df_vinhos).recomendar(nome_prato, top_n, como_dataframe)
 
-    # Criar vetor de características do prato
-    # Vetor: [acidez, intensidade, tipo_prato]
-    # tipo_prato já foi mapeado para 1-5 baseado na intensidade da proteína
-    features_prato = np.array([
-        prato_encoded['acidez_num'],
-        prato_encoded['intensidade_num'],
-        prato_encoded['tipo_prato_num']
-    ]).reshape(1, -1)
-
-    # Calcular similaridade com cada vinho
-    resultados = []
-
-    for idx, vinho in df_vinhos.iterrows():
-        # Verificar se o vinho existe nas características
-        if vinho['vinho'] not in caracteristicas_vinhos:
-            continue
-            
-        # Vetor de características do vinho
-        # Vetor: [acidez, intensidade, tanino]
-        # tanino é um indicador de corpo/peso do vinho (0 para brancos, 1-3 para tintos)
-        # isso se alinha com tipo_prato que indica peso da proteína
-        features_vinho = np.array([
-            caracteristicas_vinhos[vinho['vinho']]['acidez'],
-            caracteristicas_vinhos[vinho['vinho']]['intensidade'],
-            caracteristicas_vinhos[vinho['vinho']]['tanino']
-        ]).reshape(1, -1)
-
-        # Similaridade de cosseno entre características
-        similaridade_features = cosine_similarity(features_prato, features_vinho)[0][0]
-
-        # Score de harmonização baseado em regras
-        tipo_prato = prato['tipo_prato']
-        tipo_vinho = vinho['tipo_vinho']
-        score_regra = regras_harmonizacao.get(tipo_prato, {}).get(tipo_vinho, 0.5)
-
-        # Score final: 40% similaridade de características + 60% regras
-        score_final = (similaridade_features * 0.4) + (score_regra * 0.6)
-
-        # Converter para percentual
-        percentual_similaridade = round(score_final * 100, 2)
-
-        resultados.append({
-            'vinho': vinho['vinho'],
-            'tipo_vinho': vinho['tipo_vinho'],
-            'similaridade_percentual': percentual_similaridade,
-            'score_features': round(similaridade_features * 100, 2),
-            'score_regras': round(score_regra * 100, 2)
-        })
+def recomendar_vinhos_lote(nomes_pratos, top_n=5, df_pratos=None, df_vinhos=None, catalogo=None, como_dataframe=True):
+    """
+    Recomenda vinhos para vários pratos em uma única operação matricial
 
-    # Ordenar por similaridade
-    resultados_df = pd.DataFrame(resultados)
-    resultados_df = resultados_df.sort_values('similaridade_percentual', ascending=False)
+    Parâmetros:
+    - nomes_pratos: lista com os nomes dos pratos
+    - top_n: número de recomendações por prato
+    - df_pratos / df_vinhos: bases alternativas (opcional), como em recomendar_vinho
+    - catalogo: WineCatalog a usar (padrão: catálogo do processo)
+    - como_dataframe: se False, retorna uma lista alinhada a nomes_pratos com a lista de
+      RecomendacaoVinho de cada prato (None para pratos não encontrados)
+
+    Retorna: DataFrame em formato longo com as colunas nome_prato, posicao, vinho,
+    tipo_vinho, similaridade_percentual, score_features e score_regras.
+    Pratos não encontrados ficam listados em resultado.attrs['pratos_nao_encontrados'].
+    """
+    return _resolver_catalogo(catalogo, df_pratos, df_vinhos).recomendar_lote(nomes_pratos, top_n, como_dataframe)
 
-    return resultados_df.head(top_n)
+def recomendar_vinho_por_atributos(tipo_prato, acidez, intensidade_sabor, temperos=None, top_n=5, catalogo=None, como_dataframe=True):
+    """
+    Recomenda vinhos para um prato descrito pelos atributos, esteja ele na base ou não
 
-def sistema_recomendacao_vinho(nome_prato_input):
+    Parâmetros:
+    - tipo_prato: um dos tipos de tipo_map (ex.: 'carne vermelha')
+    - acidez: nível de acidez_map ('baixa', 'média' ou 'alta')
+    - intensidade_sabor: nível de intensidade_map ('baixa', 'média' ou 'alta')
+    - temperos: um dos temperos de tempero_map (opcional; validado, mas não altera o score)
+    - top_n: número de recomendações a retornar
+    - catalogo: WineCatalog a usar (padrão: catálogo do processo)
+    - como_dataframe: se False, retorna uma lista de RecomendacaoVinho
+
+    Retorna: DataFrame com top_n vinhos recomendados e seus scores (ou lista de
+    RecomendacaoVinho), iguais aos de um prato da base com os mesmos atributos.
+    Levanta ValueError se algum atributo não estiver nos mapeamentos.
+    """
+    return (catalogo or catalogo_padrao()).recomendar_por_atributos(
+        tipo_prato, acidez, intensidade_sabor, temperos, top_n, como_dataframe
+    )
+
+def sistema_recomendacao_vinho(nome_prato_input, catalogo=None):
     """
     Interface principal do sistema de recomendação
     """
+    catalogo = catalogo or catalogo_padrao()
+    df_pratos = catalogo.df_pratos
+
     print("="*80)
     print("🍷 SISTEMA DE RECOMENDAÇÃO DE VINHOS 🍷")
     print("="*80)
     print(f"\nPrato selecionado: {nome_prato_input}")
 
     # Buscar informações do prato
-    prato = df_pratos[df_pratos['nome_prato'] == nome_prato_input]
+    prato_info = catalogo.prato(nome_prato_input)
 
-    if prato.empty:
+    if prato_info is None:
         print(f"\n❌ Erro: Prato '{nome_prato_input}' não encontrado.")
         print("\nPratos disponíveis:")
         for p in df_pratos['nome_prato']:
             print(f"  - {p}")
         return
 
-    prato_info = prato.iloc[0]
-
     print(f"\nCaracterísticas do prato:")
     print(f"  • Tipo: {prato_info['tipo_prato']}")
     print(f"  • Tempero: {prato_info['temperos']}")
@@ -296,7 +782,7 @@ def sistema_recomendacao_vinho(nome_prato_input):
     print(f"  • Ingredientes: {prato_info['ingredientes']}")
 
     # Obter recomendações
-    recomendacoes = recomendar_vinho(nome_prato_input, df_pratos, df_vinhos, top_n=3)
+    recomendacoes = catalogo.recomendar(nome_prato_input, top_n=3)
 
     print("\n" + "="*80)
     print("🏆 TOP 3 VINHOS RECOMENDADOS")
@@ -0,0 +1,175 @@
+"""
+Snapshot Binário do Catálogo
+Grava o catálogo já preparado (DataFrames, índices de busca e matrizes de score)
+em um diretório de arquivos .npy com um manifesto JSON. Na leitura os arrays são
+mapeados em memória, então carregar um catálogo grande não exige reprocessar CSVs
+"""
+
+import json
+import math
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+# Incrementar quando o formato dos arquivos ou das partes mudar
+VERSAO_SNAPSHOT = 2
+
+ARQUIVO_MANIFESTO = "manifesto.json"
+
+SEPARADOR_TEXTOS = "\x00"
+
+
+def _eh_nulo(valor) -> bool:
+    return valor is None or (isinstance(valor, float) and math.isnan(valor))
+
+
+def _codificar_textos(textos) -> dict:
+    """
+    Lista de textos → bytes UTF-8 concatenados (formato colunar, mapeável em memória).
+
+    Os textos são separados por NUL, o que permite decodificá-los com um único
+    decode + split; se algum texto contiver NUL, os limites de cada um são gravados.
+    Valores nulos (None/NaN) são gravados como texto vazio e marcados em 'nulos'.
+    """
+    nulos = np.fromiter((_eh_nulo(t) for t in textos), dtype=bool, count=len(textos))
+    valores = ["" if nulo else str(t) for t, nulo in zip(textos, nulos)]
+
+    if any(SEPARADOR_TEXTOS in v for v in valores):
+        codificados = [v.encode("utf-8") for v in valores]
+        limites = np.zeros(len(codificados) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, codificados), dtype=np.int64, count=len(codificados)), out=limites[1:])
+        arrays = {"bytes": np.frombuffer(b"".join(codificados), dtype=np.uint8), "limites": limites}
+    else:
+        arrays = {"bytes": np.frombuffer(SEPARADOR_TEXTOS.join(valores).encode("utf-8"), dtype=np.uint8)}
+
+    if nulos.any():
+        arrays["nulos"] = nulos
+    return arrays
+
+
+def _decodificar_textos(arrays: dict, quantidade: int) -> list:
+    dados = arrays["bytes"].tobytes()
+    if "limites" in arrays:
+        limites = arrays["limites"].tolist()
+        textos = [dados[limites[i]:limites[i + 1]].decode("utf-8") for i in range(len(limites) - 1)]
+    else:
+        textos = dados.decode("utf-8").split(SEPARADOR_TEXTOS) if quantidade else []
+    if "nulos" in arrays:
+        for i in np.flatnonzero(arrays["nulos"]).tolist():
+            textos[i] = None
+    return textos
+
+
+def ler_manifesto(diretorio):
+    """Manifesto do snapshot em diretorio, ou None se não existir ou for de outra versão."""
+    caminho = Path(diretorio) / ARQUIVO_MANIFESTO
+    try:
+        manifesto = json.loads(caminho.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifesto.get("versao") != VERSAO_SNAPSHOT:
+        return None
+    return manifesto
+
+
+def salvar_snapshot(diretorio, partes: dict, metadados: dict) -> Path:
+    """
+    Grava as partes em diretorio, substituindo um snapshot anterior.
+
+    Args:
+        diretorio: Diretório de destino (criado se necessário)
+        partes: {nome: np.ndarray | lista de textos}
+        metadados: Informações livres (serializáveis em JSON) guardadas no manifesto
+
+    Returns:
+        Caminho do diretório gravado
+    """
+    diretorio = Path(diretorio)
+    temporario = diretorio.with_name(f"{diretorio.name}.tmp-{os.getpid()}")
+    shutil.rmtree(temporario, ignore_errors=True)
+    temporario.mkdir(parents=True)
+
+    try:
+        tipos, quantidades = {}, {}
+        for nome, valor in partes.items():
+            if isinstance(valor, np.ndarray):
+                arrays, tipos[nome] = {"": valor}, "array"
+            else:
+                valor = list(valor)
+                arrays, tipos[nome], quantidades[nome] = _codificar_textos(valor), "textos", len(valor)
+            for sufixo, array in arrays.items():
+                arquivo = f"{nome}.{sufixo}.npy" if sufixo else f"{nome}.npy"
+                np.save(temporario / arquivo, np.ascontiguousarray(array), allow_pickle=False)
+
+        manifesto = {"versao": VERSAO_SNAPSHOT, "partes": tipos, "quantidade_textos": quantidades, **metadados}
+        # O manifesto é gravado por último: um diretório sem ele nunca é considerado válido
+        (temporario / ARQUIVO_MANIFESTO).write_text(json.dumps(manifesto, ensure_ascii=False, indent=2), encoding="utf-8")
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+
+    # Troca o diretório antigo pelo novo (leitores que já mapearam os arquivos antigos não são afetados)
+    antigo = diretorio.with_name(f"{diretorio.name}.old-{os.getpid()}")
+    if diretorio.exists():
+        diretorio.rename(antigo)
+    temporario.rename(diretorio)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return diretorio
+
+
+def carregar_snapshot(diretorio, manifesto: dict = None):
+    """
+    Lê um snapshot gravado por salvar_snapshot.
+
+    Arrays são abertos com mmap_mode='r' (somente leitura, páginas compartilhadas
+    entre processos pelo cache do sistema operacional); listas de textos são
+    decodificadas em memória.
+
+    Returns:
+        (partes, manifesto)
+
+    Raises:
+        FileNotFoundError: se não houver snapshot válido em diretorio
+    """
+    diretorio = Path(diretorio)
+    manifesto = manifesto or ler_manifesto(diretorio)
+    if manifesto is None:
+        raise FileNotFoundError(f"Snapshot não encontrado em {diretorio}")
+
+    def abrir(arquivo):
+        try:
+            return np.load(diretorio / arquivo, mmap_mode="r", allow_pickle=False)
+        except ValueError:
+            # Arrays vazios não podem ser mapeados
+            return np.load(diretorio / arquivo, allow_pickle=False)
+
+    partes = {}
+    for nome, tipo in manifesto["partes"].items():
+        if tipo == "array":
+            partes[nome] = abrir(f"{nome}.npy")
+        else:
+            arrays = {"bytes": abrir(f"{nome}.bytes.npy")}
+            for sufixo in ("limites", "nulos"):
+                if (diretorio / f"{nome}.{sufixo}.npy").exists():
+                    arrays[sufixo] = abrir(f"{nome}.{sufixo}.npy")
+            partes[nome] = _decodificar_textos(arrays, manifesto["quantidade_textos"][nome])
+    return partes, manifesto
+
+
+if __name__ == "__main__":
+    # Etapa de build: python backend/snapshot_catalogo.py [diretório dos CSVs] [diretório do snapshot]
+    import sys
+    import time
+    from sistema_recomendacao_vinho import WineCatalog
+
+    argumentos = sys.argv[1:]
+    catalogo = WineCatalog(
+        argumentos[0] if len(argumentos) > 0 else None,
+        diretorio_snapshot=argumentos[1] if len(argumentos) > 1 else None
+    )
+    inicio = time.perf_counter()
+    destino = catalogo.gerar_snapshot()
+    print(f"✅ Snapshot gravado em {destino} ({len(catalogo.df_pratos)} pratos, "
+          f"{len(catalogo.df_vinhos)} vinhos) em {time.perf_counter() - inicio:.2f}s")
@@ -0,0 +1,284 @@
+"""
+Benchmark Suite
+Measures the recommendation engine and the API in-process at several catalog
+sizes and saves the results as JSON, so runs can be compared before deploying
+
+Usage:
+    python benchmark.py
+    python benchmark.py --tamanhos 100 10000 100000 --iteracoes 500
+    python benchmark.py --tamanhos 1000000 --vinhos 1000
+    python benchmark.py --comparar benchmarks/anterior.json --limiar 0.2
+"""
+
+import os
+
+# Measure the LLM path itself (not cache hits) and keep the catalog watcher off
+os.environ.setdefault("JUSTIFICATIVA_CACHE_HABILITADO", "false")
+os.environ.setdefault("CATALOGO_RECARGA_INTERVALO", "0")
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pandas as pd
+
+# Add backend to Python path
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+import api
+import llm
+from lm_local import criar_lm_local
+from gerar_catalogo import gerar_catalogo
+from sistema_recomendacao_vinho import WineCatalog, codificar_pratos, recomendar_vinho
+
+DIRETORIO_BACKEND = Path(__file__).parent / "backend"
+DIRETORIO_RESULTADOS = Path(__file__).parent / "benchmarks"
+
+TAMANHOS_PADRAO = [100, 10_000, 100_000]
+
+# Wine SKUs in every generated catalog (the P×W score matrix grows with both sizes)
+VINHOS_PADRAO = 50
+
+# Concurrent API case: simultaneous requests against the local LM with a fixed latency
+CONCORRENCIA_API = 16
+LATENCIA_LM_MS = 50
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def estatisticas(duracoes_ns) -> dict:
+    """ops/sec and latency percentiles (ms) for a list of per-call durations"""
+    duracoes_ms = np.asarray(duracoes_ns, dtype=np.float64) / 1e6
+    total_s = duracoes_ms.sum() / 1e3
+    return {
+        "iteracoes": len(duracoes_ms),
+        "ops_por_segundo": round(len(duracoes_ms) / total_s, 2) if total_s > 0 else None,
+        "media_ms": round(float(duracoes_ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(duracoes_ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(duracoes_ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(duracoes_ms, 99)), 4),
+        "max_ms": round(float(duracoes_ms.max()), 4),
+    }
+
+def medir(funcao, entradas, iteracoes: int, aquecimento: int = 3) -> dict:
+    """Call funcao(entrada) cycling over entradas and time each call"""
+    for i in range(min(aquecimento, iteracoes)):
+        funcao(entradas[i % len(entradas)])
+
+    duracoes = []
+    for i in range(iteracoes):
+        entrada = entradas[i % len(entradas)]
+        inicio = time.perf_counter_ns()
+        funcao(entrada)
+        duracoes.append(time.perf_counter_ns() - inicio)
+    return estatisticas(duracoes)
+
+async def medir_async(funcao, entradas, iteracoes: int, aquecimento: int = 3) -> dict:
+    """Async version of medir"""
+    for i in range(min(aquecimento, iteracoes)):
+        await funcao(entradas[i % len(entradas)])
+
+    duracoes = []
+    for i in range(iteracoes):
+        entrada = entradas[i % len(entradas)]
+        inicio = time.perf_counter_ns()
+        await funcao(entrada)
+        duracoes.append(time.perf_counter_ns() - inicio)
+    return estatisticas(duracoes)
+
+# ============================================================================
+# CATALOGS AND INPUTS
+# ============================================================================
+
+def consultas_busca(df_pratos: pd.DataFrame, rng) -> list:
+    """Search mix: exact names, partial names, ingredients and misses"""
+    nomes = df_pratos["nome_prato"].sample(20, replace=True, random_state=rng).tolist()
+    ingredientes = df_pratos["ingredientes"].sample(10, replace=True, random_state=rng)
+    consultas = nomes
+    consultas += [nome.split()[0].lower() for nome in nomes[:10]]
+    consultas += [ing.split(",")[0].strip() for ing in ingredientes]
+    consultas += ["prato inexistente", "xyz"]
+    return consultas
+
+def lm_stub(latencia_ms: float = 0, seed: int = 42):
+    """Local LM (no network): deterministic justifications with a fixed latency"""
+    return criar_lm_local(latencia_ms=latencia_ms, sigma=0, taxa_erro=0, seed=seed)
+
+def verificar_resposta(resposta: httpx.Response):
+    """Fail on an HTTP error or a fallback justification: the timing would measure the error path, not the LLM"""
+    resposta.raise_for_status()
+    corpo = resposta.json()
+    if corpo["justificativa"] == api.justificativa_padrao(corpo["vinho"]["nome"], corpo["prato"]):
+        raise RuntimeError(f"/api/recomendacao fell back to the default justification for {corpo['prato']!r}")
+
+# ============================================================================
+# BENCHMARK CASES
+# ============================================================================
+
+def executar_tamanho(n_pratos: int, n_vinhos: int, iteracoes: int, diretorio_base: Path, rng, seed: int) -> list:
+    """Run every case against a synthetic catalog with n_pratos dishes and n_vinhos wines"""
+    diretorio = gerar_catalogo(diretorio_base / f"catalogo_{n_pratos}", n_pratos, n_vinhos, seed=seed)
+    sem_snapshot = diretorio / "sem_snapshot"
+    iteracoes_pesadas = max(3, iteracoes // 50)
+    resultados = []
+
+    def registrar(caso, medicao):
+        resultados.append({"tamanho": n_pratos, "caso": caso, **medicao})
+        print(f"  {caso:<36} p50 {medicao['p50_ms']:>10.3f} ms   p99 {medicao['p99_ms']:>10.3f} ms   "
+              f"{medicao['ops_por_segundo']:>12} ops/s")
+
+    print(f"\n📊 Catalog with {n_pratos} dishes")
+
+    # Startup: build from CSV, and memory-map the binary snapshot
+    registrar("carregar_catalogo_csv", medir(
+        lambda _: WineCatalog(diretorio, diretorio_snapshot=sem_snapshot).carregar(),
+        [None], iteracoes_pesadas, aquecimento=0
+    ))
+    WineCatalog(diretorio).gerar_snapshot()
+    registrar("carregar_catalogo_snapshot", medir(
+        lambda _: WineCatalog(diretorio).carregar(), [None], iteracoes_pesadas, aquecimento=0
+    ))
+
+    catalogo = WineCatalog(diretorio, diretorio_snapshot=sem_snapshot)
+    catalogo.carregar()
+    df_pratos = catalogo.df_pratos
+    nomes = df_pratos["nome_prato"].sample(200, replace=True, random_state=rng).tolist()
+
+    registrar("codificar_pratos", medir(lambda df: codificar_pratos(df), [df_pratos], iteracoes_pesadas))
+    registrar("recomendar_vinho", medir(
+        lambda nome: recomendar_vinho(nome, top_n=3, catalogo=catalogo), nomes, iteracoes
+    ))
+    registrar("recomendar_vinho_leve", medir(
+        lambda nome: recomendar_vinho(nome, top_n=3, catalogo=catalogo, como_dataframe=False), nomes, iteracoes
+    ))
+
+    # The API helpers read the module-level catalog
+    api.catalogo = catalogo
+    registrar("buscar_prato_no_csv", medir(api.buscar_prato_no_csv, consultas_busca(df_pratos, rng), iteracoes))
+
+    # Justification path with a stubbed LM (no network, no cache)
+    iteracoes_llm = max(10, iteracoes // 10)
+    motor = llm.JustificationEngine(lm_stub())
+    pares = []
+    for nome in nomes[:20]:
+        prato = catalogo.prato(nome)
+        vinho = catalogo.recomendar(nome, top_n=1, como_dataframe=False)[0]
+        pares.append((nome, api.caracteristicas_do_prato(prato), api.info_do_vinho(vinho)))
+    registrar("justificativa_stub_lm", medir(lambda par: motor.gerar(*par), pares, iteracoes_llm))
+
+    # End-to-end /api/recomendacao through the ASGI app, with the stub LM as the default engine
+    llm._motor_padrao = llm.JustificationEngine(lm_stub())
+    api.LLM_AVAILABLE = True
+
+    async def ponta_a_ponta():
+        transporte = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark") as cliente:
+            async def chamar(nome):
+                verificar_resposta(await cliente.post("/api/recomendacao", json={"mensagem": nome}))
+            return await medir_async(chamar, nomes, iteracoes_llm)
+
+    registrar("api_recomendacao", asyncio.run(ponta_a_ponta()))
+
+    # Same endpoint under concurrency, with LM latency: one measurement per batch of simultaneous requests
+    llm._motor_padrao = llm.JustificationEngine(lm_stub(LATENCIA_LM_MS))
+
+    async def concorrente():
+        transporte = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark") as cliente:
+            async def lote(inicio):
+                lote_nomes = [nomes[(inicio + i) % len(nomes)] for i in range(CONCORRENCIA_API)]
+                respostas = await asyncio.gather(*(
+                    cliente.post("/api/recomendacao", json={"mensagem": nome}) for nome in lote_nomes
+                ))
+                for resposta in respostas:
+                    verificar_resposta(resposta)
+            return await medir_async(lote, list(range(len(nomes))), max(3, iteracoes_llm // 10), aquecimento=1)
+
+    registrar(f"api_recomendacao_{CONCORRENCIA_API}_concorrentes", asyncio.run(concorrente()))
+    return resultados
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).parent, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def comparar(resultados: list, arquivo_anterior: Path, limiar: float) -> list:
+    """Print p50 change per (size, case) against a previous run and return the regressions"""
+    anteriores = json.loads(arquivo_anterior.read_text(encoding="utf-8"))["resultados"]
+    indice = {(r["tamanho"], r["caso"]): r for r in anteriores}
+    regressoes = []
+
+    print(f"\n🔍 Comparison with {arquivo_anterior} (p50, regression threshold {limiar:.0%})")
+    for atual in resultados:
+        anterior = indice.get((atual["tamanho"], atual["caso"]))
+        if anterior is None or not anterior["p50_ms"]:
+            continue
+        variacao = atual["p50_ms"] / anterior["p50_ms"] - 1
+        marcador = "❌" if variacao > limiar else "✅"
+        print(f"  {marcador} {atual['tamanho']:>8} {atual['caso']:<36} "
+              f"{anterior['p50_ms']:>10.3f} → {atual['p50_ms']:>10.3f} ms ({variacao:+.1%})")
+        if variacao > limiar:
+            regressoes.append({**atual, "p50_anterior_ms": anterior["p50_ms"], "variacao": variacao})
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Wine recommendation benchmark suite")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO,
+                        help="catalog sizes (number of dishes)")
+    parser.add_argument("--vinhos", type=int, default=VINHOS_PADRAO, help="wine SKUs in each catalog")
+    parser.add_argument("--iteracoes", type=int, default=1000, help="iterations for the fast cases")
+    parser.add_argument("--saida", type=Path, default=None, help="JSON output file")
+    parser.add_argument("--comparar", type=Path, default=None, help="previous JSON result to compare against")
+    parser.add_argument("--limiar", type=float, default=0.2, help="p50 slowdown counted as a regression")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(args.seed)
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix="benchmark_vinhos_") as temporario:
+        for n_pratos in args.tamanhos:
+            resultados += executar_tamanho(n_pratos, args.vinhos, args.iteracoes, Path(temporario), rng, args.seed)
+
+    relatorio = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "parametros": {"tamanhos": args.tamanhos, "vinhos": args.vinhos, "iteracoes": args.iteracoes, "seed": args.seed},
+        "resultados": resultados,
+    }
+
+    saida = args.saida or DIRETORIO_RESULTADOS / f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n💾 Results saved to {saida}")
+
+    if args.comparar:
+        regressoes = comparar(resultados, args.comparar, args.limiar)
+        if regressoes:
+            print(f"\n❌ {len(regressoes)} regression(s) above {args.limiar:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+if __name__ == "__main__":
+    main()
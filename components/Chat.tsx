@@ -38,9 +38,20 @@ export default function Chat() {
     setInputValue('');
     setIsLoading(true);
 
+    const respostaId = (Date.now() + 1).toString();
+    const atualizarResposta = (content: string) => {
+      setMensagens(prev => {
+        const existente = prev.some(m => m.id === respostaId);
+        if (!existente) {
+          return [...prev, { id: respostaId, role: 'assistant', content, timestamp: new Date() }];
+        }
+        return prev.map(m => (m.id === respostaId ? { ...m, content } : m));
+      });
+    };
+
     try {
-      // Call Python FastAPI backend
-      const response = await fetch('http://localhost:8000/api/recomendacao', {
+      // Call Python FastAPI backend (Server-Sent Events: wine pick first, then justification chunks)
+      const response = await fetch('http://localhost:8000/api/recomendacao/stream', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -48,16 +59,41 @@ export default function Chat() {
         body: JSON.stringify({ mensagem: inputValue }),
       });
 
-      const data = await response.json();
-
-      const respostaMensagem: Mensagem = {
-        id: (Date.now() + 1).toString(),
-        role: 'assistant',
-        content: data.mensagem || 'Desculpe, ocorreu um erro ao processar sua solicitação.',
-        timestamp: new Date()
-      };
+      if (!response.ok || !response.body) {
+        throw new Error(`Erro HTTP ${response.status}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let conteudo = '';
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const eventos = buffer.split('\n\n');
+        buffer = eventos.pop() ?? '';
+
+        for (const bloco of eventos) {
+          const evento = bloco.match(/^event: (.*)$/m)?.[1];
+          const dados = bloco.match(/^data: (.*)$/m)?.[1];
+          if (!evento || !dados) continue;
+
+          const payload = JSON.parse(dados);
+          if (evento === 'recomendacao') {
+            conteudo = payload.mensagem;
+          } else if (evento === 'justificativa') {
+            conteudo += payload.texto;
+          } else if (evento === 'fim') {
+            conteudo = payload.mensagem || 'Desculpe, ocorreu um erro ao processar sua solicitação.';
+          }
 
-      setMensagens(prev => [...prev, respostaMensagem]);
+          setIsLoading(false);
+          atualizarResposta(conteudo);
+        }
+      }
     } catch (error) {
       console.error('Erro ao enviar mensagem:', error);
       const erroMensagem: Mensagem = {
@@ -13,12 +13,15 @@ sys.path.insert(0, str(backend_path))
 
 # Import and run the integrated system
 from sistema_integrado import sistema_completo_com_justificativa
+from sistema_recomendacao_vinho import WineCatalog
 
 def main():
-    """Main entry point"""
+    """Main entry point (optional argument: directory with pratos.csv and vinhos.csv)"""
     print("🍷 Wine Recommendation System")
     print("=" * 80)
     
+    catalogo = WineCatalog(sys.argv[1]) if len(sys.argv) > 1 else None
+    
     # Example dishes to test
     pratos_exemplo = [
         "Sushi",
@@ -31,7 +34,7 @@ def main():
     
     for prato in pratos_exemplo:
         try:
-            sistema_completo_com_justificativa(prato, usar_llm=True)
+            sistema_completo_com_justificativa(prato, usar_llm=True, catalogo=catalogo)
             print("\n" + "=" * 80 + "\n")
         except KeyboardInterrupt:
             print("\n\nExiting...")
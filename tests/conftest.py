@@ -0,0 +1,78 @@
+"""
+Configuração comum dos testes do backend
+Os módulos de backend/ se importam pelo nome (imports planos), então o diretório
+entra no sys.path antes de qualquer import
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+DIRETORIO_BACKEND = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(DIRETORIO_BACKEND))
+
+# Nada de rede nem do cache de justificativas em backend/cache: os testes que usam
+# o cache criam o seu em um diretório temporário
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+os.environ["JUSTIFICATIVA_CACHE_HABILITADO"] = "false"
+os.environ.setdefault("CATALOGO_RECARGA_INTERVALO", "0")
+
+import llm  # noqa: E402
+import metricas  # noqa: E402
+from lm_local import criar_lm_local  # noqa: E402
+from sistema_recomendacao_vinho import WineCatalog  # noqa: E402
+
+ARQUIVOS_CATALOGO = ("pratos.csv", "vinhos.csv", "regras_harmonizacao.csv")
+
+
+@pytest.fixture(scope="session")
+def df_pratos():
+    return pd.read_csv(DIRETORIO_BACKEND / "pratos.csv")
+
+
+@pytest.fixture
+def diretorio_catalogo(tmp_path):
+    """Cópia dos CSVs incluídos no repositório, para testes que gravam snapshots ou alteram arquivos"""
+    for arquivo in ARQUIVOS_CATALOGO:
+        shutil.copy(DIRETORIO_BACKEND / arquivo, tmp_path / arquivo)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def catalogo(tmp_path_factory):
+    """Catálogo sobre os CSVs incluídos no repositório, sem snapshot"""
+    diretorio = tmp_path_factory.mktemp("catalogo")
+    for arquivo in ARQUIVOS_CATALOGO:
+        shutil.copy(DIRETORIO_BACKEND / arquivo, diretorio / arquivo)
+    return WineCatalog(diretorio)
+
+
+def total_fallbacks(motivo=None):
+    """Justificativas padrão entregues pela API até agora (todos os motivos, ou só motivo)"""
+    return sum(
+        valor for amostra, valor in metricas.llm_fallbacks.amostras()
+        if motivo is None or f'motivo="{motivo}"' in amostra
+    )
+
+
+@pytest.fixture
+def lm_api(monkeypatch):
+    """Motor de justificativas do processo com o LM local; chame lm_api(**parametros) para trocar o LM"""
+    def configurar(**parametros):
+        lm = criar_lm_local(**{"latencia_ms": 20, "sigma": 0, "taxa_erro": 0, "seed": 1, **parametros})
+        monkeypatch.setattr(llm, "_motor_padrao", llm.JustificationEngine(lm))
+    configurar()
+    return configurar
+
+
+@pytest.fixture
+def api_local(monkeypatch, catalogo, lm_api):
+    """Módulo api sobre o catálogo de teste, com o LM local como LLM disponível"""
+    import api
+    monkeypatch.setattr(api, "catalogo", catalogo)
+    monkeypatch.setattr(api, "LLM_AVAILABLE", True)
+    return api
@@ -0,0 +1,130 @@
+"""
+Testes do caminho de justificativas da API
+Requisições pelo app ASGI com o LM local no lugar do Perplexity
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from conftest import total_fallbacks
+
+PRATOS = ['Sushi', 'Salmão grelhado', 'Filé ao molho madeira', 'Risoto de cogumelos',
+          'Picanha na brasa', 'Moqueca baiana', 'Lasanha vegetariana', 'Ceviche']
+
+
+def cliente_asgi(api):
+    """Cliente HTTP sobre o app, sem o lifespan (o executor do LLM continua vivo entre os testes)"""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://teste")
+
+
+async def recomendar_varios(api, mensagens):
+    async with cliente_asgi(api) as cliente:
+        respostas = await asyncio.gather(*(
+            cliente.post("/api/recomendacao", json={"mensagem": mensagem}) for mensagem in mensagens
+        ))
+    for resposta in respostas:
+        resposta.raise_for_status()
+    return [resposta.json() for resposta in respostas]
+
+
+def assert_justificativas_do_llm(api, corpos):
+    for corpo in corpos:
+        assert corpo["prato"]
+        assert corpo["justificativa"] != api.justificativa_padrao(corpo["vinho"]["nome"], corpo["prato"])
+        assert corpo["justificativa"].startswith(f"O {corpo['vinho']['nome']} ")
+
+
+def test_limite_de_concorrencia_em_varios_event_loops(api_local):
+    # Cada asyncio.run é um event loop novo (como o benchmark e o TestClient): o limite
+    # de concorrência não pode ficar preso ao primeiro loop que o usou
+    fallbacks = total_fallbacks()
+    for _ in range(2):
+        assert_justificativas_do_llm(api_local, asyncio.run(recomendar_varios(api_local, PRATOS)))
+    assert total_fallbacks() == fallbacks
+
+
+def test_recomendacao_com_justificativa_do_llm(api_local):
+    fallbacks = total_fallbacks()
+    [corpo] = asyncio.run(recomendar_varios(api_local, ['sushi']))
+
+    assert corpo["prato"] == "Sushi"
+    assert_justificativas_do_llm(api_local, [corpo])
+    assert corpo["mensagem"].endswith(corpo["justificativa"])
+    assert total_fallbacks() == fallbacks
+
+
+def test_prato_nao_encontrado_e_mensagem_vazia(api_local):
+    async def requisitar():
+        async with cliente_asgi(api_local) as cliente:
+            return await asyncio.gather(
+                cliente.post("/api/recomendacao", json={"mensagem": "prato que não existe"}),
+                cliente.post("/api/recomendacao", json={"mensagem": "   "})
+            )
+
+    nao_encontrado, vazia = asyncio.run(requisitar())
+    assert nao_encontrado.json()["prato"] == ""
+    assert vazia.status_code == 400
+
+
+@pytest.mark.parametrize("motivo", ["timeout", "erro", "indisponivel"])
+def test_justificativa_padrao_quando_o_llm_falha(api_local, lm_api, monkeypatch, motivo):
+    if motivo == "timeout":
+        lm_api(latencia_ms=500)
+        monkeypatch.setattr(api_local, "LLM_TIMEOUT_SEGUNDOS", 0.05)
+    elif motivo == "erro":
+        lm_api(taxa_erro=1)
+    else:
+        monkeypatch.setattr(api_local, "LLM_AVAILABLE", False)
+
+    fallbacks = total_fallbacks(motivo)
+    [corpo] = asyncio.run(recomendar_varios(api_local, ['Sushi']))
+    assert corpo["justificativa"] == api_local.justificativa_padrao(corpo["vinho"]["nome"], "Sushi")
+    assert total_fallbacks(motivo) == fallbacks + 1
+
+
+def test_health_responde_durante_a_justificativa(api_local, lm_api):
+    # Uma justificativa lenta roda no executor, sem prender o event loop
+    lm_api(latencia_ms=400)
+
+    async def requisitar():
+        async with cliente_asgi(api_local) as cliente:
+            recomendacao = asyncio.create_task(cliente.post("/api/recomendacao", json={"mensagem": "Sushi"}))
+            await asyncio.sleep(0.05)
+            inicio = time.perf_counter()
+            saude = await cliente.get("/health")
+            duracao = time.perf_counter() - inicio
+            assert not recomendacao.done()
+            return saude, duracao, await recomendacao
+
+    saude, duracao, recomendacao = asyncio.run(requisitar())
+    assert saude.status_code == 200
+    assert duracao < 0.2
+    assert_justificativas_do_llm(api_local, [recomendacao.json()])
+
+
+def test_limite_de_chamadas_simultaneas_ao_llm(api_local, lm_api, monkeypatch):
+    lm_api(latencia_ms=50)
+    monkeypatch.setattr(api_local, "LLM_MAX_CONCURRENCIA", 2)
+    original = api_local.gerar_justificativa_vinho
+    em_andamento, maximo = 0, 0
+    lock = threading.Lock()
+
+    def contar(**argumentos):
+        nonlocal em_andamento, maximo
+        with lock:
+            em_andamento += 1
+            maximo = max(maximo, em_andamento)
+        try:
+            return original(**argumentos)
+        finally:
+            with lock:
+                em_andamento -= 1
+
+    monkeypatch.setattr(api_local, "gerar_justificativa_vinho", contar)
+    # Loop novo: o semáforo dele nasce com o limite alterado
+    assert_justificativas_do_llm(api_local, asyncio.run(recomendar_varios(api_local, PRATOS)))
+    assert maximo == 2
@@ -0,0 +1,80 @@
+"""
+Testes do endpoint NDJSON /api/recomendacao/lote
+"""
+
+import asyncio
+import json
+
+from conftest import total_fallbacks
+from test_api_llm import PRATOS, cliente_asgi
+
+
+def recomendar_lote(api, itens: list, **parametros):
+    async def requisitar():
+        async with cliente_asgi(api) as cliente:
+            return await cliente.post("/api/recomendacao/lote", json={"itens": itens, **parametros})
+
+    resposta = asyncio.run(requisitar())
+    if resposta.status_code != 200:
+        return resposta, None
+    assert resposta.headers["content-type"].startswith("application/x-ndjson")
+    return resposta, [json.loads(linha) for linha in resposta.text.splitlines()]
+
+
+def test_lote_uma_linha_por_item(api_local, catalogo, monkeypatch):
+    # Blocos pequenos: os itens atravessam vários blocos e saem na ordem do pedido
+    monkeypatch.setattr(api_local, "TAMANHO_BLOCO_LOTE", 3)
+    itens = PRATOS + ['prato que não existe', '   ', 'salmao']
+    _, linhas = recomendar_lote(api_local, itens, top_n=2)
+
+    assert [linha["indice"] for linha in linhas] == list(range(len(itens)))
+    assert [linha["mensagem"] for linha in linhas] == itens
+    assert linhas[-3]["erro"] == "Prato não encontrado" and linhas[-3]["vinhos"] == []
+    assert linhas[-2]["erro"] == "Mensagem vazia"
+    assert linhas[-1]["prato"] == "Salmão grelhado"
+
+    for linha in linhas[:len(PRATOS)]:
+        esperado = catalogo.recomendar(linha["prato"], 2, como_dataframe=False)
+        assert [(v["nome"], v["similaridade"]) for v in linha["vinhos"]] == \
+            [(v.vinho, v.similaridade_percentual) for v in esperado]
+        assert "justificativa" not in linha and "erro" not in linha
+
+
+def test_lote_com_justificativas(api_local, monkeypatch):
+    monkeypatch.setattr(api_local, "LOTE_JUSTIFICATIVAS_PENDENTES", 2)
+    original = api_local.gerar_justificativa_async
+    estado = {"em_andamento": 0, "maximo": 0}
+
+    async def contar(*args):
+        estado["em_andamento"] += 1
+        estado["maximo"] = max(estado["maximo"], estado["em_andamento"])
+        try:
+            return await original(*args)
+        finally:
+            estado["em_andamento"] -= 1
+
+    monkeypatch.setattr(api_local, "gerar_justificativa_async", contar)
+    fallbacks = total_fallbacks()
+    _, linhas = recomendar_lote(api_local, PRATOS + ['prato que não existe'], justificativa=True)
+
+    # Com justificativas, as linhas podem sair fora de ordem
+    assert sorted(linha["indice"] for linha in linhas) == list(range(len(PRATOS) + 1))
+    for linha in linhas:
+        if linha["prato"] is None:
+            assert "justificativa" not in linha
+        else:
+            assert linha["justificativa"].startswith(f"O {linha['vinhos'][0]['nome']} ")
+    assert estado["maximo"] == 2
+    assert total_fallbacks() == fallbacks
+
+
+def test_lote_com_falha_do_llm(api_local, lm_api):
+    lm_api(taxa_erro=1)
+    _, [linha] = recomendar_lote(api_local, ['Sushi'], justificativa=True)
+    assert linha["justificativa"] == api_local.justificativa_padrao(linha["vinhos"][0]["nome"], "Sushi")
+
+
+def test_lote_grande_demais(api_local, monkeypatch):
+    monkeypatch.setattr(api_local, "LOTE_MAX_ITENS", 3)
+    resposta, _ = recomendar_lote(api_local, PRATOS[:4])
+    assert resposta.status_code == 413
@@ -0,0 +1,97 @@
+"""
+Testes do endpoint SSE /api/recomendacao/stream
+Requisições pelo app ASGI com o LM local, que emite a justificativa em trechos
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from conftest import total_fallbacks
+from test_api_llm import assert_justificativas_do_llm, cliente_asgi
+
+
+def ler_eventos(texto: str) -> list:
+    """Converte o corpo text/event-stream em pares (evento, dados)"""
+    eventos = []
+    for bloco in texto.strip().split("\n\n"):
+        campos = dict(linha.split(": ", 1) for linha in bloco.splitlines())
+        eventos.append((campos["event"], json.loads(campos["data"])))
+    return eventos
+
+
+def recomendar_stream(api, mensagem: str) -> list:
+    async def requisitar():
+        async with cliente_asgi(api) as cliente:
+            resposta = await cliente.post("/api/recomendacao/stream", json={"mensagem": mensagem})
+        resposta.raise_for_status()
+        assert resposta.headers["content-type"].startswith("text/event-stream")
+        return ler_eventos(resposta.text)
+
+    return asyncio.run(requisitar())
+
+
+def test_stream_recomendacao_e_trechos(api_local):
+    fallbacks = total_fallbacks()
+    eventos = recomendar_stream(api_local, "Sushi")
+
+    nomes = [evento for evento, _ in eventos]
+    assert nomes[0] == "recomendacao" and nomes[-1] == "fim"
+    assert set(nomes[1:-1]) == {"justificativa"} and len(nomes) > 3
+
+    recomendacao, fim = eventos[0][1], eventos[-1][1]
+    assert recomendacao["prato"] == fim["prato"] == "Sushi"
+    assert fim["motivo"] is None
+    assert fim["justificativa"] == "".join(dados["texto"] for _, dados in eventos[1:-1])
+    assert fim["mensagem"] == recomendacao["mensagem"] + fim["justificativa"]
+    assert_justificativas_do_llm(api_local, [{**fim, "vinho": recomendacao["vinho"]}])
+    assert total_fallbacks() == fallbacks
+
+
+@pytest.mark.parametrize("motivo", ["timeout", "erro", "indisponivel"])
+def test_stream_usa_justificativa_padrao(api_local, lm_api, monkeypatch, motivo):
+    if motivo == "timeout":
+        lm_api(latencia_ms=500)
+        monkeypatch.setattr(api_local, "LLM_TIMEOUT_SEGUNDOS", 0.05)
+    elif motivo == "erro":
+        # O LM local falha no meio do stream, depois de enviar metade dos trechos
+        lm_api(taxa_erro=1)
+    else:
+        monkeypatch.setattr(api_local, "LLM_AVAILABLE", False)
+
+    fallbacks = total_fallbacks(motivo)
+    eventos = recomendar_stream(api_local, "Sushi")
+    recomendacao, fim = eventos[0][1], eventos[-1][1]
+
+    assert fim["motivo"] == motivo
+    assert fim["justificativa"] == api_local.justificativa_padrao(recomendacao["vinho"]["nome"], "Sushi")
+    assert total_fallbacks(motivo) == fallbacks + 1
+
+
+def test_stream_prato_nao_encontrado(api_local):
+    [(evento, dados)] = recomendar_stream(api_local, "prato que não existe")
+    assert evento == "fim"
+    assert dados["prato"] == ""
+
+
+def test_cliente_lento_nao_prende_vaga_do_llm(api_local, lm_api, monkeypatch):
+    # Uma única vaga: um cliente SSE parado no meio do stream não pode bloquear as demais justificativas
+    monkeypatch.setattr(api_local, "LLM_MAX_CONCURRENCIA", 1)
+
+    async def cenario():
+        eventos = api_local.eventos_recomendacao("Sushi")
+        assert (await eventos.__anext__()).startswith("event: recomendacao")
+        assert (await eventos.__anext__()).startswith("event: justificativa")
+        try:
+            async with cliente_asgi(api_local) as cliente:
+                resposta = await asyncio.wait_for(
+                    cliente.post("/api/recomendacao", json={"mensagem": "Ceviche"}), timeout=5
+                )
+        finally:
+            await eventos.aclose()
+        return resposta.json()
+
+    fallbacks = total_fallbacks()
+    assert_justificativas_do_llm(api_local, [asyncio.run(cenario())])
+    assert total_fallbacks() == fallbacks
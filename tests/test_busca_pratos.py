@@ -0,0 +1,138 @@
+"""
+Testes do índice de busca de pratos
+Compara DishSearchIndex com a busca original por varredura do DataFrame
+(nome exato, nome parcial, ingredientes), feita sobre os textos normalizados
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+import busca_pratos
+from busca_pratos import DishSearchIndex, normalizar_texto, tokenizar
+from gerar_catalogo import gerar_pratos
+
+
+def buscar_referencia(df, consulta):
+    """
+    Busca original (api.buscar_prato_no_csv), sem distinção de acentos e caixa.
+
+    Consultas sem nenhuma palavra (vazias ou só pontuação) não encontram pratos.
+    """
+    consulta = normalizar_texto(consulta)
+    if not tokenizar(consulta):
+        return None
+    nomes = df['nome_prato'].map(normalizar_texto)
+    ingredientes = df['ingredientes'].map(normalizar_texto)
+
+    for encontrados in (nomes == consulta, nomes.str.contains(consulta, regex=False),
+                        ingredientes.str.contains(consulta, regex=False)):
+        if encontrados.any():
+            return int(np.flatnonzero(encontrados.to_numpy())[0])
+    return None
+
+
+def consultas(df, quantidade=400, seed=0):
+    """Nomes inteiros, trechos de nomes e de ingredientes, variações de caixa/acento e consultas sem resultado"""
+    rng = np.random.default_rng(seed)
+    textos = df['nome_prato'].tolist() + df['ingredientes'].tolist()
+    yield from df['nome_prato']
+    yield from (nome.upper() for nome in df['nome_prato'])
+    for _ in range(quantidade):
+        texto = textos[rng.integers(len(textos))]
+        inicio = int(rng.integers(len(texto)))
+        yield texto[inicio:inicio + int(rng.integers(1, 12))]
+    yield from ['salmao', 'SALMÃO', 'file mignon', 'cogumelos', 'molho madeira', 'limão, ervas',
+                'xyz', 'chocolate amargo com pimenta', 'q', '  Sushi  ']
+    # N-gramas repetidos na consulta (inclusive sobrepostos)
+    yield from ['de de', 'de de de', 'ao molho ao', 'aaaa', 'ssss', 'o de o']
+
+
+@pytest.fixture(scope="module")
+def indice(df_pratos):
+    return DishSearchIndex.from_dataframe(df_pratos)
+
+
+def test_busca_igual_a_varredura(indice, df_pratos):
+    for consulta in consultas(df_pratos):
+        assert indice.buscar(consulta) == buscar_referencia(df_pratos, consulta), consulta
+
+
+def test_etapas_da_busca(indice, df_pratos):
+    linha_sushi = int(np.flatnonzero(df_pratos['nome_prato'] == 'Sushi')[0])
+    assert indice.buscar_nome_exato('sushi') == linha_sushi
+    assert indice.buscar_nome_exato('Sush') is None
+    assert indice.buscar_nome_parcial('Sush') == linha_sushi
+
+    linha_file = int(np.flatnonzero(df_pratos['nome_prato'] == 'Filé ao molho madeira')[0])
+    assert indice.buscar_nome_parcial('mignon') is None
+    assert indice.buscar_ingrediente('FILE MIGNON') == linha_file
+
+    assert indice.buscar('') is None
+    assert indice.buscar('   ') is None
+    assert indice.buscar(', ') is None
+    assert indice.buscar('ingrediente inexistente') is None
+
+
+def test_snapshot_do_indice(indice, df_pratos):
+    copia = DishSearchIndex.de_snapshot(indice.para_snapshot())
+    for consulta in consultas(df_pratos, quantidade=100, seed=1):
+        assert copia.buscar(consulta) == indice.buscar(consulta), consulta
+
+
+def test_buscar_prato_retorna_linha(catalogo):
+    prato = catalogo.buscar_prato('salmao grelhado')
+    assert prato == catalogo.df_pratos.iloc[catalogo.dados.busca.buscar('salmao grelhado')].to_dict()
+    assert prato['nome_prato'] == 'Salmão grelhado'
+    assert catalogo.buscar_prato('xyz') is None
+
+
+def test_cache_de_expansoes_entre_threads(df_pratos, monkeypatch):
+    # Cache mínimo: as threads inserem e descartam expansões o tempo todo
+    monkeypatch.setattr(busca_pratos, 'MAX_EXPANSOES_CACHE', 2)
+    indice = DishSearchIndex.from_dataframe(df_pratos)
+    palavras = sorted(set(' '.join(df_pratos['ingredientes'].map(normalizar_texto)).replace(',', ' ').split()))
+    esperado = {palavra: buscar_referencia(df_pratos, palavra) for palavra in palavras}
+    erros = []
+
+    def buscar():
+        try:
+            for _ in range(5):
+                for palavra in palavras:
+                    assert indice.buscar(palavra) == esperado[palavra], palavra
+        except Exception as e:  # noqa: BLE001 - repassado para a thread principal
+            erros.append(e)
+
+    threads = [threading.Thread(target=buscar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not erros
+    assert len(indice._cache_expansoes) <= 2
+
+
+class NomesContados(list):
+    """Lista de nomes que conta quantos foram lidos (um por candidato verificado)"""
+
+    lidos = 0
+
+    def __getitem__(self, posicao):
+        self.lidos += 1
+        return super().__getitem__(posicao)
+
+
+def test_busca_parcial_sem_resultado_verifica_poucos_candidatos():
+    df = gerar_pratos(20_000, np.random.default_rng(3))
+    indice = DishSearchIndex.from_dataframe(df)
+    indice.nomes_normalizados = NomesContados(indice.nomes_normalizados)
+
+    # Quase todo nome tem " de ", então os n-gramas simples não filtram nada
+    for consulta in ('de de de', 'e de de', 'de de de de'):
+        assert indice.buscar_nome_parcial(consulta) == buscar_referencia(df, consulta) is None
+    assert indice.nomes_normalizados.lidos < 100
+
+    nome = df['nome_prato'].iloc[-1]
+    assert indice.buscar_nome_parcial(nome) == buscar_referencia(df, nome)
@@ -0,0 +1,92 @@
+"""
+Testes do cache persistente de justificativas
+Cada teste usa um arquivo SQLite próprio em um diretório temporário
+"""
+
+import time
+
+import pytest
+
+import cache_justificativas
+import llm
+from cache_justificativas import JustificationCache, chave_justificativa
+from lm_local import criar_lm_local
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return JustificationCache(tmp_path / "justificativas.sqlite3", max_entradas=3, ttl_segundos=24 * 3600)
+
+
+def test_acerto_e_falha(cache):
+    assert cache.obter("a") is None
+    cache.guardar("a", "modelo", "texto a")
+    assert cache.obter("a") == "texto a"
+
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["acertos"], estatisticas["falhas"], estatisticas["entradas"]) == (1, 1, 1)
+    assert estatisticas["taxa_acerto"] == 0.5
+
+
+def test_chave_depende_dos_argumentos_e_do_modelo():
+    argumentos = {"nome_prato": "Sushi", "score": 91.5}
+    assert chave_justificativa(argumentos, "m1") == chave_justificativa(dict(reversed(argumentos.items())), "m1")
+    assert chave_justificativa(argumentos, "m1") != chave_justificativa(argumentos, "m2")
+    assert chave_justificativa(argumentos, "m1") != chave_justificativa({**argumentos, "score": 91.4}, "m1")
+
+
+def test_entradas_expiram(cache, monkeypatch):
+    cache.guardar("a", "modelo", "texto a")
+    agora = time.time()
+    monkeypatch.setattr(cache_justificativas.time, "time", lambda: agora + cache.ttl_segundos + 1)
+
+    assert cache.obter("a") is None
+    assert cache.evictar() == 1
+    assert len(cache) == 0
+
+
+def test_acerto_recente_nao_grava(cache):
+    cache.guardar("a", "modelo", "texto a")
+    conexao = cache._conexao()
+    alteracoes = conexao.total_changes
+
+    for _ in range(10):
+        assert cache.obter("a") == "texto a"
+    assert conexao.total_changes == alteracoes
+
+
+def test_evicta_as_menos_acessadas(cache, monkeypatch):
+    agora = time.time()
+    for i, chave in enumerate("abcd"):
+        monkeypatch.setattr(cache_justificativas.time, "time", lambda i=i: agora + i)
+        cache.guardar(chave, "modelo", f"texto {chave}")
+
+    # "a" volta a ser acessada depois do intervalo de atualização: a menos recente passa a ser "b"
+    monkeypatch.setattr(cache_justificativas.time, "time",
+                        lambda: agora + cache_justificativas.INTERVALO_ATUALIZACAO_ACESSO)
+    assert cache.obter("a") == "texto a"
+
+    assert cache.evictar() == 1
+    assert cache.obter("b") is None
+    assert [cache.obter(chave) for chave in "acd"] == ["texto a", "texto c", "texto d"]
+
+
+def test_cache_compartilhado_entre_conexoes(cache, tmp_path):
+    # Outro processo (worker) abre o mesmo arquivo
+    cache.guardar("a", "modelo", "texto a")
+    outro = JustificationCache(tmp_path / "justificativas.sqlite3")
+    assert outro.obter("a") == "texto a"
+
+
+def test_motor_le_do_cache(cache, monkeypatch):
+    monkeypatch.setattr(llm, "obter_cache_justificativas", lambda: cache)
+    motor = llm.JustificationEngine(criar_lm_local(latencia_ms=0, sigma=0, seed=1))
+    argumentos = ("Sushi", {"tipo_prato": "peixe", "acidez": "média"}, {"vinho": "Chablis", "tipo_vinho": "branco"})
+
+    justificativa = motor.gerar(*argumentos)
+    assert cache.estatisticas()["entradas"] == 1
+
+    # Com o LM falhando sempre, só o cache pode responder
+    motor.lm = criar_lm_local(latencia_ms=0, taxa_erro=1)
+    assert motor.gerar(*argumentos) == justificativa
+    assert cache.acertos == 1
@@ -0,0 +1,48 @@
+"""
+Testes do array estruturado de características dos vinhos
+Confere o array compilado e as colunas preparadas contra o dicionário caracteristicas_vinhos
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sistema_recomendacao_vinho as srv
+from sistema_recomendacao_vinho import (
+    COLUNAS_CARACTERISTICAS, array_caracteristicas, caracteristicas_dos_vinhos, caracteristicas_vinhos,
+    indice_caracteristicas, preparar_vinhos
+)
+
+
+def test_array_igual_ao_dicionario():
+    assert array_caracteristicas.dtype.itemsize == 4
+    assert list(indice_caracteristicas) == list(caracteristicas_vinhos)
+    for nome, caracteristicas in caracteristicas_vinhos.items():
+        linha = array_caracteristicas[indice_caracteristicas[nome]]
+        assert {campo: int(linha[campo]) for campo in linha.dtype.names} == caracteristicas
+
+
+def test_vinho_sem_caracteristicas():
+    with pytest.raises(KeyError, match="Vinho inventado"):
+        caracteristicas_dos_vinhos(['Merlot', 'Vinho inventado', 'Vinho inventado'])
+
+
+def test_preparar_vinhos_igual_ao_dicionario():
+    df_vinhos = pd.read_csv(srv.DIRETORIO_DADOS / 'vinhos.csv')
+    preparado = preparar_vinhos(df_vinhos)
+    assert 'acidez_vinho' not in df_vinhos.columns
+
+    for campo, coluna in COLUNAS_CARACTERISTICAS.items():
+        assert preparado[coluna].dtype == np.int8
+        assert preparado[coluna].tolist() == [caracteristicas_vinhos[nome][campo] for nome in df_vinhos['vinho']]
+
+
+def test_preparar_vinhos_mantem_colunas_do_csv():
+    # Catálogo sintético: SKUs sem entrada no dicionário, com as características no próprio CSV
+    df_vinhos = pd.DataFrame({
+        'vinho': ['SKU 1', 'SKU 2'], 'tipo_vinho': ['tinto seco', 'branco seco'],
+        'acidez_vinho': [1, 3], 'intensidade_vinho': [2, 2], 'docura': [1, 1], 'tanino': [3, 0]
+    })
+    preparado = preparar_vinhos(df_vinhos)
+    pd.testing.assert_frame_equal(preparado.astype(df_vinhos.dtypes), df_vinhos)
+    assert (preparado[list(COLUNAS_CARACTERISTICAS.values())].dtypes == np.int8).all()
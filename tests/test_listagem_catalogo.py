@@ -0,0 +1,138 @@
+"""
+Testes da listagem paginada do catálogo
+Percorre as páginas seguindo os cursores e compara com o fatiamento/filtro do DataFrame
+"""
+
+import asyncio
+
+import pytest
+
+from listagem_catalogo import LIMITE_MAXIMO, CatalogListing
+from test_api_llm import cliente_asgi
+
+
+def percorrer(listagem, campos, filtro=None, limite=7):
+    """Todas as páginas a partir do início, seguindo o cursor de cada uma"""
+    itens, cursor, totais = [], None, set()
+    while True:
+        total, pagina, cursor = listagem.pagina(campos, filtro=filtro, cursor=cursor, limite=limite)
+        totais.add(total)
+        assert len(pagina) <= limite
+        itens.extend(pagina)
+        if cursor is None:
+            return itens, totais
+
+
+def registros(df, campos):
+    return df[campos].to_dict(orient='records')
+
+
+@pytest.fixture(scope="module")
+def listagem(df_pratos):
+    return CatalogListing(df_pratos, 'tipo_prato')
+
+
+@pytest.mark.parametrize("limite", [1, 7, 100, 1000])
+def test_cursor_sem_filtro(listagem, df_pratos, limite):
+    campos = ['id_prato', 'nome_prato']
+    itens, totais = percorrer(listagem, campos, limite=limite)
+    assert totais == {len(df_pratos)}
+    assert itens == registros(df_pratos, campos)
+
+
+@pytest.mark.parametrize("filtro", ['peixe', 'carne vermelha', 'vegetariano', 'inexistente'])
+def test_cursor_com_filtro(listagem, df_pratos, filtro):
+    campos = ['nome_prato', 'tipo_prato', 'acidez']
+    esperado = registros(df_pratos[df_pratos['tipo_prato'] == filtro], campos)
+    itens, totais = percorrer(listagem, campos, filtro=filtro)
+    assert totais == {len(esperado)}
+    assert itens == esperado
+
+
+def test_offset(listagem, df_pratos):
+    campos = ['nome_prato']
+    _, itens, cursor = listagem.pagina(campos, offset=10, limite=5)
+    assert itens == registros(df_pratos.iloc[10:15], campos)
+    # O cursor continua a listagem do mesmo ponto que o offset seguinte
+    assert listagem.pagina(campos, cursor=cursor, limite=5)[1] == listagem.pagina(campos, offset=15, limite=5)[1]
+
+    peixes = df_pratos[df_pratos['tipo_prato'] == 'peixe']
+    _, itens, _ = listagem.pagina(campos, filtro='peixe', offset=2, limite=3)
+    assert itens == registros(peixes.iloc[2:5], campos)
+
+    assert listagem.pagina(campos, offset=len(df_pratos) + 10) == (len(df_pratos), [], None)
+
+
+def test_cursor_de_outra_listagem(listagem, df_pratos):
+    # Um cursor é uma linha do catálogo: vale mesmo se não pertencer ao filtro
+    peixes = df_pratos.reset_index(drop=True)
+    peixes = peixes[peixes['tipo_prato'] == 'peixe']
+    cursor = int(peixes.index[1]) - 1
+    _, itens, _ = listagem.pagina(['nome_prato'], filtro='peixe', cursor=cursor, limite=2)
+    assert itens == registros(peixes.iloc[1:3], ['nome_prato'])
+
+
+def test_limites(listagem, df_pratos):
+    assert len(listagem.pagina(['nome_prato'], limite=0)[1]) == 1
+    assert len(listagem.pagina(['nome_prato'], limite=LIMITE_MAXIMO * 10)[1]) == min(len(df_pratos), LIMITE_MAXIMO)
+
+
+def test_campos_invalidos(listagem):
+    with pytest.raises(ValueError, match='Campos desconhecidos: preco'):
+        listagem.pagina(['nome_prato', 'preco'])
+
+
+def test_valores_nulos_viram_none(df_pratos):
+    df = df_pratos.head(3).copy()
+    df.loc[1, 'temperos'] = None
+    listagem = CatalogListing(df, 'tipo_prato')
+    _, itens, _ = listagem.pagina(['temperos'])
+    assert itens[1] == {'temperos': None}
+
+
+def listar(api, caminho: str, **parametros) -> list:
+    """Respostas de GET caminho seguindo proximo_cursor até a última página"""
+    async def requisitar():
+        respostas = []
+        async with cliente_asgi(api) as cliente:
+            while True:
+                resposta = await cliente.get(caminho, params=parametros)
+                respostas.append(resposta)
+                cursor = resposta.json().get("proximo_cursor") if resposta.status_code == 200 else None
+                if cursor is None:
+                    return respostas
+                # A partir da primeira página, só o cursor (cursor e offset juntos são recusados)
+                parametros.pop("offset", None)
+                parametros["cursor"] = cursor
+
+    return asyncio.run(requisitar())
+
+
+def test_api_pratos_paginados(api_local, df_pratos):
+    respostas = listar(api_local, "/api/pratos", limite=30)
+    assert [r.status_code for r in respostas] == [200] * 4
+    assert {r.json()["total"] for r in respostas} == {len(df_pratos)}
+    assert [nome for r in respostas for nome in r.json()["pratos"]] == df_pratos['nome_prato'].tolist()
+
+    [resposta] = listar(api_local, "/api/pratos", campos="nome_prato,acidez", tipo_prato="peixe", limite=1000)
+    peixes = df_pratos[df_pratos['tipo_prato'] == 'peixe']
+    assert resposta.json()["pratos"] == registros(peixes, ['nome_prato', 'acidez'])
+
+
+def test_api_vinhos_paginados(api_local, catalogo):
+    respostas = listar(api_local, "/api/vinhos", offset=5, limite=3)
+    assert respostas[0].json()["vinhos"] == registros(catalogo.df_vinhos.iloc[5:8], ['vinho', 'tipo_vinho'])
+    # O cursor da página do offset continua a listagem até o fim
+    vinhos = [vinho for r in respostas for vinho in r.json()["vinhos"]]
+    assert vinhos == registros(catalogo.df_vinhos.iloc[5:], ['vinho', 'tipo_vinho'])
+
+
+@pytest.mark.parametrize("parametros", [
+    {"cursor": "abc"},
+    {"cursor": "3", "offset": 3},
+    {"campos": "nome_prato,preco"},
+    {"limite": LIMITE_MAXIMO + 1},
+])
+def test_api_parametros_invalidos(api_local, parametros):
+    [resposta] = listar(api_local, "/api/pratos", **parametros)
+    assert resposta.status_code in (400, 422)
@@ -0,0 +1,106 @@
+"""
+Testes das métricas no formato Prometheus e do endpoint /metrics
+"""
+
+import asyncio
+
+import pytest
+
+import metricas
+from metricas import MetricsRegistry
+from test_api_llm import cliente_asgi
+
+
+def valor(metrica, amostra: str) -> float:
+    """Valor de uma amostra (nome com rótulos formatados) de uma métrica, 0 se ainda não existir"""
+    return dict(metrica.amostras()).get(amostra, 0)
+
+
+def test_formato_de_exposicao():
+    registro = MetricsRegistry()
+    contador = registro.counter("teste_total", "Contador", ("rota",))
+    medidor = registro.gauge("teste_em_andamento", "Medidor")
+    histograma = registro.histogram("teste_segundos", "Histograma", buckets=(0.1, 1.0))
+    registro.gauge("teste_funcao", "Medidor calculado", ("tipo",), funcao=lambda: {("a",): 2})
+
+    contador.inc(rota='/a"b\\')
+    contador.inc(2, rota='/a"b\\')
+    with medidor.em_andamento():
+        assert valor(medidor, "teste_em_andamento") == 1
+    for duracao in (0.05, 0.1, 0.5, 3.0):
+        histograma.observar(duracao)
+
+    linhas = registro.expor().splitlines()
+    assert "# TYPE teste_total counter" in linhas
+    assert 'teste_total{rota="/a\\"b\\\\"} 3' in linhas
+    assert "teste_em_andamento 0" in linhas
+    assert 'teste_funcao{tipo="a"} 2' in linhas
+    # Faixas acumuladas; o limite é inclusivo
+    assert 'teste_segundos_bucket{le="0.1"} 2' in linhas
+    assert 'teste_segundos_bucket{le="1"} 3' in linhas
+    assert 'teste_segundos_bucket{le="+Inf"} 4' in linhas
+    assert "teste_segundos_sum 3.65" in linhas
+    assert "teste_segundos_count 4" in linhas
+
+
+def test_rotulos_e_nomes_validados():
+    registro = MetricsRegistry()
+    contador = registro.counter("teste_total", "Contador", ("rota",))
+    with pytest.raises(ValueError):
+        contador.inc(status=200)
+    with pytest.raises(ValueError):
+        registro.counter("teste_total", "Duplicado")
+
+
+def test_tempos_da_requisicao():
+    tempos = metricas.RequestTimings()
+    with tempos.ativar():
+        with metricas.medir_etapa("busca"):
+            pass
+        with pytest.raises(KeyError), metricas.medir_etapa("scoring"):
+            raise KeyError("falha")
+    with tempos.etapa("serializacao"):
+        pass
+
+    etapas = [parte.split(";")[0] for parte in tempos.server_timing().split(", ")]
+    assert etapas == ["busca", "scoring", "serializacao", "total"]
+    assert valor(metricas.etapa_erros, 'vinhos_etapa_erros_total{etapa="scoring"}') >= 1
+
+
+def test_endpoint_metrics(api_local):
+    rota = 'metodo="POST",rota="/api/recomendacao"'
+    requisicoes = f'vinhos_requisicoes_total{{{rota},status="200"}}'
+    antes = valor(metricas.requisicoes_total, requisicoes)
+    desconhecidas = valor(metricas.requisicoes_total,
+                          'vinhos_requisicoes_total{metodo="GET",rota="desconhecida",status="404"}')
+
+    async def requisitar():
+        async with cliente_asgi(api_local) as cliente:
+            await cliente.post("/api/recomendacao", json={"mensagem": "Sushi"})
+            await cliente.get("/rota/que/nao/existe")
+            return await cliente.get("/metrics")
+
+    resposta = asyncio.run(requisitar())
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/plain")
+    assert f"{requisicoes} {antes + 1}" in resposta.text.splitlines()
+    assert valor(metricas.requisicoes_total,
+                 'vinhos_requisicoes_total{metodo="GET",rota="desconhecida",status="404"}') == desconhecidas + 1
+    for etapa in ("busca", "scoring", "justificativa"):
+        assert f'vinhos_etapa_duracao_segundos_count{{etapa="{etapa}"}}' in resposta.text
+    assert "vinhos_catalogo_pratos " in resposta.text
+
+
+def test_duracao_do_stream_ate_o_ultimo_trecho(api_local, lm_api):
+    # O LM local espera 300 ms antes de emitir os trechos: a resposta começa antes disso,
+    # mas a duração registrada vai até o último trecho do corpo
+    lm_api(latencia_ms=300)
+    soma = 'vinhos_requisicao_duracao_segundos_sum{metodo="POST",rota="/api/recomendacao/stream"}'
+    antes = valor(metricas.requisicao_duracao, soma)
+
+    async def requisitar():
+        async with cliente_asgi(api_local) as cliente:
+            return await cliente.post("/api/recomendacao/stream", json={"mensagem": "Sushi"})
+
+    assert asyncio.run(requisitar()).status_code == 200
+    assert valor(metricas.requisicao_duracao, soma) - antes >= 0.3
@@ -0,0 +1,150 @@
+"""
+Testes do motor de justificativas (JustificationEngine) com o LM local
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import dspy
+import pytest
+
+import llm
+from lm_local import criar_lm_local
+from sistema_integrado import sistema_completo_com_justificativa
+
+CARACTERISTICAS = {"tipo_prato": "peixe", "temperos": "suave", "acidez": "média",
+                   "intensidade_sabor": "leve", "ingredientes": "arroz, peixe cru"}
+VINHOS = [{"vinho": f"Vinho {i}", "tipo_vinho": "branco", "similaridade_percentual": 90 - i,
+           "score_features": 80, "score_regras": 95} for i in range(12)]
+
+
+@pytest.fixture
+def motor():
+    motor = llm.JustificationEngine(criar_lm_local(latencia_ms=10, sigma=0, seed=1))
+    yield motor
+    motor.fechar()
+
+
+def test_motor_do_processo_criado_uma_vez(monkeypatch):
+    criados = []
+
+    def criar_lm():
+        criados.append(criar_lm_local(latencia_ms=0))
+        return criados[-1]
+
+    monkeypatch.setattr(llm, "_motor_padrao", None)
+    monkeypatch.setattr(llm, "criar_lm", criar_lm)
+    barreira = threading.Barrier(8)
+
+    def obter(_):
+        barreira.wait()
+        with dspy.context(lm=None):
+            return llm.obter_motor_justificativa()
+
+    with ThreadPoolExecutor(8) as executor:
+        motores = list(executor.map(obter, range(8)))
+
+    assert len(criados) == 1
+    assert all(m is motores[0] for m in motores)
+    assert motores[0].lm is criados[0]
+
+
+def test_motor_compartilhado_entre_threads(motor):
+    modulo = motor.modulo
+    esperado = [motor.gerar("Sushi", CARACTERISTICAS, vinho) for vinho in VINHOS]
+
+    with ThreadPoolExecutor(6) as executor:
+        obtido = list(executor.map(lambda vinho: motor.gerar("Sushi", CARACTERISTICAS, vinho), VINHOS))
+
+    assert obtido == esperado
+    assert all(f"O {vinho['vinho']} " in texto for vinho, texto in zip(VINHOS, obtido))
+    assert motor.modulo is modulo
+    # O LM vem de dspy.context em cada chamada, nunca da configuração global
+    assert dspy.settings.lm is None
+
+
+def test_sistema_integrado_nao_reconfigura_o_llm(catalogo, lm_api, monkeypatch, capsys):
+    def falhar(*args, **kwargs):
+        raise AssertionError("o LM não deve ser recriado a cada prato")
+
+    monkeypatch.setattr(llm, "criar_lm", falhar)
+    monkeypatch.setattr(llm, "configurar_llm", falhar)
+    motor = llm.obter_motor_justificativa()
+    for prato in ("Sushi", "Ceviche"):
+        assert len(sistema_completo_com_justificativa(prato, catalogo=catalogo)) == 3
+    assert llm.obter_motor_justificativa() is motor
+
+    saida = capsys.readouterr().out
+    assert saida.count("JUSTIFICATIVA DA HARMONIZAÇÃO") == 2
+    assert "Erro" not in saida
+
+
+def contar_simultaneas(motor, monkeypatch, falhar_em=None):
+    """Troca motor.gerar por uma versão que registra o máximo de chamadas simultâneas"""
+    original = motor.gerar
+    estado = {"em_andamento": 0, "maximo": 0}
+    lock = threading.Lock()
+
+    def gerar(nome_prato, caracteristicas_prato, vinho_info):
+        with lock:
+            estado["em_andamento"] += 1
+            estado["maximo"] = max(estado["maximo"], estado["em_andamento"])
+        try:
+            if vinho_info["vinho"] == falhar_em:
+                raise RuntimeError(f"falha em {falhar_em}")
+            return original(nome_prato, caracteristicas_prato, vinho_info)
+        finally:
+            with lock:
+                estado["em_andamento"] -= 1
+
+    monkeypatch.setattr(motor, "gerar", gerar)
+    return estado
+
+
+@pytest.mark.parametrize("max_concorrencia", [1, 3])
+def test_gerar_varios_em_ordem_e_com_limite(motor, monkeypatch, max_concorrencia):
+    esperado = [motor.gerar("Sushi", CARACTERISTICAS, vinho) for vinho in VINHOS]
+    estado = contar_simultaneas(motor, monkeypatch, falhar_em="Vinho 4")
+
+    resultados = motor.gerar_varios("Sushi", CARACTERISTICAS, VINHOS, max_concorrencia=max_concorrencia)
+
+    assert isinstance(resultados[4], RuntimeError)
+    assert resultados[:4] + resultados[5:] == esperado[:4] + esperado[5:]
+    assert estado["maximo"] == max_concorrencia
+
+
+def test_gerar_varios_leva_o_tempo_da_chamada_mais_lenta():
+    motor = llm.JustificationEngine(criar_lm_local(latencia_ms=200, sigma=0, seed=1))
+    try:
+        inicio = time.perf_counter()
+        assert len(motor.gerar_varios("Sushi", CARACTERISTICAS, VINHOS[:3], max_concorrencia=3)) == 3
+        assert time.perf_counter() - inicio < 0.45
+    finally:
+        motor.fechar()
+
+
+def test_gerar_varios_reaproveita_o_executor(motor, monkeypatch):
+    assert motor.gerar_varios("Sushi", CARACTERISTICAS, []) == []
+    motor.gerar_varios("Sushi", CARACTERISTICAS, VINHOS[:3])
+    executor = motor.executor
+
+    def criar_pool(*args, **kwargs):
+        raise AssertionError("gerar_varios não deve criar um pool por chamada")
+
+    monkeypatch.setattr(llm, "ThreadPoolExecutor", criar_pool)
+    motor.gerar_varios("Sushi", CARACTERISTICAS, VINHOS[:3])
+    assert motor.executor is executor
+
+    # Um executor externo (ex.: o pool de LLM da API) é usado no lugar do próprio
+    with ThreadPoolExecutor(2, thread_name_prefix="externo") as externo:
+        nomes = []
+        monkeypatch.setattr(motor, "gerar", lambda *args: nomes.append(threading.current_thread().name))
+        motor.gerar_varios("Sushi", CARACTERISTICAS, VINHOS[:4], executor=externo)
+    assert len(nomes) == 4 and all(nome.startswith("externo") for nome in nomes)
+
+
+def test_sistema_integrado_justifica_o_podio(catalogo, lm_api, capsys):
+    sistema_completo_com_justificativa("Sushi", justificar_todos=True, catalogo=catalogo)
+    saida = capsys.readouterr().out
+    assert saida.count("JUSTIFICATIVA DA HARMONIZAÇÃO") == 3
@@ -0,0 +1,277 @@
+"""
+Testes do motor de scoring
+Compara os motores vetorizados com o laço original (um vinho por vez) sobre os
+CSVs incluídos no repositório
+"""
+
+import asyncio
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sistema_recomendacao_vinho as srv
+from gerar_catalogo import gerar_catalogo
+from motor_recomendacao import (
+    DishProfileTable, GroupedWineScoringEngine, RecomendacaoVinho, WineScoringEngine, selecionar_top,
+    selecionar_top_lote
+)
+from sistema_recomendacao_vinho import (
+    WineCatalog, acidez_map, construir_motor, intensidade_map, recomendar_vinho, recomendar_vinho_por_atributos,
+    recomendar_vinhos_lote, tipo_map
+)
+from test_api_llm import cliente_asgi
+
+
+def recomendar_referencia(prato, df_vinhos, regras, top_n):
+    """Implementação original: similaridade de cosseno e regra calculadas vinho a vinho"""
+    features_prato = np.array([
+        acidez_map[prato['acidez']], intensidade_map[prato['intensidade_sabor']], tipo_map[prato['tipo_prato']]
+    ], dtype=np.float64)
+
+    resultados = []
+    for _, vinho in df_vinhos.iterrows():
+        features_vinho = np.array([vinho['acidez_vinho'], vinho['intensidade_vinho'], vinho['tanino']], dtype=np.float64)
+        normas = np.linalg.norm(features_prato) * np.linalg.norm(features_vinho)
+        similaridade = float(features_prato @ features_vinho / normas) if normas else 0.0
+        score_regra = regras.get((prato['tipo_prato'], vinho['tipo_vinho']), 0.5)
+        score_final = similaridade * 0.4 + score_regra * 0.6
+        resultados.append({
+            'vinho': vinho['vinho'],
+            'tipo_vinho': vinho['tipo_vinho'],
+            'score_final': round(score_final, 12),
+            'similaridade_percentual': round(score_final * 100, 2),
+            'score_features': round(similaridade * 100, 2),
+            'score_regras': round(score_regra * 100, 2)
+        })
+
+    # Ordenação estável: empates mantêm a ordem do catálogo
+    resultados = pd.DataFrame(resultados).sort_values('score_final', ascending=False, kind='stable')
+    return resultados.drop(columns='score_final').head(top_n)
+
+
+@pytest.fixture(scope="module")
+def regras_csv():
+    df = pd.read_csv(srv.CAMINHO_REGRAS_PADRAO)
+    return {(p, v): s for p, v, s in df[['tipo_prato', 'tipo_vinho', 'score']].itertuples(index=False)}
+
+
+@pytest.fixture(scope="module")
+def catalogo_sintetico(tmp_path_factory):
+    """Catálogo com muitos vinhos de mesmas características (empates em quase toda consulta)"""
+    diretorio = gerar_catalogo(tmp_path_factory.mktemp("sintetico"), n_pratos=300, n_vinhos=3000, seed=7)
+    return WineCatalog(diretorio).dados
+
+
+def assert_recomendacoes_iguais(obtido, esperado):
+    assert [r.vinho for r in obtido] == esperado['vinho'].tolist()
+    assert [r.tipo_vinho for r in obtido] == esperado['tipo_vinho'].tolist()
+    for coluna in ('similaridade_percentual', 'score_features', 'score_regras'):
+        # Os scores vetorizados podem diferir do laço na última casa decimal (arredondamento)
+        np.testing.assert_allclose([getattr(r, coluna) for r in obtido], esperado[coluna], atol=0.011)
+
+
+@pytest.mark.parametrize("tipo_motor", ["denso", "grupos"])
+@pytest.mark.parametrize("top_n", [1, 5, 28])
+def test_motor_igual_ao_laco_original(catalogo, regras_csv, tipo_motor, top_n):
+    dados = catalogo.dados
+    motor = construir_motor(dados.pratos, dados.df_vinhos, dados.regras, tipo_motor)
+
+    for linha, prato in dados.df_pratos.iterrows():
+        esperado = recomendar_referencia(prato, dados.df_vinhos, regras_csv, top_n)
+        assert_recomendacoes_iguais(motor.top_recomendacoes(motor.linha_prato(prato['nome_prato']), top_n), esperado)
+
+
+def test_recomendar_vinho_dataframe(catalogo, regras_csv):
+    prato = catalogo.prato('Sushi')
+    resultado = recomendar_vinho('Sushi', top_n=5, catalogo=catalogo)
+    esperado = recomendar_referencia(prato, catalogo.df_vinhos, regras_csv, 5)
+
+    assert list(resultado.columns) == list(esperado.columns)
+    assert resultado['vinho'].tolist() == esperado['vinho'].tolist()
+    # Indexado pela posição do vinho no catálogo, como o DataFrame original
+    assert resultado.index.tolist() == esperado.index.tolist()
+
+
+def test_prato_inexistente(catalogo):
+    assert recomendar_vinho('Prato que não existe', catalogo=catalogo) == \
+        "Prato 'Prato que não existe' não encontrado na base de dados."
+
+
+def test_selecionar_top_igual_argsort_estavel():
+    rng = np.random.default_rng(0)
+    for tamanho in (1, 7, 50, 1000):
+        # Poucos valores distintos: quase toda seleção corta no meio de um empate
+        scores = rng.integers(0, 4, tamanho).astype(np.float64)
+        for top_n in (0, 1, 3, 10, tamanho, tamanho + 5):
+            esperado = np.argsort(-scores, kind='stable')[:top_n]
+            np.testing.assert_array_equal(selecionar_top(scores, top_n), esperado)
+
+
+def test_selecionar_top_lote_igual_argsort_estavel():
+    rng = np.random.default_rng(1)
+    scores = rng.integers(0, 3, (40, 200)).astype(np.float64)
+    scores[::5] = 1.0  # linhas inteiras empatadas
+    for top_n in (0, 1, 5, 199, 200, 250):
+        esperado = np.argsort(-scores, axis=1, kind='stable')[:, :top_n]
+        np.testing.assert_array_equal(selecionar_top_lote(scores, top_n), esperado)
+        for i in range(len(scores)):
+            np.testing.assert_array_equal(selecionar_top(scores[i], top_n), esperado[i])
+
+
+def test_recomendacao_vinho_leve(catalogo):
+    [recomendacao] = recomendar_vinho('Sushi', top_n=1, catalogo=catalogo, como_dataframe=False)
+    assert type(recomendacao) is RecomendacaoVinho
+    assert all(type(getattr(recomendacao, campo)) is float
+               for campo in ('similaridade_percentual', 'score_features', 'score_regras'))
+
+    df = recomendar_vinho('Sushi', top_n=1, catalogo=catalogo)
+    assert recomendacao._asdict() == df.iloc[0].to_dict()
+
+
+@pytest.mark.parametrize("top_n", [1, 5, 40, 3000])
+def test_motor_grupos_igual_ao_denso(catalogo_sintetico, top_n):
+    dados = catalogo_sintetico
+    denso = WineScoringEngine.construir(dados.pratos, dados.df_vinhos, dados.regras)
+    grupos = GroupedWineScoringEngine.construir(dados.pratos, dados.df_vinhos, dados.regras)
+    assert grupos.score_final.shape[1] < denso.score_final.shape[1]
+
+    for linha in range(0, len(dados.pratos), 7):
+        np.testing.assert_array_equal(grupos.top_indices(linha, top_n), denso.top_indices(linha, top_n))
+        assert grupos.top_recomendacoes(linha, top_n) == denso.top_recomendacoes(linha, top_n)
+
+    linhas = list(range(0, len(dados.pratos), 11))
+    pd.testing.assert_frame_equal(grupos.top_vinhos_lote(linhas, top_n), denso.top_vinhos_lote(linhas, top_n))
+
+
+@pytest.mark.parametrize("tipo_motor", ["denso", "grupos"])
+def test_lote_igual_a_consultas_individuais(catalogo_sintetico, tipo_motor):
+    dados = catalogo_sintetico
+    motor = construir_motor(dados.pratos, dados.df_vinhos, dados.regras, tipo_motor)
+    linhas = list(range(0, len(dados.pratos), 13))
+
+    lote = motor.top_recomendacoes_lote(linhas, 5)
+    assert lote == [motor.top_recomendacoes(linha, 5) for linha in linhas]
+
+    df_lote = motor.top_vinhos_lote(linhas, 5)
+    assert df_lote['vinho'].tolist() == [r.vinho for recomendacoes in lote for r in recomendacoes]
+    assert df_lote['posicao'].tolist() == [1, 2, 3, 4, 5] * len(linhas)
+
+
+def test_recomendar_vinhos_lote(catalogo):
+    nomes = ['Sushi', 'Prato que não existe', 'Filé ao molho madeira']
+
+    resultado = recomendar_vinhos_lote(nomes, top_n=3, catalogo=catalogo)
+    assert resultado.attrs['pratos_nao_encontrados'] == ['Prato que não existe']
+    assert resultado['nome_prato'].tolist() == ['Sushi'] * 3 + ['Filé ao molho madeira'] * 3
+
+    listas = recomendar_vinhos_lote(nomes, top_n=3, catalogo=catalogo, como_dataframe=False)
+    assert listas[1] is None
+    assert listas[0] == recomendar_vinho('Sushi', top_n=3, catalogo=catalogo, como_dataframe=False)
+    assert listas[2] == recomendar_vinho('Filé ao molho madeira', top_n=3, catalogo=catalogo, como_dataframe=False)
+
+    # Bases avulsas, com os mesmos nomes de argumentos de recomendar_vinho
+    avulso = recomendar_vinhos_lote(['Sushi'], 2, df_pratos=catalogo.df_pratos, df_vinhos=catalogo.df_vinhos)
+    assert avulso['vinho'].tolist() == resultado['vinho'].tolist()[:2]
+
+
+@pytest.mark.parametrize("top_n", [5, 15])
+def test_atributos_igual_ao_prato_do_catalogo(catalogo, top_n):
+    # top_n=15 passa de TOP_PERFIL e calcula a linha do perfil na hora
+    for prato in catalogo.df_pratos.itertuples(index=False):
+        por_atributos = recomendar_vinho_por_atributos(
+            prato.tipo_prato, prato.acidez, prato.intensidade_sabor, prato.temperos,
+            top_n=top_n, catalogo=catalogo, como_dataframe=False
+        )
+        assert por_atributos == recomendar_vinho(prato.nome_prato, top_n=top_n, catalogo=catalogo, como_dataframe=False)
+        assert all(isinstance(r, RecomendacaoVinho) for r in por_atributos)
+
+
+def test_atributos_dataframe(catalogo):
+    resultado = recomendar_vinho_por_atributos('peixe', 'alta', 'média', top_n=3, catalogo=catalogo)
+    assert len(resultado) == 3
+    assert resultado['vinho'].tolist() == [
+        r.vinho for r in recomendar_vinho_por_atributos('peixe', 'alta', 'média', top_n=3, catalogo=catalogo,
+                                                        como_dataframe=False)
+    ]
+
+
+@pytest.mark.parametrize("atributos", [
+    ('sobremesa', 'alta', 'média', None),
+    ('peixe', 'altíssima', 'média', None),
+    ('peixe', 'alta', 'forte demais', None),
+    ('peixe', 'alta', 'média', 'inexistente'),
+])
+def test_atributos_invalidos(catalogo, atributos):
+    with pytest.raises(ValueError):
+        recomendar_vinho_por_atributos(*atributos, catalogo=catalogo)
+
+
+def test_endpoint_atributos(api_local, diretorio_catalogo, monkeypatch):
+    catalogo = WineCatalog(diretorio_catalogo)
+    catalogo.carregar()
+    monkeypatch.setattr(api_local, "catalogo", catalogo)
+    construir = DishProfileTable.construir
+    threads = []
+
+    def construir_registrando(*args):
+        threads.append(threading.current_thread())
+        return construir(*args)
+
+    monkeypatch.setattr(DishProfileTable, "construir", construir_registrando)
+
+    async def requisitar():
+        async with cliente_asgi(api_local) as cliente:
+            respostas = [
+                await cliente.post("/api/recomendacao/atributos", json={
+                    "tipo_prato": "peixe", "acidez": "alta", "intensidade_sabor": "média", "top_n": 3
+                })
+                for _ in range(2)
+            ]
+            invalida = await cliente.post("/api/recomendacao/atributos", json={
+                "tipo_prato": "sobremesa", "acidez": "alta", "intensidade_sabor": "média"
+            })
+        return respostas, invalida
+
+    respostas, invalida = asyncio.run(requisitar())
+    esperado = recomendar_vinho_por_atributos('peixe', 'alta', 'média', top_n=3, catalogo=catalogo,
+                                              como_dataframe=False)
+    for resposta in respostas:
+        assert [v["nome"] for v in resposta.json()["vinhos"]] == [r.vinho for r in esperado]
+    assert invalida.status_code == 400
+    # A tabela de perfis é montada uma vez, fora da thread do event loop
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
+
+
+def test_catalogo_avulso_reaproveitado(df_pratos):
+    df_vinhos = pd.read_csv(srv.DIRETORIO_DADOS / 'vinhos.csv')
+
+    primeiro = srv._resolver_catalogo(df_pratos=df_pratos, df_vinhos=df_vinhos)
+    assert srv._resolver_catalogo(df_pratos=df_pratos, df_vinhos=df_vinhos) is primeiro
+
+    outro = srv._resolver_catalogo(df_pratos=df_pratos.head(10), df_vinhos=df_vinhos)
+    assert outro is not primeiro
+    assert len(outro.df_pratos) == 10
+
+    # Vinhos sem as colunas de características são preparados na construção do catálogo
+    assert recomendar_vinho('Sushi', df_pratos, df_vinhos, top_n=2).shape == (2, 5)
+
+
+def test_catalogo_avulso_alterado_no_lugar(df_pratos):
+    df_pratos = df_pratos.copy()
+    df_vinhos = pd.read_csv(srv.DIRETORIO_DADOS / 'vinhos.csv')
+    antes = recomendar_vinho('Sushi', df_pratos, df_vinhos, top_n=3)
+    catalogo = srv._resolver_catalogo(df_pratos=df_pratos, df_vinhos=df_vinhos)
+
+    # Texto fora das colunas da recomendação: o catálogo continua valendo
+    df_pratos.loc[df_pratos['nome_prato'] == 'Sushi', 'ingredientes'] = 'arroz'
+    assert srv._resolver_catalogo(df_pratos=df_pratos, df_vinhos=df_vinhos) is catalogo
+
+    # Mesmo formato, outro conteúdo: o resultado acompanha as edições
+    df_vinhos['tipo_vinho'] = df_vinhos['tipo_vinho'].iloc[::-1].to_numpy()
+    df_pratos.loc[df_pratos['nome_prato'] == 'Sushi', 'tipo_prato'] = 'carne vermelha'
+    depois = recomendar_vinho('Sushi', df_pratos, df_vinhos, top_n=3)
+    assert srv._resolver_catalogo(df_pratos=df_pratos, df_vinhos=df_vinhos) is not catalogo
+    pd.testing.assert_frame_equal(depois, recomendar_vinho('Sushi', df_pratos.copy(), df_vinhos.copy(), top_n=3))
+    assert not depois.equals(antes)
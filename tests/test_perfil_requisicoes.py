@@ -0,0 +1,84 @@
+"""
+Testes do perfil sob demanda (cProfile) e do cabeçalho Server-Timing
+"""
+
+import asyncio
+import pstats
+from pathlib import Path
+
+import pytest
+
+import perfil_requisicoes
+from perfil_requisicoes import perfilar
+from test_api_llm import cliente_asgi
+
+
+def test_perfil_gravado_so_em_gravar(tmp_path):
+    with perfilar("teste", diretorio=tmp_path) as captura:
+        sum(range(1000))
+    assert captura.arquivo.endswith("-teste.prof")
+    assert not list(tmp_path.iterdir())
+
+    captura.gravar()
+    assert pstats.Stats(captura.arquivo).total_calls > 0
+    assert "cumulative" in Path(captura.arquivo).with_suffix(".txt").read_text(encoding="utf-8")
+    # Uma segunda gravação não faz nada
+    captura.gravar()
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_um_perfil_por_vez(tmp_path):
+    with perfilar("externo", diretorio=tmp_path) as externo:
+        with perfilar("interno", diretorio=tmp_path) as interno:
+            pass
+    assert interno.arquivo is None
+    interno.gravar()
+    assert externo.arquivo is not None
+    assert not list(tmp_path.iterdir())
+
+
+def test_server_timing(api_local):
+    async def requisitar():
+        async with cliente_asgi(api_local) as cliente:
+            return await cliente.post("/api/recomendacao", json={"mensagem": "Sushi"}, headers={"X-Perfil": "1"})
+
+    resposta = asyncio.run(requisitar())
+    etapas = [parte.split(";")[0] for parte in resposta.headers["Server-Timing"].split(", ")]
+    assert etapas == ["busca", "scoring", "llm", "serializacao", "total"]
+    # Perfil desabilitado (padrão): o cabeçalho X-Perfil é ignorado
+    assert "X-Perfil" not in resposta.headers
+
+
+@pytest.fixture
+def api_perfil(api_local, monkeypatch, tmp_path):
+    monkeypatch.setattr(api_local, "PERFIL_HABILITADO", True)
+    monkeypatch.setattr(api_local, "ADMIN_TOKEN", "segredo")
+    monkeypatch.setattr(perfil_requisicoes, "PERFIL_DIRETORIO", str(tmp_path))
+    return api_local
+
+
+def test_perfil_exige_token(api_perfil, tmp_path):
+    async def requisitar():
+        async with cliente_asgi(api_perfil) as cliente:
+            return await cliente.post("/api/recomendacao", json={"mensagem": "Sushi"},
+                                      headers={"X-Perfil": "1", "X-Admin-Token": "errado"})
+
+    assert "X-Perfil" not in asyncio.run(requisitar()).headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_perfil_gravado_depois_da_resposta(api_perfil, tmp_path):
+    async def recomendar():
+        resposta = await api_perfil.recomendar(
+            api_perfil.RecomendacaoRequest(mensagem="Sushi"), x_perfil="1", x_admin_token="segredo"
+        )
+        # A resposta sai antes de os arquivos serem escritos (tarefa de fundo)
+        gravados = list(tmp_path.iterdir())
+        await resposta.background()
+        return resposta, gravados
+
+    resposta, gravados_antes = asyncio.run(recomendar())
+    assert gravados_antes == []
+    arquivo = tmp_path / resposta.headers["X-Perfil"]
+    assert arquivo.exists() and arquivo.with_suffix(".txt").exists()
+    assert pstats.Stats(str(arquivo)).total_calls > 0
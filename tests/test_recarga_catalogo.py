@@ -0,0 +1,117 @@
+"""
+Testes da recarga do catálogo a quente
+Alteram os CSVs de uma cópia do catálogo e conferem a troca atômica dos dados
+"""
+
+import asyncio
+import threading
+
+import pandas as pd
+import pytest
+
+from sistema_recomendacao_vinho import WineCatalog
+from test_api_llm import cliente_asgi
+
+
+def adicionar_prato(diretorio, nome: str) -> None:
+    caminho = diretorio / 'pratos.csv'
+    df_pratos = pd.read_csv(caminho)
+    novo = df_pratos.iloc[[0]].assign(id_prato=len(df_pratos) + 1, nome_prato=nome)
+    pd.concat([df_pratos, novo]).to_csv(caminho, index=False)
+
+
+def test_recarregar_se_alterado(diretorio_catalogo):
+    catalogo = WineCatalog(diretorio_catalogo)
+    antigos = catalogo.dados
+    assert not catalogo.recarregar_se_alterado()
+
+    adicionar_prato(diretorio_catalogo, 'Prato novo')
+    assert catalogo.recarregar_se_alterado()
+    assert catalogo.dados is not antigos
+    assert catalogo.prato('Prato novo') is not None
+    # Quem já tinha os dados antigos (uma requisição em andamento) continua com uma versão consistente
+    assert antigos.prato('Prato novo') is None
+    assert antigos.recomendar('Sushi', 1, como_dataframe=False)
+    assert not catalogo.recarregar_se_alterado()
+
+
+def test_falha_na_recarga_mantem_os_dados(diretorio_catalogo):
+    catalogo = WineCatalog(diretorio_catalogo)
+    dados = catalogo.dados
+    (diretorio_catalogo / 'pratos.csv').write_text("coluna\n1\n", encoding="utf-8")
+
+    with pytest.raises(Exception):
+        catalogo.recarregar_se_alterado()
+    assert catalogo.dados is dados
+
+
+def test_recomendacoes_durante_recargas(diretorio_catalogo):
+    catalogo = WineCatalog(diretorio_catalogo)
+    esperado = catalogo.recomendar('Sushi', 3, como_dataframe=False)
+    erros = []
+    parar = threading.Event()
+
+    def recomendar():
+        try:
+            while not parar.is_set():
+                assert catalogo.recomendar('Sushi', 3, como_dataframe=False) == esperado
+        except Exception as e:  # noqa: BLE001 - repassado para a thread principal
+            erros.append(e)
+
+    threads = [threading.Thread(target=recomendar) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(5):
+        catalogo.recarregar()
+    parar.set()
+    for thread in threads:
+        thread.join()
+    assert not erros
+
+
+@pytest.fixture
+def api_recarga(api_local, diretorio_catalogo, monkeypatch):
+    catalogo = WineCatalog(diretorio_catalogo)
+    catalogo.carregar()
+    monkeypatch.setattr(api_local, "catalogo", catalogo)
+    return api_local
+
+
+def test_endpoint_de_recarga(api_recarga, diretorio_catalogo, monkeypatch):
+    monkeypatch.setattr(api_recarga, "ADMIN_TOKEN", "segredo")
+    total = len(api_recarga.catalogo.df_pratos)
+    adicionar_prato(diretorio_catalogo, 'Prato novo')
+
+    async def requisitar():
+        async with cliente_asgi(api_recarga) as cliente:
+            negada = await cliente.post("/admin/catalogo/recarregar", headers={"X-Admin-Token": "errado"})
+            aceita = await cliente.post("/admin/catalogo/recarregar", headers={"X-Admin-Token": "segredo"})
+            (diretorio_catalogo / 'pratos.csv').write_text("coluna\n1\n", encoding="utf-8")
+            falha = await cliente.post("/admin/catalogo/recarregar", headers={"X-Admin-Token": "segredo"})
+            saude = await cliente.get("/health")
+        return negada, aceita, falha, saude
+
+    negada, aceita, falha, saude = asyncio.run(requisitar())
+    assert negada.status_code == 403
+    assert aceita.json() == {"status": "recarregado", "pratos": total + 1, "vinhos": len(api_recarga.catalogo.df_vinhos)}
+    # A versão atual continua servindo depois de uma recarga com erro
+    assert falha.status_code == 500
+    assert saude.json()["database"]["pratos"] == total + 1
+
+
+def test_vigia_recarrega_o_catalogo(api_recarga, diretorio_catalogo, monkeypatch):
+    monkeypatch.setattr(api_recarga, "CATALOGO_RECARGA_INTERVALO", 0.01)
+    adicionar_prato(diretorio_catalogo, 'Prato novo')
+
+    async def vigiar():
+        vigia = asyncio.create_task(api_recarga.vigiar_catalogo())
+        try:
+            for _ in range(200):
+                await asyncio.sleep(0.01)
+                if api_recarga.catalogo.prato('Prato novo') is not None:
+                    return True
+            return False
+        finally:
+            vigia.cancel()
+
+    assert asyncio.run(vigiar())
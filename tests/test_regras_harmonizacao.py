@@ -0,0 +1,76 @@
+"""
+Testes da tabela densa de regras de harmonização
+Confere regras_harmonizacao.csv contra o dicionário que ficava no código
+"""
+
+import numpy as np
+import pandas as pd
+
+from motor_recomendacao import SCORE_REGRA_PADRAO, HarmonizationRules
+from sistema_recomendacao_vinho import CAMINHO_REGRAS_PADRAO, WineCatalog
+
+# Regras originais de sistema_recomendacao_vinho.py, antes da migração para o CSV
+REGRAS_ORIGINAIS = {
+    'carne vermelha': {
+        'tinto seco': 1.0, 'tinto suave': 0.8, 'tinto leve': 0.7, 'tinto frutado': 0.8, 'branco seco': 0.3,
+        'branco doce': 0.2, 'branco aromático': 0.3, 'rosé seco': 0.4, 'espumante': 0.3, 'licoroso': 0.2
+    },
+    'carne branca': {
+        'branco seco': 0.9, 'tinto suave': 0.7, 'tinto leve': 0.8, 'tinto seco': 0.5, 'branco doce': 0.6,
+        'branco aromático': 0.7, 'rosé seco': 0.8, 'espumante': 0.7, 'tinto frutado': 0.6, 'licoroso': 0.3
+    },
+    'peixe': {
+        'branco seco': 1.0, 'branco doce': 0.6, 'branco aromático': 0.8, 'tinto suave': 0.3, 'tinto leve': 0.4,
+        'tinto seco': 0.2, 'rosé seco': 0.7, 'espumante': 0.8, 'tinto frutado': 0.3, 'licoroso': 0.7
+    },
+    'vegetariano': {
+        'branco seco': 0.8, 'branco doce': 0.7, 'branco aromático': 0.7, 'tinto suave': 0.6, 'tinto leve': 0.7,
+        'tinto seco': 0.5, 'rosé seco': 0.8, 'espumante': 0.9, 'tinto frutado': 0.6, 'licoroso': 0.4
+    },
+    'frutos do mar': {
+        'branco seco': 1.0, 'branco aromático': 0.8, 'branco doce': 0.5, 'rosé seco': 0.7, 'espumante': 0.9,
+        'tinto leve': 0.3, 'tinto suave': 0.3, 'tinto seco': 0.2, 'tinto frutado': 0.3, 'licoroso': 0.6
+    }
+}
+
+
+def test_csv_igual_ao_dicionario_original():
+    regras = HarmonizationRules.from_csv(CAMINHO_REGRAS_PADRAO)
+    assert regras.para_dict() == REGRAS_ORIGINAIS
+    for tipo_prato, scores in REGRAS_ORIGINAIS.items():
+        for tipo_vinho, score in scores.items():
+            assert regras.score(tipo_prato, tipo_vinho) == score
+
+
+def test_tipos_desconhecidos_recebem_o_padrao():
+    regras = HarmonizationRules.from_dict({'peixe': {'branco seco': 1.0}, 'carne vermelha': {'tinto seco': 0.9}})
+    assert regras.score('peixe', 'tinto seco') == SCORE_REGRA_PADRAO
+    assert regras.score('sobremesa', 'branco seco') == SCORE_REGRA_PADRAO
+    assert regras.score('peixe', 'sake') == SCORE_REGRA_PADRAO
+
+    tabela = regras.tabela(['peixe', 'sobremesa', 'carne vermelha'], ['branco seco', 'sake', 'tinto seco'])
+    np.testing.assert_array_equal(tabela, [[1.0, 0.5, 0.5], [0.5, 0.5, 0.5], [0.5, 0.5, 0.9]])
+
+
+def test_par_repetido_vale_a_ultima_linha():
+    df = pd.DataFrame([('peixe', 'branco seco', 0.1), ('peixe', 'branco seco', 0.9)],
+                      columns=['tipo_prato', 'tipo_vinho', 'score'])
+    assert HarmonizationRules.from_dataframe(df).score('peixe', 'branco seco') == 0.9
+
+
+def test_regras_do_diretorio_do_catalogo(diretorio_catalogo):
+    catalogo = WineCatalog(diretorio_catalogo)
+    assert catalogo.dados.regras.para_dict() == REGRAS_ORIGINAIS
+    antes = catalogo.recomendar('Sushi', 1, como_dataframe=False)
+
+    # Editar as regras do catálogo invalida os dados carregados
+    caminho = diretorio_catalogo / 'regras_harmonizacao.csv'
+    df = pd.read_csv(caminho)
+    df.loc[df['tipo_prato'] == 'peixe', 'score'] = 0.0
+    df.loc[(df['tipo_prato'] == 'peixe') & (df['tipo_vinho'] == 'tinto seco'), 'score'] = 1.0
+    df.to_csv(caminho, index=False)
+
+    assert catalogo.recarregar_se_alterado()
+    [depois] = catalogo.recomendar('Sushi', 1, como_dataframe=False)
+    assert depois.tipo_vinho == 'tinto seco'
+    assert depois != antes[0]
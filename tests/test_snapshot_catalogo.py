@@ -0,0 +1,126 @@
+"""
+Testes do snapshot binário do catálogo
+Gera o snapshot a partir dos CSVs, recarrega-o mapeado em memória e confere que
+recomendações e buscas são as mesmas da leitura dos CSVs
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sistema_recomendacao_vinho as srv
+from motor_recomendacao import GroupedWineScoringEngine, WineScoringEngine
+from snapshot_catalogo import ARQUIVO_MANIFESTO, carregar_snapshot, ler_manifesto, salvar_snapshot
+from sistema_recomendacao_vinho import WineCatalog
+
+CONSULTAS = ['Sushi', 'sush', 'salmao', 'FILE MIGNON', 'cogumelos', 'xyz']
+
+
+def test_textos_com_nulos_e_separador(tmp_path):
+    textos = ['abc', None, '', 'com\x00nul', float('nan'), 'ação']
+    partes = {'inteiros': np.arange(5, dtype=np.int32), 'textos': textos, 'vazio': []}
+    salvar_snapshot(tmp_path / 'snapshot', partes, {'origem': 'teste'})
+
+    lidas, manifesto = carregar_snapshot(tmp_path / 'snapshot')
+    assert manifesto['origem'] == 'teste'
+    assert isinstance(lidas['inteiros'], np.memmap)
+    np.testing.assert_array_equal(lidas['inteiros'], partes['inteiros'])
+    assert lidas['textos'] == ['abc', None, '', 'com\x00nul', None, 'ação']
+    assert lidas['vazio'] == []
+
+
+def test_snapshot_inexistente(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        carregar_snapshot(tmp_path)
+
+
+@pytest.mark.parametrize("tipo_motor, classe_motor", [
+    ("denso", WineScoringEngine),
+    ("grupos", GroupedWineScoringEngine),
+])
+def test_snapshot_ida_e_volta(diretorio_catalogo, monkeypatch, tipo_motor, classe_motor):
+    monkeypatch.setattr(srv, 'MOTOR_CATALOGO', tipo_motor)
+    original = WineCatalog(diretorio_catalogo)
+    original.gerar_snapshot()
+    assert not original.dados.mapeado
+    assert original.snapshot_valido()
+
+    mapeado = WineCatalog(diretorio_catalogo)
+    dados = mapeado.dados
+    assert dados.mapeado
+    assert type(dados.motor) is classe_motor
+    assert isinstance(dados.motor.score_final, np.memmap)
+
+    pd.testing.assert_frame_equal(dados.df_pratos, original.df_pratos)
+    pd.testing.assert_frame_equal(dados.df_vinhos, original.df_vinhos)
+
+    nomes = original.df_pratos['nome_prato'].tolist()
+    for nome in nomes:
+        assert mapeado.recomendar(nome, 5, como_dataframe=False) == original.recomendar(nome, 5, como_dataframe=False)
+    pd.testing.assert_frame_equal(mapeado.recomendar_lote(nomes, 3), original.recomendar_lote(nomes, 3))
+    assert mapeado.recomendar_por_atributos('peixe', 'alta', 'média', como_dataframe=False) == \
+        original.recomendar_por_atributos('peixe', 'alta', 'média', como_dataframe=False)
+    for consulta in CONSULTAS:
+        assert mapeado.buscar_prato(consulta) == original.buscar_prato(consulta)
+
+
+def test_snapshot_desatualizado(diretorio_catalogo):
+    WineCatalog(diretorio_catalogo).gerar_snapshot()
+    catalogo = WineCatalog(diretorio_catalogo)
+    assert catalogo.dados.mapeado
+
+    # Só o mtime mudou (ex.: arquivos copiados no deploy): o hash confirma que o snapshot vale
+    caminho_pratos = diretorio_catalogo / 'pratos.csv'
+    os.utime(caminho_pratos, ns=(0, 0))
+    assert catalogo.snapshot_valido()
+    assert WineCatalog(diretorio_catalogo).dados.mapeado
+
+    df_pratos = pd.read_csv(caminho_pratos)
+    novo = df_pratos.iloc[[0]].assign(id_prato=len(df_pratos) + 1, nome_prato='Prato novo')
+    pd.concat([df_pratos, novo]).to_csv(caminho_pratos, index=False)
+
+    assert not catalogo.snapshot_valido()
+    assert catalogo.desatualizado()
+    assert catalogo.recarregar_se_alterado()
+    assert not catalogo.dados.mapeado
+    assert catalogo.prato('Prato novo') is not None
+
+
+def test_snapshot_de_outra_versao_e_ignorado(diretorio_catalogo):
+    original = WineCatalog(diretorio_catalogo)
+    original.gerar_snapshot()
+    caminho = original.diretorio_snapshot / ARQUIVO_MANIFESTO
+    manifesto = json.loads(caminho.read_text(encoding='utf-8'))
+    caminho.write_text(json.dumps({**manifesto, 'versao': manifesto['versao'] - 1}), encoding='utf-8')
+
+    assert ler_manifesto(caminho.parent) is None
+    catalogo = WineCatalog(diretorio_catalogo)
+    assert not catalogo.snapshot_valido()
+    assert not catalogo.dados.mapeado
+    assert catalogo.prato('Sushi') is not None
+
+
+def test_garantir_snapshot_nao_mantem_dados(diretorio_catalogo):
+    catalogo = WineCatalog(diretorio_catalogo)
+    manifesto = catalogo.garantir_snapshot()
+    assert manifesto is not None
+    assert not catalogo.carregado
+    assert catalogo.dados.mapeado
+
+    # Um snapshot atualizado não é regravado (vários processos podem chamar antes de subir)
+    caminho_manifesto = catalogo.diretorio_snapshot / ARQUIVO_MANIFESTO
+    gravado_em = caminho_manifesto.stat().st_mtime_ns
+    assert WineCatalog(diretorio_catalogo).garantir_snapshot() == manifesto
+    assert caminho_manifesto.stat().st_mtime_ns == gravado_em
+
+
+def test_workers_mapeiam_os_mesmos_arquivos(diretorio_catalogo):
+    WineCatalog(diretorio_catalogo).garantir_snapshot()
+    primeiro, segundo = WineCatalog(diretorio_catalogo).dados, WineCatalog(diretorio_catalogo).dados
+
+    matrizes = (primeiro.motor.score_final, segundo.motor.score_final)
+    assert all(isinstance(matriz, np.memmap) and matriz.mode == 'r' for matriz in matrizes)
+    assert matrizes[0].filename == matrizes[1].filename